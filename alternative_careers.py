@@ -1,81 +1,196 @@
 import os
-import pandas as pd
 from dotenv import load_dotenv
-from openai import OpenAI
+import asyncio
 import json
-from typing import Dict, List
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
+import numpy as np
+from datasets import similar_careers_map
+from llm import get_client, chat_completion, achat_completion
+from career_index import get_career_index, find_similar_careers
+from subject_match import get_subject_match_matrix, subject_match_score, DEFAULT_REQUIREMENTS
+from metrics import track_phase
+from prompts import PromptTemplate
+
+logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv()
 
+# Maximum number of GPT analyses in flight at once (shared by all requests in a process)
+ANALYSIS_MAX_WORKERS = int(os.getenv("ANALYSIS_MAX_WORKERS", "5"))
+
+# Seconds allowed for a single analyze_career_match completion
+ANALYSIS_CALL_TIMEOUT = float(os.getenv("ANALYSIS_CALL_TIMEOUT", "20"))
+
+# Seconds allowed for analyzing a whole list of careers
+ANALYSIS_DEADLINE = float(os.getenv("ANALYSIS_DEADLINE", "30"))
+
+# "parallel" makes one completion per career, "batch" scores several careers per completion,
+# "fast" ranks by subject match alone without calling GPT
+ANALYSIS_MODES = ("parallel", "batch", "fast")
+ANALYSIS_MODE = os.getenv("ANALYSIS_MODE", "parallel")
+
+# Maximum number of careers scored in a single batched completion
+ANALYSIS_BATCH_SIZE = int(os.getenv("ANALYSIS_BATCH_SIZE", "8"))
+
+# Careers returned when "fast" mode ranks the whole catalog
+ANALYSIS_FAST_LIMIT = int(os.getenv("ANALYSIS_FAST_LIMIT", "20"))
+
+# Shared by the per-career and batched prompts; only the answer format differs
+ANALYSIS_INSTRUCTIONS = """
+You are a career counseling expert who provides detailed academic-based career analysis.
+Focus on specific subjects and their relevance to careers.
+Provide concrete explanations linking academic performance to career requirements.
+Be specific about which subjects and skills matter for each career.
+For each career you are asked about:
+1. Analyze how the student's academic strengths align with it
+2. Consider its relationship to the student's current career interest
+3. Evaluate subject performance in its required areas
+"""
+
+MATCH_PROMPT = PromptTemplate(
+    "career_match",
+    instructions=ANALYSIS_INSTRUCTIONS + """
+    Return ONLY valid JSON in the following format:
+    {"matching_score": <score 0-100>, "explanation": "<2-3 sentences>", "key_skills": ["skill1", "skill2", "skill3"]}
+    """,
+    suffix="""
+    Analyze the suitability of '{career}' for a student with the following profile:
+    Academic Profile:
+    - GPA: {gpa}
+    - Key Subject Scores: {subjects}
+    Career Context:
+    - Current Career Interest: {predicted_career}
+    - Required Subjects: {required_subjects}
+    - Initial Subject Match Score: {subject_match_score:.1f}
+    """
+)
+
+BATCH_PROMPT = PromptTemplate(
+    "career_match_batch",
+    instructions=ANALYSIS_INSTRUCTIONS + """
+    Provide one entry per career, using the career names exactly as given.
+    Return ONLY valid JSON in the following format:
+    {"careers": [{"career": "<career name>", "matching_score": <score 0-100>, "explanation": "<2-3 sentences>", "key_skills": ["skill1", "skill2", "skill3"]}]}
+    """,
+    suffix="""
+    Analyze the suitability of each of the following careers for a student with this profile:
+    Academic Profile:
+    - GPA: {gpa}
+    - Key Subject Scores: {subjects}
+    Current Career Interest: {predicted_career}
+    Careers to analyze:
+    {careers_section}
+    """
+)
+
 class AlternativeCareersAnalyzer:
-    def __init__(self):
-        self.careers_df = pd.read_csv('recommender-data/raw/similar_careers_dataset.csv')
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    def __init__(self, max_workers: int = ANALYSIS_MAX_WORKERS):
+        # Threads are started lazily on first submit
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="career-analysis")
+
+    @property
+    def similar_careers(self) -> Dict[str, str]:
+        # Shared with CareerChatbot; the dataset is loaded once per process, on first use
+        return similar_careers_map()
+
+    @property
+    def client(self):
+        return get_client()
         
     def get_similar_careers(self, career):
-        try:
-            similar_careers = self.careers_df[self.careers_df['Career_Field'] == career]['Similar_Careers'].iloc[0]
-            return [c.strip() for c in similar_careers.split(',')]
-        except (IndexError, KeyError):
-            return []
+        similar_careers = self.similar_careers.get(career)
+        if not similar_careers:
+            # A casing or spelling variant of a dataset career gets that career's list;
+            # anything else gets its nearest neighbours from the local index
+            alias = get_career_index().resolve(career)
+            similar_careers = self.similar_careers.get(alias) if alias else None
+            if not similar_careers:
+                return [match["career"] for match in find_similar_careers(career)]
+        return [c.strip() for c in similar_careers.split(',')]
 
     def get_career_requirements(self, career):
         """
         Get typical academic requirements for a career
         """
-        career_requirements = {
-            'Software Engineer': ['Mathematics', 'Physics', 'Computer Science'],
-            'Data Scientist': ['Mathematics', 'Statistics', 'Computer Science'],
-            'Doctor': ['Biology', 'Chemistry', 'Physics'],
-            'Lawyer': ['English', 'History', 'Social Studies'],
-            'Architect': ['Mathematics', 'Physics', 'Art'],
-            'Real Estate Developer': ['Mathematics', 'Economics', 'Geography'],
-            'Property Manager': ['Mathematics', 'Economics', 'Business'],
-            'Urban Planner': ['Geography', 'Mathematics', 'Social Studies'],
-            'Real Estate Agent': ['Economics', 'Mathematics', 'Communication'],
-            'Construction Manager': ['Mathematics', 'Physics', 'Management'],
-        }
-        
-        return career_requirements.get(career, ['Mathematics', 'English', 'Critical Thinking'])
+        return get_subject_match_matrix().requirements_for(career) or list(DEFAULT_REQUIREMENTS)
 
     def calculate_subject_match(self, academic_scores: Dict, required_subjects: List[str]) -> float:
         """
         Calculate how well the academic scores match required subjects
         """
-        subject_mapping = {
-            'Mathematics': 'subject_mathematics',
-            'Physics': 'subject_physics',
-            'Chemistry': 'subject_chemistry',
-            'Biology': 'subject_biology',
-            'English': 'subject_english',
-            'Geography': 'subject_geography',
-            'History': 'subject_history'
+        return subject_match_score(academic_scores, required_subjects)
+
+    def subject_match_analysis(self, career: str, required_subjects: List[str], subject_match_score: float) -> Dict:
+        """
+        Analysis built from the subject-match score alone
+
+        Uses up to two of the required subjects; a career may list fewer.
+        """
+        subjects = list(required_subjects[:2])
+        if subjects:
+            explanation = f"Based on your academic profile, you show strong potential in {', '.join(subjects)} which are key requirements for a {career}."
+        else:
+            explanation = f"Based on your academic profile, this is how well your subjects match the requirements for a {career}."
+        key_skills = [
+            f"{skill} {subject}" for skill, subject in zip(("Proficiency in", "Strong foundation in"), subjects)
+        ]
+        key_skills.append("Analytical and problem-solving abilities")
+        return {
+            "matching_score": round(subject_match_score),
+            "explanation": explanation,
+            "key_skills": key_skills
         }
-        
-        total_score = 0
-        relevant_subjects = 0
-        
-        for subject in required_subjects:
-            if subject in subject_mapping:
-                score_key = subject_mapping[subject]
-                if score_key in academic_scores and academic_scores[score_key] is not None:
-                    total_score += academic_scores[score_key]
-                    relevant_subjects += 1
-        
-        return (total_score / relevant_subjects) if relevant_subjects > 0 else 70
 
-    def analyze_career_match(self, career: str, academic_scores: Dict, predicted_career: str) -> Dict:
+    def fallback_analysis(self, career: str, academic_scores: Dict) -> Dict:
         """
-        Analyze how well a career matches with the student's profile using GPT and academic alignment
+        Subject-match analysis used when GPT is unavailable, slow or returns bad data
         """
-        # Get required subjects for this career
         required_subjects = self.get_career_requirements(career)
-        
-        # Calculate initial match score based on academic alignment
         subject_match_score = self.calculate_subject_match(academic_scores, required_subjects)
-        
-        formatted_academics = {
+        return self.subject_match_analysis(career, required_subjects, subject_match_score)
+
+    def analyze_careers_fast(self, careers: List[str], academic_scores: Dict,
+                             limit: int = ANALYSIS_FAST_LIMIT) -> List[Dict]:
+        """
+        Rank careers by subject match alone, without calling GPT
+
+        Every career in the weight matrix is scored with one matrix-vector product.
+        With no careers given, the best `limit` careers of the whole catalog are returned.
+        """
+        matrix = get_subject_match_matrix()
+        match = matrix.match_scores(academic_scores)
+
+        if careers:
+            scored = []
+            for career in careers:
+                row = matrix.row(career)
+                if row is None:
+                    required_subjects = self.get_career_requirements(career)
+                    scored.append((career, required_subjects, self.calculate_subject_match(academic_scores, required_subjects)))
+                else:
+                    scored.append((career, matrix.requirements[row], float(match[row])))
+        else:
+            scored = [
+                (matrix.careers[row], matrix.requirements[row], float(match[row]))
+                for row in np.argsort(-match, kind="stable")[:limit]
+            ]
+
+        analyzed_careers = [
+            {"career": career, **self.subject_match_analysis(career, required_subjects, score)}
+            for career, required_subjects, score in scored
+        ]
+        analyzed_careers.sort(key=lambda x: x["matching_score"], reverse=True)
+        return analyzed_careers
+
+    def format_academics(self, academic_scores: Dict) -> Dict:
+        """
+        Shape the academic scores the way they are presented to GPT
+        """
+        return {
             "GPA": academic_scores.get("gpa", "Not provided"),
             "Subjects": {
                 "Mathematics": academic_scores.get("subject_mathematics"),
@@ -88,91 +203,319 @@ class AlternativeCareersAnalyzer:
             }
         }
 
-        prompt = f"""
-        Analyze the suitability of '{career}' for a student with the following profile:
+    def build_match_messages(self, career: str, academic_scores: Dict, predicted_career: str):
+        """
+        Chat messages for analyzing one career
 
-        Academic Profile:
-        - GPA: {formatted_academics['GPA']}
-        - Key Subject Scores: {json.dumps(formatted_academics['Subjects'], indent=2)}
+        Returns:
+            A (messages, subject_match_score) tuple
+        """
+        # Get required subjects for this career
+        required_subjects = self.get_career_requirements(career)
         
-        Career Context:
-        - Current Career Interest: {predicted_career}
-        - Required Subjects: {', '.join(required_subjects)}
-        - Initial Subject Match Score: {subject_match_score:.1f}
+        # Calculate initial match score based on academic alignment
+        subject_match_score = self.calculate_subject_match(academic_scores, required_subjects)
+        
+        formatted_academics = self.format_academics(academic_scores)
 
-        Task:
-        1. Analyze how the student's academic strengths align with {career}
-        2. Consider the relationship between {career} and {predicted_career}
-        3. Evaluate subject performance in required areas: {', '.join(required_subjects)}
+        messages = MATCH_PROMPT.messages(
+            career=career,
+            gpa=formatted_academics['GPA'],
+            subjects=json.dumps(formatted_academics['Subjects']),
+            predicted_career=predicted_career,
+            required_subjects=', '.join(required_subjects),
+            subject_match_score=subject_match_score
+        )
+        return messages, subject_match_score
 
-        Provide analysis in the specified JSON format.
+    def parse_match_response(self, content: str, subject_match_score: float) -> Dict:
+        """
+        Blend the GPT analysis with the subject match score; raises if the response is malformed
         """
+        with track_phase("json_parse"):
+            result = json.loads(content)
+        
+        # Ensure the matching score takes into account both GPT analysis and subject match
+        final_score = (result["matching_score"] + subject_match_score) / 2
+        
+        return {
+            "matching_score": round(final_score),
+            "explanation": result["explanation"],
+            "key_skills": result["key_skills"]
+        }
+
+    def match_completion(self, career: str, academic_scores: Dict, predicted_career: str,
+                         timeout: Optional[float] = None):
+        """
+        Arguments of the completion analyzing one career (shared by the sync and async paths)
+
+        Returns:
+            A (completion kwargs, subject_match_score) tuple
+        """
+        with track_phase("prompt_build"):
+            messages, subject_match_score = self.build_match_messages(career, academic_scores, predicted_career)
+        return {
+            "model": "gpt-4o",
+            "messages": messages,
+            "temperature": 0.7,
+            "max_tokens": 400,
+            "response_format": {"type": "json_object"},
+            "timeout": timeout if timeout is not None else ANALYSIS_CALL_TIMEOUT
+        }, subject_match_score
 
+    def failed_match(self, career: str, academic_scores: Dict, error: Exception) -> Dict:
+        logger.warning("Error in GPT analysis for %s: %s", career, error)
+        # Provide a more specific fallback based on subject match
+        return self.fallback_analysis(career, academic_scores)
+
+    def analyze_career_match(self, career: str, academic_scores: Dict, predicted_career: str, timeout: Optional[float] = None) -> Dict:
+        """
+        Analyze how well a career matches with the student's profile using GPT and academic alignment
+        """
+        completion, subject_match_score = self.match_completion(career, academic_scores, predicted_career, timeout)
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": """You are a career counseling expert who provides detailed academic-based career analysis.
-                        Focus on specific subjects and their relevance to careers.
-                        Provide concrete explanations linking academic performance to career requirements.
-                        Be specific about which subjects and skills matter for each career.
-                        
-                        Return ONLY valid JSON in the following format:
-                        {
-                            "matching_score": <score 0-100>,
-                            "explanation": "<2-3 sentences>",
-                            "key_skills": ["skill1", "skill2", "skill3"]
-                        }"""
-                    },
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=400,
-                response_format={"type": "json_object"}
-            )
-            
-            result = json.loads(response.choices[0].message.content)
-            
-            # Ensure the matching score takes into account both GPT analysis and subject match
-            final_score = (result["matching_score"] + subject_match_score) / 2
-            
-            return {
-                "matching_score": round(final_score),
-                "explanation": result["explanation"],
-                "key_skills": result["key_skills"]
-            }
-            
+            response = chat_completion(**completion)
+            return self.parse_match_response(response.choices[0].message.content, subject_match_score)
+        except Exception as e:
+            return self.failed_match(career, academic_scores, e)
+
+    async def aanalyze_career_match(self, career: str, academic_scores: Dict, predicted_career: str,
+                                    timeout: Optional[float] = None) -> Dict:
+        """
+        analyze_career_match awaiting the completion on the shared async client
+        """
+        completion, subject_match_score = self.match_completion(career, academic_scores, predicted_career, timeout)
+        try:
+            response = await achat_completion(**completion)
+            return self.parse_match_response(response.choices[0].message.content, subject_match_score)
         except Exception as e:
-            print(f"Error in GPT analysis for {career}: {str(e)}")
-            # Provide a more specific fallback based on subject match
-            return {
-                "matching_score": round(subject_match_score),
-                "explanation": f"Based on your academic profile, you show strong potential in {', '.join(required_subjects[:2])} which are key requirements for a {career}.",
-                "key_skills": [
-                    f"Proficiency in {required_subjects[0]}",
-                    f"Strong foundation in {required_subjects[1]}",
-                    "Analytical and problem-solving abilities"
-                ]
+            return self.failed_match(career, academic_scores, e)
+
+    def build_batch_messages(self, careers: List[str], academic_scores: Dict, predicted_career: str):
+        """
+        Chat messages for analyzing several careers in one completion
+
+        Returns:
+            A (messages, career_context) tuple; career_context maps each career to its
+            required subjects and subject match score
+        """
+        formatted_academics = self.format_academics(academic_scores)
+
+        career_context = {}
+        for career in careers:
+            required_subjects = self.get_career_requirements(career)
+            career_context[career] = {
+                "required_subjects": required_subjects,
+                "subject_match_score": self.calculate_subject_match(academic_scores, required_subjects)
             }
 
+        careers_section = "\n".join(
+            f"- {career}: required subjects {', '.join(context['required_subjects'])}; "
+            f"initial subject match score {context['subject_match_score']:.1f}"
+            for career, context in career_context.items()
+        )
+
+        messages = BATCH_PROMPT.messages(
+            gpa=formatted_academics['GPA'],
+            subjects=json.dumps(formatted_academics['Subjects']),
+            predicted_career=predicted_career,
+            careers_section=careers_section
+        )
+        return messages, career_context
+
+    def parse_batch_response(self, entries, careers: List[str], career_context: Dict, academic_scores: Dict) -> List[Dict]:
+        """
+        Validate each entry of a batched response; missing or malformed careers get the fallback
+        """
+        # Index valid entries by normalized career name
+        results_by_career = {}
+        for entry in entries if isinstance(entries, list) else []:
+            try:
+                name = entry["career"].strip().casefold()
+                score = float(entry["matching_score"])
+                explanation = entry["explanation"]
+                key_skills = entry["key_skills"]
+            except (KeyError, TypeError, ValueError, AttributeError):
+                continue
+            if not 0 <= score <= 100 or not isinstance(explanation, str) or not isinstance(key_skills, list):
+                continue
+            results_by_career.setdefault(name, (score, explanation, [str(skill) for skill in key_skills]))
+
+        analyses = []
+        for career in careers:
+            result = results_by_career.get(career.strip().casefold())
+            if result is None:
+                logger.info("Batched GPT analysis missing or invalid for %s, using fallback", career)
+                analyses.append(self.fallback_analysis(career, academic_scores))
+                continue
+            score, explanation, key_skills = result
+            # Same blend of GPT analysis and subject match as analyze_career_match
+            final_score = (score + career_context[career]["subject_match_score"]) / 2
+            analyses.append({
+                "matching_score": round(final_score),
+                "explanation": explanation,
+                "key_skills": key_skills
+            })
+        return analyses
+
+    def batch_completion(self, careers: List[str], academic_scores: Dict, predicted_career: str,
+                         timeout: Optional[float] = None):
+        """
+        Arguments of the completion analyzing several careers (shared by the sync and async paths)
+
+        Returns:
+            A (completion kwargs, career_context) tuple
+        """
+        with track_phase("prompt_build"):
+            messages, career_context = self.build_batch_messages(careers, academic_scores, predicted_career)
+        return {
+            "model": "gpt-4o",
+            "messages": messages,
+            "temperature": 0.7,
+            "max_tokens": 100 + 250 * len(careers),
+            "response_format": {"type": "json_object"},
+            "timeout": timeout if timeout is not None else ANALYSIS_CALL_TIMEOUT
+        }, career_context
+
+    def batch_entries(self, response) -> List:
+        """The per-career entries of a batched response; raises if it is not valid JSON."""
+        with track_phase("json_parse"):
+            return json.loads(response.choices[0].message.content).get("careers", [])
+
+    def failed_batch(self, careers: List[str], error: Exception) -> List:
+        logger.warning("Error in batched GPT analysis for %s: %s", ", ".join(careers), error)
+        return []
+
+    def analyze_career_matches_batched(self, careers: List[str], academic_scores: Dict, predicted_career: str,
+                                       timeout: Optional[float] = None) -> List[Dict]:
+        """
+        Analyze several careers against the same profile in one structured JSON completion
+
+        The academic profile and predicted career are sent once instead of once per
+        career. Each returned entry is validated on its own; careers that are missing
+        or malformed in the response get the subject-match fallback.
+        """
+        completion, career_context = self.batch_completion(careers, academic_scores, predicted_career, timeout)
+        try:
+            entries = self.batch_entries(chat_completion(**completion))
+        except Exception as e:
+            entries = self.failed_batch(careers, e)
+        return self.parse_batch_response(entries, careers, career_context, academic_scores)
+
+    async def aanalyze_career_matches_batched(self, careers: List[str], academic_scores: Dict, predicted_career: str,
+                                              timeout: Optional[float] = None) -> List[Dict]:
+        """
+        analyze_career_matches_batched awaiting the completion on the shared async client
+        """
+        completion, career_context = self.batch_completion(careers, academic_scores, predicted_career, timeout)
+        try:
+            entries = self.batch_entries(await achat_completion(**completion))
+        except Exception as e:
+            entries = self.failed_batch(careers, e)
+        return self.parse_batch_response(entries, careers, career_context, academic_scores)
+
+    def _analyze_chunk(self, careers: List[str], academic_scores: Dict, predicted_career: str,
+                       timeout: Optional[float] = None) -> List[Dict]:
+        return [self.analyze_career_match(career, academic_scores, predicted_career, timeout) for career in careers]
+
+    async def _aanalyze_chunk(self, careers: List[str], academic_scores: Dict, predicted_career: str,
+                              timeout: Optional[float] = None) -> List[Dict]:
+        return [await self.aanalyze_career_match(career, academic_scores, predicted_career, timeout) for career in careers]
+
+    def _chunks(self, careers: List[str], mode: str) -> List[List[str]]:
+        """Careers grouped by completion: ANALYSIS_BATCH_SIZE at a time in "batch" mode, one each otherwise."""
+        if mode == "batch":
+            return [careers[i:i + ANALYSIS_BATCH_SIZE] for i in range(0, len(careers), ANALYSIS_BATCH_SIZE)]
+        return [[career] for career in careers]
+
+    def _collect(self, chunks: List[List[str]], futures: List, academic_scores: Dict,
+                 deadline: float, started: float) -> List[Dict]:
+        """
+        Results of the finished futures (concurrent or asyncio), sorted by matching score
+
+        Chunks whose future failed or is still running get the subject-match
+        fallback; running ones are cancelled.
+        """
+        analyzed_careers = []
+        for chunk, future in zip(chunks, futures):
+            if future.done() and not future.cancelled() and future.exception() is None:
+                analyses = future.result()
+            else:
+                if not future.done():
+                    future.cancel()
+                    logger.warning("GPT analysis for %s missed the %gs deadline (%.1fs elapsed)",
+                                   ", ".join(chunk), deadline, time.monotonic() - started)
+                analyses = [self.fallback_analysis(career, academic_scores) for career in chunk]
+            for career, analysis in zip(chunk, analyses):
+                analyzed_careers.append({
+                    "career": career,
+                    "matching_score": analysis["matching_score"],
+                    "explanation": analysis["explanation"],
+                    "key_skills": analysis["key_skills"]
+                })
+
+        # Sort by matching score
+        analyzed_careers.sort(key=lambda x: x["matching_score"], reverse=True)
+        return analyzed_careers
+
+    def analyze_careers(self, careers: List[str], academic_scores: Dict, predicted_career: str,
+                        mode: str = ANALYSIS_MODE, call_timeout: float = ANALYSIS_CALL_TIMEOUT,
+                        deadline: float = ANALYSIS_DEADLINE) -> List[Dict]:
+        """
+        Analyze several careers concurrently and return them sorted by matching score
+
+        In "parallel" mode each career gets its own completion; in "batch" mode careers
+        are scored ANALYSIS_BATCH_SIZE at a time in a single completion. Either way the
+        work runs on the shared thread pool, and careers whose analysis fails or does
+        not finish before the deadline get the subject-match fallback. "fast" mode skips
+        GPT entirely (see analyze_careers_fast). Ties keep the input order, so the
+        result is deterministic.
+        """
+        if mode not in ANALYSIS_MODES:
+            raise ValueError(f"Unknown analysis mode: {mode}")
+        if mode == "fast":
+            return self.analyze_careers_fast(careers, academic_scores)
+
+        started = time.monotonic()
+        analyze = self.analyze_career_matches_batched if mode == "batch" else self._analyze_chunk
+        chunks = self._chunks(careers, mode)
+        futures = [
+            self.executor.submit(analyze, chunk, academic_scores, predicted_career, call_timeout)
+            for chunk in chunks
+        ]
+        wait(futures, timeout=deadline)
+        return self._collect(chunks, futures, academic_scores, deadline, started)
+
+    async def aanalyze_careers(self, careers: List[str], academic_scores: Dict, predicted_career: str,
+                               mode: str = ANALYSIS_MODE, call_timeout: float = ANALYSIS_CALL_TIMEOUT,
+                               deadline: float = ANALYSIS_DEADLINE) -> List[Dict]:
+        """
+        analyze_careers for the async serving mode
+
+        Same modes, deadline, fallbacks and ordering, but every completion is a
+        task on the event loop rather than a thread from the shared pool.
+        """
+        if mode not in ANALYSIS_MODES:
+            raise ValueError(f"Unknown analysis mode: {mode}")
+        if mode == "fast":
+            return self.analyze_careers_fast(careers, academic_scores)
+
+        started = time.monotonic()
+        analyze = self.aanalyze_career_matches_batched if mode == "batch" else self._aanalyze_chunk
+        chunks = self._chunks(careers, mode)
+        tasks = [
+            asyncio.ensure_future(analyze(chunk, academic_scores, predicted_career, call_timeout))
+            for chunk in chunks
+        ]
+        if tasks:
+            await asyncio.wait(tasks, timeout=deadline)
+        return self._collect(chunks, tasks, academic_scores, deadline, started)
+
     def get_alternative_careers(self, predicted_career: str, academic_scores: Dict) -> List[Dict]:
         """
         Get alternative careers with detailed analysis based on academic performance
         """
         similar_careers = self.get_similar_careers(predicted_career)
         
-        analyzed_careers = []
-        for career in similar_careers[:5]:  # Limit to top 5 alternatives
-            analysis = self.analyze_career_match(career, academic_scores, predicted_career)
-            analyzed_careers.append({
-                "career": career,
-                "matching_score": analysis["matching_score"],
-                "explanation": analysis["explanation"],
-                "key_skills": analysis["key_skills"]
-            })
-            
-        # Sort by matching score
-        analyzed_careers.sort(key=lambda x: x["matching_score"], reverse=True)
-        return analyzed_careers 
\ No newline at end of file
+        # Limit to top 5 alternatives
+        return self.analyze_careers(similar_careers[:5], academic_scores, predicted_career)
\ No newline at end of file
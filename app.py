@@ -1,13 +1,35 @@
-from flask import Flask, request, jsonify
-import joblib
-import os
-import pandas as pd
-from flask_cors import CORS
-from chatbot import CareerChatbot  
-from gpt_chatbot import handle_chat
-from career_details import get_career_details
-from career_roadmap import generate_career_roadmap
-from alternative_careers import AlternativeCareersAnalyzer
+from startup import phase, timing_report, memory_usage, Lazy, LAZY_STARTUP
+
+with phase("import:flask"):
+    import logging
+    import time
+    from flask import Flask, request, jsonify, Response, stream_with_context, g
+    from flask_cors import CORS
+with phase("import:joblib"):
+    import joblib
+    import os
+    import numpy as np
+with phase("import:services"):
+    from predictor import CareerPredictor
+    from gpt_chatbot import handle_chat, handle_chat_stream, get_career_chatbot
+    from career_details import get_career_details, stream_career_details, career_details_cache
+    from career_roadmap import generate_career_roadmap, stream_career_roadmap
+    from streaming import sse_event
+    from alternative_careers import AlternativeCareersAnalyzer, ANALYSIS_MODE, ANALYSIS_MODES
+    from datasets import similar_careers_map
+    from llm import get_client, completion_flight, openai_breaker
+    from budget import budget_manager, budget_collector
+    from prompts import prompt_collector, template_stats
+    from knowledge_base import get_knowledge_base
+    from context_builder import load_tokenizers
+    from subject_match import get_subject_match_matrix
+    from career_index import get_career_index, find_similar_careers
+    from university_summaries import university_summary_cache
+    import metrics
+    from log_config import configure_logging
+
+configure_logging()
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
@@ -21,13 +43,7 @@ CORS(app, resources={
 })
 
 script_dir = os.path.dirname(os.path.abspath(__file__))
-model = joblib.load(os.path.join(script_dir, "../recommender-models/career_xgb.pkl"))
-scaler = joblib.load(os.path.join(script_dir, "../recommender-models/scaler.pkl"))
-label_encoder = joblib.load(os.path.join(script_dir, "../recommender-models/label_encoder.pkl"))
-
-# Initialize services
-chatbot = CareerChatbot()
-alternative_careers_analyzer = AlternativeCareersAnalyzer()
+model_dir = os.getenv("MODEL_DIR", os.path.join(script_dir, "../recommender-models"))
 
 # Expected input fields
 expected_features = [
@@ -35,42 +51,199 @@ expected_features = [
     "chemistry_score", "biology_score", "english_score", "geography_score"
 ]
 
+def load_predictor():
+    """Load the model artifacts and build the precompiled inference path."""
+    model = joblib.load(os.path.join(model_dir, "career_xgb.pkl"))
+    scaler = joblib.load(os.path.join(model_dir, "scaler.pkl"))
+    label_encoder = joblib.load(os.path.join(model_dir, "label_encoder.pkl"))
+    return CareerPredictor(model, scaler, label_encoder, expected_features)
+
+# Model artifacts are loaded on first use (or by /warmup)
+predictor = Lazy(load_predictor, "model")
+
+# Initialize services
+alternative_careers_analyzer = AlternativeCareersAnalyzer()
+
+# Counters kept by the caches and the coalescing layer are sampled on each scrape
+metrics.register_collector(metrics.cache_collector("career_details", career_details_cache.stats))
+metrics.register_collector(metrics.cache_collector("university_summaries", university_summary_cache.stats))
+metrics.register_collector(metrics.flight_collector(completion_flight))
+metrics.register_collector(budget_collector(budget_manager))
+metrics.register_collector(prompt_collector())
+
+def route_label():
+    """Route template of the current request (bounded label cardinality), or "unmatched"."""
+    return request.url_rule.rule if request.url_rule else "unmatched"
+
+@app.before_request
+def start_request_metrics():
+    g.metrics_started = time.perf_counter()
+    g.metrics_route = route_label()
+    metrics.http_in_flight.inc(route=g.metrics_route)
+
+@app.after_request
+def record_request_metrics(response):
+    # Streaming routes are measured to the first byte; the body is produced after this hook
+    route = g.get("metrics_route", "unmatched")
+    if "metrics_started" in g:
+        metrics.http_request_duration.observe(
+            time.perf_counter() - g.metrics_started, route=route, method=request.method
+        )
+    metrics.http_requests.inc(route=route, method=request.method, status=response.status_code)
+    return response
+
+@app.teardown_request
+def finish_request_metrics(exc):
+    if "metrics_route" in g:
+        metrics.http_in_flight.dec(route=g.pop("metrics_route"))
+
+def warmup():
+    """Load every deferred resource now; returns the startup timing report."""
+    predictor.get()
+    get_career_chatbot()
+    similar_careers_map()
+    get_knowledge_base()
+    get_subject_match_matrix()
+    get_career_index()
+    get_client()
+    load_tokenizers(budget_manager.budgets)
+    return timing_report()
+
+# Number of careers returned with probabilities by /predict
+DEFAULT_TOP_K = int(os.getenv("PREDICT_TOP_K", "3"))
+
+# Top-1 probability at or above which callers can skip the GPT alternatives pipeline
+CONFIDENCE_THRESHOLD = float(os.getenv("CONFIDENCE_THRESHOLD", "0.6"))
+
+# Upper bound on the number of records accepted by /predict/batch
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "10000"))
+
+def sse_response(events):
+    """Wrap a generator of SSE messages in a streaming response."""
+    return Response(
+        stream_with_context(events),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def parse_top_k(value):
+    """Parse the optional top_k parameter, clamped to the number of known careers."""
+    if value is None:
+        return DEFAULT_TOP_K
+    top_k = int(value)
+    if top_k < 1:
+        raise ValueError("top_k must be a positive integer")
+    return min(top_k, len(predictor.get().classes))
+
+def format_prediction(top_careers):
+    """Build the prediction payload from (career, probability) pairs, best first."""
+    career, confidence = top_careers[0]
+    return {
+        "career": career,
+        "confidence_score": round(confidence, 4),
+        "confident": confidence >= CONFIDENCE_THRESHOLD,
+        "top_careers": [
+            {"career": name, "probability": round(probability, 4)}
+            for name, probability in top_careers
+        ]
+    }
+
+def parse_feature_row(record):
+    """
+    Validate a single score record and return its values in expected_features order.
+
+    Returns:
+        A (values, error) tuple where exactly one of the two is None
+    """
+    if not isinstance(record, dict):
+        return None, "Expected an object with score fields."
+
+    values = []
+    for feature in expected_features:
+        if feature not in record:
+            return None, f"Missing required field: {feature}"
+        try:
+            values.append(float(record[feature]))
+        except (ValueError, TypeError):
+            return None, f"Invalid value for {feature}. Expected a number."
+    return values, None
+
+def analysis_request_error(careers, academic_scores, predicted_career, mode):
+    """Validation message for an /analyze-careers request, or None when it is valid."""
+    if mode not in ANALYSIS_MODES:
+        return f"Invalid mode. Expected one of: {', '.join(ANALYSIS_MODES)}"
+    # Fast mode needs no GPT context and ranks the whole catalog when no careers are given
+    if not academic_scores or (mode != "fast" and (not careers or not predicted_career)):
+        return "Missing required data"
+    return None
+
 @app.route("/predict", methods=["POST"])
 def predict():
     try:
         data = request.json
-        print("\n📊 Received prediction request with data:", data)
-        
-        # Ensure all expected fields are present and convert to float
-        features = {}
-        for feature in expected_features:
-            if feature not in data:
-                return jsonify({"error": f"Missing required field: {feature}"}), 400
-            try:
-                features[feature] = float(data[feature])
-            except (ValueError, TypeError):
-                return jsonify({"error": f"Invalid value for {feature}. Expected a number."}), 400
-
-        # Create DataFrame with the features
-        features_df = pd.DataFrame([features])
-        features_df = features_df[expected_features]
-        
-        # Scale the features
-        features_scaled = scaler.transform(features_df)
-        print("🔢 Scaled features:", features_scaled)
+        values, error = parse_feature_row(data)
+        if error:
+            return jsonify({"error": error}), 400
+
+        try:
+            top_k = parse_top_k(data.get("top_k"))
+        except (ValueError, TypeError):
+            return jsonify({"error": "Invalid value for top_k. Expected a positive integer."}), 400
+
+        # Probabilities and the predicted career come from the same forward pass
+        top_careers = predictor.get().predict_one_top_k(values, top_k)
+
+        return jsonify(format_prediction(top_careers))
+
+    except Exception as e:
+        logger.exception("Error in prediction")
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/predict/batch", methods=["POST"])
+def predict_batch():
+    """Score a whole cohort of students in a single scale/predict/decode pass."""
+    try:
+        data = request.json or {}
+        records = data.get("records") if isinstance(data, dict) else data
+
+        try:
+            top_k = parse_top_k(data.get("top_k") if isinstance(data, dict) else None)
+        except (ValueError, TypeError):
+            return jsonify({"error": "Invalid value for top_k. Expected a positive integer."}), 400
+
+        if not isinstance(records, list) or not records:
+            return jsonify({"error": "A non-empty list of records is required"}), 400
+        if len(records) > MAX_BATCH_SIZE:
+            return jsonify({"error": f"Batch too large. Maximum is {MAX_BATCH_SIZE} records."}), 400
+
+        # Validate every record up front, collecting per-row errors
+        results = [None] * len(records)
+        valid_rows = []
+        valid_values = []
+        for i, record in enumerate(records):
+            values, error = parse_feature_row(record)
+            if error:
+                results[i] = {"index": i, "error": error}
+            else:
+                valid_rows.append(i)
+                valid_values.append(values)
+
+        if valid_rows:
+            features = np.array(valid_values, dtype=np.float64)
+            predictions = predictor.get().predict_batch_top_k(features, top_k)
 
-        # Predict the career
-        predicted_label = model.predict(features_scaled)[0]
-        predicted_career = label_encoder.inverse_transform([predicted_label])[0]
-        print("🎯 Predicted career:", predicted_career)
+            for i, top_careers in zip(valid_rows, predictions):
+                results[i] = {"index": i, **format_prediction(top_careers)}
 
         return jsonify({
-            "career": predicted_career,
-            "confidence_score": 0.85  # Example confidence score
+            "results": results,
+            "total": len(records),
+            "succeeded": len(valid_rows),
+            "failed": len(records) - len(valid_rows)
         })
 
     except Exception as e:
-        print("❌ Error in prediction:", str(e))
+        logger.exception("Error in batch prediction")
         return jsonify({"error": str(e)}), 500
 
 @app.route("/chatbot-recommend", methods=["POST"])
@@ -89,7 +262,28 @@ def chatbot_recommend():
         })
     
     except Exception as e:
-        print(f"Error in chatbot recommend: {str(e)}")
+        logger.warning("Error in chatbot recommend: %s", e)
+        return jsonify({"error": str(e)}), 400
+
+@app.route("/similar-careers", methods=["GET"])
+def similar_careers():
+    """Nearest careers to any career name, with similarity scores, from the local index."""
+    try:
+        career = request.args.get('career', '').strip()
+        if not career:
+            return jsonify({"error": "Career is required"}), 400
+        k = int(request.args.get('k', 5))
+        if k < 1:
+            return jsonify({"error": "k must be a positive integer"}), 400
+
+        return jsonify({
+            "career": career,
+            "resolved_career": get_career_index().resolve(career),
+            "similar_careers": find_similar_careers(career, k)
+        })
+
+    except Exception as e:
+        logger.warning("Error in similar careers: %s", e)
         return jsonify({"error": str(e)}), 400
 
 @app.route("/analyze-careers", methods=["POST"])
@@ -100,26 +294,19 @@ def analyze_careers():
         careers = data.get('careers', [])
         academic_scores = data.get('academic_scores', {})
         predicted_career = data.get('predicted_career')
+        mode = request.args.get('mode') or data.get('mode') or ANALYSIS_MODE
+
+        error = analysis_request_error(careers, academic_scores, predicted_career, mode)
+        if error:
+            return jsonify({"error": error}), 400
 
-        if not careers or not academic_scores or not predicted_career:
-            return jsonify({"error": "Missing required data"}), 400
-
-        analyzed_careers = []
-        for career in careers:
-            analysis = alternative_careers_analyzer.analyze_career_match(
-                career, 
-                academic_scores, 
-                predicted_career
-            )
-            analyzed_careers.append({
-                "career": career,
-                "matching_score": analysis["matching_score"],
-                "explanation": analysis["explanation"],
-                "key_skills": analysis["key_skills"]
-            })
-
-        # Sort by matching score
-        analyzed_careers.sort(key=lambda x: x["matching_score"], reverse=True)
+        # Analyses run concurrently; the result is already sorted by matching score
+        analyzed_careers = alternative_careers_analyzer.analyze_careers(
+            careers,
+            academic_scores,
+            predicted_career,
+            mode=mode
+        )
         
         return jsonify({
             "success": True,
@@ -127,7 +314,7 @@ def analyze_careers():
         })
 
     except Exception as e:
-        print(f"Error in analyze careers: {str(e)}")
+        logger.exception("Error in analyze careers")
         return jsonify({"error": str(e)}), 400
 
 #new route for our chatbot
@@ -139,13 +326,46 @@ def chat():
         if not user_input:
             return jsonify({"error": "Message is required"}), 400
 
-        history = []  # in-memory; store in session/db for longer chat
-        response = handle_chat(user_input, history)
+        # History is kept per session_id by gpt_chatbot's session store; without one, none is used
+        response = handle_chat(
+            user_input,
+            career=data.get("career"),
+            gpa=data.get("gpa"),
+            subject_grades=data.get("subject_grades"),
+            session_id=data.get("session_id")
+        )
         return jsonify({"response": response})
     
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
+@app.route("/chat/stream", methods=["POST"])
+def chat_stream():
+    """Streams the chatbot response as Server-Sent Events."""
+    data = request.json or {}
+    user_input = data.get("message", "")
+    if not user_input:
+        return jsonify({"error": "Message is required"}), 400
+
+    def events():
+        chunks = []
+        try:
+            for chunk in handle_chat_stream(
+                user_input,
+                career=data.get("career"),
+                gpa=data.get("gpa"),
+                subject_grades=data.get("subject_grades"),
+                session_id=data.get("session_id")
+            ):
+                chunks.append(chunk)
+                yield sse_event({"content": chunk}, event="chunk")
+            yield sse_event({"response": "".join(chunks)}, event="done")
+        except Exception as e:
+            logger.exception("Error in chat stream")
+            yield sse_event({"error": str(e)}, event="error")
+
+    return sse_response(events())
+
 @app.route("/career-details", methods=["POST"])
 def career_details():
     """Handles requests for detailed career information."""
@@ -153,24 +373,38 @@ def career_details():
         data = request.json
         career = data.get('career')
         
-        print(f"Career details requested in AI service for: {career}")
-
         if not career:
             return jsonify({"error": "Career is required", "success": False}), 400
 
         # Get detailed information about the career
-        print(f"Calling OpenAI for career details: {career}")
         details = get_career_details(career)
-        
-        print(f"Career details success: {details.get('success', False)}")
+        logger.info("Career details served", extra={"career": career, "success": details.get("success", False)})
         
         return jsonify(details)
     
     except Exception as e:
         error_msg = f"Error getting career details: {str(e)}"
-        print(f"Error in career details endpoint: {error_msg}")
+        logger.exception("Error in career details endpoint")
         return jsonify({"error": error_msg, "success": False}), 400
 
+@app.route("/career-details/stream", methods=["POST"])
+def career_details_stream():
+    """Streams career details as Server-Sent Events."""
+    data = request.json or {}
+    career = data.get('career')
+    if not career:
+        return jsonify({"error": "Career is required", "success": False}), 400
+
+    def events():
+        try:
+            for event, payload in stream_career_details(career):
+                yield sse_event(payload, event=event)
+        except Exception as e:
+            logger.exception("Error in career details stream", extra={"career": career})
+            yield sse_event({"error": str(e), "success": False}, event="error")
+
+    return sse_response(events())
+
 @app.route("/career-roadmap", methods=["POST"])
 def career_roadmap():
     """Handles requests for career roadmap generation."""
@@ -180,23 +414,73 @@ def career_roadmap():
         subject_grades = data.get('subject_grades', {})
         gpa = data.get('gpa')
         
-        print(f"Career roadmap requested in AI service for: {career}")
-
         if not career:
             return jsonify({"error": "Career is required", "success": False}), 400
 
         # Generate roadmap for the career
-        print(f"Calling OpenAI for career roadmap: {career}")
         roadmap = generate_career_roadmap(career, subject_grades, gpa)
-        
-        print(f"Career roadmap success: {roadmap.get('success', False)}")
+        logger.info("Career roadmap served", extra={"career": career, "success": roadmap.get("success", False)})
         
         return jsonify(roadmap)
     
     except Exception as e:
         error_msg = f"Error generating career roadmap: {str(e)}"
-        print(f"Error in career roadmap endpoint: {error_msg}")
+        logger.exception("Error in career roadmap endpoint")
         return jsonify({"error": error_msg, "success": False}), 400
 
+@app.route("/career-roadmap/stream", methods=["POST"])
+def career_roadmap_stream():
+    """Streams the career roadmap section by section as Server-Sent Events."""
+    data = request.json or {}
+    career = data.get('career')
+    if not career:
+        return jsonify({"error": "Career is required", "success": False}), 400
+
+    def events():
+        try:
+            for event, payload in stream_career_roadmap(career, data.get('subject_grades', {}), data.get('gpa')):
+                yield sse_event(payload, event=event)
+        except Exception as e:
+            logger.exception("Error in career roadmap stream", extra={"career": career})
+            yield sse_event({"error": str(e), "success": False}, event="error")
+
+    return sse_response(events())
+
+@app.route("/warmup", methods=["GET", "POST"])
+def warmup_route():
+    """Pre-loads models, datasets and the OpenAI client so the first real request is fast."""
+    try:
+        timings = warmup()
+        return jsonify({"success": True, "timings_ms": timings})
+    except Exception as e:
+        logger.exception("Error during warmup")
+        return jsonify({"success": False, "error": str(e), "timings_ms": timing_report()}), 500
+
+@app.route("/memory-stats", methods=["GET"])
+def memory_stats():
+    """RSS/PSS of the worker serving this request."""
+    return jsonify(memory_usage())
+
+@app.route("/cache-stats", methods=["GET"])
+def cache_stats():
+    """Hit/miss counters for the response caches and coalesced GPT calls, the remaining LLM budgets, the breaker state and prompt sizes."""
+    return jsonify({
+        "career_details": career_details_cache.stats(),
+        "knowledge_base": get_knowledge_base().stats(),
+        "single_flight": completion_flight.stats(),
+        "llm_budget": budget_manager.stats(),
+        "circuit_breaker": openai_breaker.stats(),
+        "prompts": template_stats()
+    })
+
+@app.route("/metrics", methods=["GET"])
+def metrics_route():
+    """Prometheus text exposition of this worker's request, phase, LLM and cache metrics."""
+    return Response(metrics.render(), mimetype=metrics.CONTENT_TYPE)
+
+if not LAZY_STARTUP:
+    warmup()
+logger.info("Startup timings", extra={"timings_ms": timing_report()})
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5001, debug=True)
@@ -0,0 +1,154 @@
+"""
+Async serving mode: uvicorn asgi:app --host 0.0.0.0 --port 8080 --workers 2
+
+The GPT-backed endpoints (/chat, /career-details, /career-roadmap and
+/analyze-careers) are served natively on the event loop with the shared
+AsyncOpenAI client, so a worker waiting on completions holds a coroutine
+rather than a thread and one process can keep hundreds of them in flight.
+Every other route is the Flask app, mounted unchanged behind a WSGI adapter
+that runs it on a thread pool.
+
+Blocking work is kept off the event loop: deferred resources and tokenizers
+are loaded at startup, and the SQLite-backed cache and session store are read
+and written in threads (asyncio.to_thread) by the async handlers.
+"""
+import logging
+import time
+from contextlib import asynccontextmanager
+from functools import wraps
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+from starlette.routing import Mount, Route
+
+from app import app as flask_app, alternative_careers_analyzer, analysis_request_error, warmup
+from alternative_careers import ANALYSIS_MODE
+from career_details import aget_career_details
+from career_roadmap import agenerate_career_roadmap
+from gpt_chatbot import ahandle_chat
+from llm import aclose_async_client
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Threads available to the mounted Flask routes
+WSGI_THREADS = 16
+
+
+def instrumented(route):
+    """Record the request metrics the Flask hooks record, for a native async endpoint."""
+    def decorator(endpoint):
+        @wraps(endpoint)
+        async def wrapper(request):
+            started = time.perf_counter()
+            status = 500
+            with metrics.http_in_flight.track(route=route):
+                try:
+                    response = await endpoint(request)
+                    status = response.status_code
+                    return response
+                finally:
+                    metrics.http_request_duration.observe(
+                        time.perf_counter() - started, route=route, method=request.method
+                    )
+                    metrics.http_requests.inc(route=route, method=request.method, status=status)
+        return wrapper
+    return decorator
+
+
+async def read_json(request):
+    try:
+        data = await request.json()
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+@instrumented("/chat")
+async def chat(request):
+    data = await read_json(request)
+    if data is None or not data.get("message"):
+        return JSONResponse({"error": "Message is required"}, status_code=400)
+    try:
+        response = await ahandle_chat(
+            data["message"],
+            career=data.get("career"),
+            gpa=data.get("gpa"),
+            subject_grades=data.get("subject_grades"),
+            session_id=data.get("session_id")
+        )
+        return JSONResponse({"response": response})
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+
+@instrumented("/career-details")
+async def career_details(request):
+    data = await read_json(request)
+    career = data.get("career") if data else None
+    if not career:
+        return JSONResponse({"error": "Career is required", "success": False}, status_code=400)
+    try:
+        return JSONResponse(await aget_career_details(career))
+    except Exception as e:
+        error_msg = f"Error getting career details: {str(e)}"
+        logger.exception("Error in career details endpoint")
+        return JSONResponse({"error": error_msg, "success": False}, status_code=400)
+
+
+@instrumented("/career-roadmap")
+async def career_roadmap(request):
+    data = await read_json(request)
+    career = data.get("career") if data else None
+    if not career:
+        return JSONResponse({"error": "Career is required", "success": False}, status_code=400)
+    try:
+        return JSONResponse(await agenerate_career_roadmap(career, data.get("subject_grades", {}), data.get("gpa")))
+    except Exception as e:
+        error_msg = f"Error generating career roadmap: {str(e)}"
+        logger.exception("Error in career roadmap endpoint")
+        return JSONResponse({"error": error_msg, "success": False}, status_code=400)
+
+
+@instrumented("/analyze-careers")
+async def analyze_careers(request):
+    data = await read_json(request) or {}
+    careers = data.get("careers", [])
+    academic_scores = data.get("academic_scores", {})
+    predicted_career = data.get("predicted_career")
+    mode = request.query_params.get("mode") or data.get("mode") or ANALYSIS_MODE
+
+    error = analysis_request_error(careers, academic_scores, predicted_career, mode)
+    if error:
+        return JSONResponse({"error": error}, status_code=400)
+    try:
+        analyzed_careers = await alternative_careers_analyzer.aanalyze_careers(
+            careers, academic_scores, predicted_career, mode=mode
+        )
+        return JSONResponse({"success": True, "analyzed_careers": analyzed_careers})
+    except Exception as e:
+        logger.exception("Error in analyze careers")
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Load models, datasets and tokenizers before serving, off the event loop, so the
+    # first requests do not stall every other one while a Lazy resource loads
+    await run_in_threadpool(warmup)
+    yield
+    await aclose_async_client()
+
+
+app = Starlette(
+    routes=[
+        Route("/chat", chat, methods=["POST"]),
+        Route("/career-details", career_details, methods=["POST"]),
+        Route("/career-roadmap", career_roadmap, methods=["POST"]),
+        Route("/analyze-careers", analyze_careers, methods=["POST"]),
+        Mount("/", app=WSGIMiddleware(flask_app, workers=WSGI_THREADS)),
+    ],
+    lifespan=lifespan
+)
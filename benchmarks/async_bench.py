@@ -0,0 +1,220 @@
+"""
+Throughput of the sync (gunicorn) and async (uvicorn asgi:app) serving modes
+under concurrent GPT-backed load.
+
+Starts benchmarks/mock_llm.py, starts the app in each mode pointed at it, then
+fires --requests POST /career-details calls with --concurrency in flight
+(each for a distinct career, so no cache can answer) and reports requests per
+second and latency percentiles of the successful requests.
+
+By default the app runs with unlimited LLM budgets and without single-flight
+coalescing, so every request reaches the mock upstream and the numbers measure
+serving and upstream latency rather than admission policies; --with-limits
+keeps the production budgets and coalescing. Either way, requests answered by
+a fallback and calls rejected by the budget or the circuit breaker are
+reported separately from successes.
+
+Usage:
+    python benchmarks/async_bench.py [--modes sync async] [--concurrency 200] [--requests 1000]
+                                     [--latency 1.0] [--workers 2] [--with-limits]
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MOCK_PORT = 8765
+APP_PORT = 8081
+
+# Budgets no benchmark can exhaust, and no coalescing of identical completions
+UNLIMITED_BUDGET = {"rpm": 10 ** 9, "tpm": 10 ** 12, "concurrency": None}
+BENCHMARK_ENV = {
+    "LLM_BUDGETS": json.dumps({
+        model: UNLIMITED_BUDGET for model in ("gpt-4o", "gpt-4-turbo-preview", "gpt-3.5-turbo")
+    }),
+    "LLM_SINGLE_FLIGHT": "0",
+}
+
+# Counters read from the app's /metrics: calls that never reached the upstream, or shared another call
+POLICY_COUNTERS = {
+    "budget_rejected": ("llm_budget_decisions_total", 'decision="rejected"'),
+    "breaker_rejected": ("circuit_breaker_rejections_total", ""),
+    "coalesced": ("single_flight_coalesced_total", ""),
+    "upstream_errors": ("llm_requests_total", 'outcome="error"'),
+}
+
+
+def server_command(mode, workers):
+    if mode == "sync":
+        return ["gunicorn", "-c", "gunicorn.conf.py", "app:app"]
+    return ["uvicorn", "asgi:app", "--host", "127.0.0.1", "--port", str(APP_PORT),
+            "--workers", str(workers), "--log-level", "warning"]
+
+
+def server_env(workers, with_limits=False, **extra):
+    env = dict(
+        os.environ,
+        OPENAI_API_KEY="mock",
+        OPENAI_BASE_URL=f"http://127.0.0.1:{MOCK_PORT}/v1",
+        PORT=str(APP_PORT),
+        WEB_CONCURRENCY=str(workers),
+        **extra
+    )
+    if not with_limits:
+        env.update(BENCHMARK_ENV)
+    return env
+
+
+def wait_until_up(url, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=60).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def outcome(response):
+    """ok, fallback (answered, but with success false) or error."""
+    if response.status_code != 200:
+        return "error"
+    try:
+        body = response.json()
+    except ValueError:
+        return "ok"
+    return "fallback" if isinstance(body, dict) and body.get("success") is False else "ok"
+
+
+def _policy_counts(text):
+    counts = dict.fromkeys(POLICY_COUNTERS, 0.0)
+    for line in text.splitlines():
+        if line.startswith("#") or not line.strip():
+            continue
+        series, _, value = line.rpartition(" ")
+        for key, (name, label) in POLICY_COUNTERS.items():
+            if (series == name or series.startswith(name + "{")) and label in series:
+                counts[key] += float(value)
+    return counts
+
+
+def scrape_policy_counters(base_url, workers, attempts_per_worker=10):
+    """
+    POLICY_COUNTERS of each worker, by pid
+
+    Every worker keeps its own metrics and a scrape reaches one of them, so
+    /metrics is fetched on fresh connections until each worker has answered.
+    """
+    per_pid = {}
+    for _ in range(workers * attempts_per_worker):
+        try:
+            text = httpx.get(base_url + "/metrics", timeout=30).text
+        except httpx.HTTPError:
+            continue
+        pid = re.search(r'process_info\{pid="(\d+)"\}', text)
+        if pid:
+            per_pid[pid.group(1)] = _policy_counts(text)
+        if len(per_pid) >= workers:
+            break
+    return per_pid
+
+
+def policy_delta(before, after):
+    """Counter increases between two scrapes, over the workers seen in both."""
+    totals = dict.fromkeys(POLICY_COUNTERS, 0)
+    for pid, counts in after.items():
+        if pid in before:
+            for key, value in counts.items():
+                totals[key] += int(value - before[pid][key])
+    return totals
+
+
+def latency_percentiles(latencies, outcomes, percentiles):
+    """Percentiles (ms) of the successful requests, or of all requests if none succeeded."""
+    ok = latencies[outcomes == "ok"]
+    return np.percentile(ok if ok.size else latencies, percentiles) * 1000
+
+
+async def drive(base_url, total, concurrency):
+    latencies, outcomes = [], []
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=300) as client:
+        async def one(i):
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await client.post("/career-details", json={"career": f"Benchmark Career {i}"})
+                    result = outcome(response)
+                except httpx.HTTPError:
+                    result = "error"
+                latencies.append(time.perf_counter() - started)
+                outcomes.append(result)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - started
+    return elapsed, np.asarray(latencies), np.asarray(outcomes)
+
+
+def run_mode(mode, args):
+    # Each run starts with empty caches
+    env = server_env(args.workers, args.with_limits, CAREER_DETAILS_CACHE_PATH="")
+    server = subprocess.Popen(server_command(mode, args.workers), cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        base_url = f"http://127.0.0.1:{APP_PORT}"
+        wait_until_up(base_url + "/warmup")
+        before = scrape_policy_counters(base_url, args.workers)
+        elapsed, latencies, outcomes = asyncio.run(drive(base_url, args.requests, args.concurrency))
+        policy = policy_delta(before, scrape_policy_counters(base_url, args.workers))
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    p50, p99 = latency_percentiles(latencies, outcomes, [50, 99]) / 1000
+    ok = int((outcomes == "ok").sum())
+    print(f"{mode:>5}: {ok / elapsed:8.1f} ok/s  p50 {p50:6.2f}s  p99 {p99:6.2f}s  "
+          f"ok {ok}  fallbacks {int((outcomes == 'fallback').sum())}  errors {int((outcomes == 'error').sum())}  "
+          f"budget rejected {policy['budget_rejected']}  breaker rejected {policy['breaker_rejected']}  "
+          f"coalesced {policy['coalesced']}  "
+          f"({args.requests} requests, {args.concurrency} in flight, {elapsed:.1f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", choices=["sync", "async"], default=["sync", "async"])
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=1.0, help="Mock completion latency in seconds")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--with-limits", action="store_true",
+                        help="Keep the production LLM budgets and single-flight coalescing")
+    args = parser.parse_args()
+
+    mock = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "benchmarks", "mock_llm.py"),
+         "--port", str(MOCK_PORT), "--latency", str(args.latency)],
+        stdout=subprocess.DEVNULL
+    )
+    try:
+        time.sleep(1)
+        for mode in args.modes:
+            run_mode(mode, args)
+    finally:
+        mock.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+End-to-end load test of every endpoint against the local mock LLM.
+
+Starts benchmarks/mock_llm.py and the app (sync gunicorn or async uvicorn)
+pointed at it, then drives each endpoint at each concurrency level and reports
+throughput, p50/p95/p99 latency of the successful requests, the peak RSS of
+the server's process tree, and separately the requests that failed or were
+answered by a fallback and the LLM calls rejected by the budget or the circuit
+breaker. As in async_bench.py, LLM budgets and single-flight coalescing are
+off unless --with-limits is given, so latency reflects the mock upstream. Results can be saved as a named baseline under
+benchmarks/baselines/ and later runs compared against it, so performance
+regressions are caught offline.
+
+Usage:
+    python benchmarks/load_test.py [--server sync|async] [--endpoints predict chat ...]
+                                   [--concurrency 1 8 32] [--requests 200]
+                                   [--latency 0.5] [--tokens-per-second 0] [--error-rate 0]
+                                   [--with-limits]
+                                   [--save-baseline NAME] [--compare NAME] [--tolerance 0.2]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+
+import httpx
+import numpy as np
+
+from async_bench import (
+    APP_PORT, MOCK_PORT, ROOT, latency_percentiles, outcome, policy_delta, scrape_policy_counters,
+    server_command, server_env, wait_until_up
+)
+
+BASELINE_DIR = os.path.join(ROOT, "benchmarks", "baselines")
+
+CAREERS = [
+    "Accountant", "Artist", "Banker", "Construction Engineer", "Designer", "Doctor", "Game Developer",
+    "Government Officer", "Lawyer", "Real Estate Developer", "Scientist", "Software Engineer",
+    "Stock Investor", "Teacher", "Writer"
+]
+SCORE_FIELDS = [
+    "math_score", "history_score", "physics_score", "chemistry_score",
+    "biology_score", "english_score", "geography_score"
+]
+
+
+def random_scores(rng):
+    return {field: rng.randint(40, 100) for field in SCORE_FIELDS}
+
+
+def academic_scores(rng):
+    return {f"subject_{s}": rng.randint(40, 100)
+            for s in ("mathematics", "physics", "chemistry", "biology", "english", "geography", "history")}
+
+
+# endpoint name -> (path, payload factory taking (request index, rng))
+ENDPOINTS = {
+    "predict": ("/predict", lambda i, rng: random_scores(rng)),
+    "chatbot-recommend": ("/chatbot-recommend", lambda i, rng: {"career": rng.choice(CAREERS)}),
+    "analyze-careers": ("/analyze-careers", lambda i, rng: {
+        "careers": rng.sample(CAREERS, 3),
+        "academic_scores": academic_scores(rng),
+        "predicted_career": rng.choice(CAREERS)
+    }),
+    "chat": ("/chat", lambda i, rng: {
+        "message": "What should I study to get there?",
+        "career": rng.choice(CAREERS),
+        "gpa": rng.randint(60, 100),
+        "session_id": f"load-test-{i % 50}"
+    }),
+    "career-details": ("/career-details", lambda i, rng: {"career": rng.choice(CAREERS)}),
+    "career-roadmap": ("/career-roadmap", lambda i, rng: {
+        "career": rng.choice(CAREERS),
+        "subject_grades": {"math_score": rng.randint(40, 100), "english_score": rng.randint(40, 100)},
+        "gpa": rng.randint(60, 100)
+    }),
+}
+
+
+def tree_rss_kb(pid):
+    """Resident memory of a process and all its descendants, in kB."""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+                children.setdefault(ppid, []).append(int(entry))
+            except (OSError, IndexError, ValueError):
+                continue
+    total = 0
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        try:
+            with open(f"/proc/{current}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1])
+        except OSError:
+            pass
+        stack.extend(children.get(current, []))
+    return total
+
+
+class PeakRSS:
+    """Samples the RSS of a process tree in the background and keeps the peak."""
+
+    def __init__(self, pid, interval=0.2):
+        self.pid = pid
+        self.interval = interval
+        self.peak_kb = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak_kb = max(self.peak_kb, tree_rss_kb(self.pid))
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+async def drive(base_url, path, payload, total, concurrency, seed):
+    rng = random.Random(seed)
+    payloads = [payload(i, rng) for i in range(total)]
+    latencies, outcomes = [], []
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=300) as client:
+        async def one(body):
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    result = outcome(await client.post(path, json=body))
+                except httpx.HTTPError:
+                    result = "error"
+                latencies.append(time.perf_counter() - started)
+                outcomes.append(result)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(body) for body in payloads))
+        elapsed = time.perf_counter() - started
+    return elapsed, np.asarray(latencies), np.asarray(outcomes)
+
+
+def run(args):
+    results = []
+    env = server_env(args.workers, args.with_limits)
+    mock = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "benchmarks", "mock_llm.py"), "--port", str(MOCK_PORT),
+         "--latency", str(args.latency), "--tokens-per-second", str(args.tokens_per_second),
+         "--error-rate", str(args.error_rate)],
+        stdout=subprocess.DEVNULL
+    )
+    server = subprocess.Popen(server_command(args.server, args.workers), cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        base_url = f"http://127.0.0.1:{APP_PORT}"
+        wait_until_up(base_url + "/warmup")
+        print(f"{'endpoint':<18} {'conc':>5} {'ok/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+              f"{'errors':>7} {'fallback':>9} {'rejected':>9} {'coalesced':>10} {'peak RSS MB':>12}")
+        for name in args.endpoints:
+            path, payload = ENDPOINTS[name]
+            for concurrency in args.concurrency:
+                before = scrape_policy_counters(base_url, args.workers)
+                with PeakRSS(server.pid) as rss:
+                    elapsed, latencies, outcomes = asyncio.run(
+                        drive(base_url, path, payload, args.requests, concurrency, args.seed)
+                    )
+                policy = policy_delta(before, scrape_policy_counters(base_url, args.workers))
+                p50, p95, p99 = latency_percentiles(latencies, outcomes, [50, 95, 99])
+                ok = int((outcomes == "ok").sum())
+                result = {
+                    "endpoint": name, "concurrency": concurrency, "requests": args.requests,
+                    "throughput": round(ok / elapsed, 2),
+                    "p50_ms": round(p50, 2), "p95_ms": round(p95, 2), "p99_ms": round(p99, 2),
+                    "ok": ok, "errors": int((outcomes == "error").sum()),
+                    "fallbacks": int((outcomes == "fallback").sum()),
+                    **policy,
+                    "peak_rss_mb": round(rss.peak_kb / 1024, 1)
+                }
+                results.append(result)
+                rejected = policy["budget_rejected"] + policy["breaker_rejected"]
+                print(f"{name:<18} {concurrency:>5} {result['throughput']:>9.1f} {p50:>9.1f} {p95:>9.1f} "
+                      f"{p99:>9.1f} {result['errors']:>7} {result['fallbacks']:>9} {rejected:>9} "
+                      f"{policy['coalesced']:>10} {result['peak_rss_mb']:>12.1f}")
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+        mock.terminate()
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Print regressions against a baseline; returns how many were found."""
+    previous = {(r["endpoint"], r["concurrency"]): r for r in baseline["results"]}
+    regressions = 0
+    for result in results:
+        before = previous.get((result["endpoint"], result["concurrency"]))
+        if before is None:
+            continue
+        checks = [
+            ("throughput", result["throughput"] < before["throughput"] * (1 - tolerance)),
+            ("p95_ms", result["p95_ms"] > before["p95_ms"] * (1 + tolerance)),
+            ("peak_rss_mb", result["peak_rss_mb"] > before["peak_rss_mb"] * (1 + tolerance)),
+        ]
+        for metric, regressed in checks:
+            if regressed:
+                regressions += 1
+                print(f"REGRESSION {result['endpoint']} @ {result['concurrency']}: "
+                      f"{metric} {before[metric]} -> {result[metric]}")
+    print(f"{regressions} regression(s) beyond {tolerance:.0%} against baseline {baseline['name']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--server", choices=["sync", "async"], default="sync")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--endpoints", nargs="+", choices=list(ENDPOINTS), default=list(ENDPOINTS))
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint and concurrency level")
+    parser.add_argument("--latency", type=float, default=0.5, help="Mock completion latency in seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--with-limits", action="store_true",
+                        help="Keep the production LLM budgets and single-flight coalescing")
+    parser.add_argument("--save-baseline", metavar="NAME")
+    parser.add_argument("--compare", metavar="NAME", help="Fail if results regress against this baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    results = run(args)
+
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        path = os.path.join(BASELINE_DIR, f"{args.save_baseline}.json")
+        with open(path, "w") as f:
+            json.dump({
+                "name": args.save_baseline, "created_at": time.time(),
+                "config": {k: v for k, v in vars(args).items() if k not in ("save_baseline", "compare")},
+                "results": results
+            }, f, indent=2)
+        print(f"Saved baseline to {path}")
+
+    if args.compare:
+        with open(os.path.join(BASELINE_DIR, f"{args.compare}.json")) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
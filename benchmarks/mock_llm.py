@@ -0,0 +1,204 @@
+"""
+Local OpenAI-compatible mock server for benchmarks.
+
+Answers POST /v1/chat/completions with a canned answer shaped like the one
+the calling prompt asks for (career details, roadmap, career analysis, ...),
+so the app runs end to end without network access. Point the app at it with
+OPENAI_BASE_URL=http://127.0.0.1:<port>/v1.
+
+Each completion waits --latency seconds (plus up to --jitter) before the first
+token and then produces --tokens-per-second tokens (words); stream=True
+requests get the tokens as SSE chunks as they are produced. --error-rate of
+the requests fail with --error-status instead.
+
+Built on asyncio streams only, so thousands of concurrent slow requests cost
+nothing but sockets.
+
+Usage:
+    python benchmarks/mock_llm.py [--port 8765] [--latency 2.0] [--jitter 0]
+                                  [--tokens-per-second 0] [--error-rate 0] [--error-status 500]
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+
+
+def _career_in(text, pattern):
+    match = re.search(pattern, text)
+    return match.group(1).strip() if match else "this career"
+
+
+def mock_content(body):
+    """Canned completion text matching what the request's prompt asks for."""
+    text = "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+
+    if '"careers": [' in text:
+        careers = re.findall(r"^\s*- (.+?): required subjects", text, flags=re.MULTILINE)
+        return json.dumps({"careers": [
+            {"career": career, "matching_score": 75, "explanation": f"{career} fits this profile.",
+             "key_skills": ["Analysis", "Communication", "Planning"]}
+            for career in careers
+        ]})
+    if '"matching_score"' in text:
+        return json.dumps({"matching_score": 75, "explanation": "A good fit for this profile.",
+                           "key_skills": ["Analysis", "Communication", "Planning"]})
+    if "career roadmap" in text:
+        sections = [
+            "short-term goals", "mid-term goals", "long-term goals", "education requirements",
+            "skills to develop", "experience needed", "industry certifications",
+            "personal development recommendations", "networking suggestions"
+        ]
+        roadmap = {section: [f"Mock {section} step 1", f"Mock {section} step 2"] for section in sections}
+        roadmap["timeline_milestones"] = [f"Year {year}: Mock milestone" for year in range(1, 6)]
+        return json.dumps(roadmap)
+    if "career information specialist" in text:
+        career = _career_in(text, r"career as an? (.+?)\.")
+        return json.dumps({
+            "description": f"{career} is a mock career description.",
+            "salary_range": "$50,000-$90,000 per year", "difficulty": 6,
+            "education": "Bachelor's degree", "skills": ["Skill A", "Skill B", "Skill C", "Skill D", "Skill E"],
+            "job_outlook": "Stable", "day_to_day": "Mock daily work", "advancement": "Senior roles",
+            "work_life_balance": {"rating": 7, "explanation": "Mostly regular hours"},
+            "pros": ["Pro 1", "Pro 2", "Pro 3"], "cons": ["Con 1", "Con 2", "Con 3"]
+        })
+    if '"subjects"' in text:
+        return json.dumps({"subjects": ["Mathematics", "English", "Physics"]})
+    return "This is a mock career advice answer with enough words to look like a real reply."
+
+
+def completion_response(body, content):
+    return {
+        "id": f"chatcmpl-mock-{time.monotonic_ns()}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "mock"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": len(content) // 4, "total_tokens": len(content) // 4}
+    }
+
+
+def chunk_response(body, delta, finish_reason=None):
+    return {
+        "id": "chatcmpl-mock",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": body.get("model", "mock"),
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+    }
+
+
+def tokens(content):
+    """Split content into word-sized tokens that join back to the original text."""
+    return re.findall(r"\S+\s*|\s+", content)
+
+
+STATUS_TEXT = {200: "OK", 404: "Not Found", 429: "Too Many Requests", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class MockLLMServer:
+    def __init__(self, latency: float = 2.0, jitter: float = 0.0, tokens_per_second: float = 0.0,
+                 error_rate: float = 0.0, error_status: int = 500):
+        self.latency = latency
+        self.jitter = jitter
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.requests = 0
+        self.errors = 0
+
+    async def send_json(self, writer, status, payload):
+        data = json.dumps(payload).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, 'Error')}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+            f"Connection: keep-alive\r\n\r\n".encode() + data
+        )
+        await writer.drain()
+
+    async def send_stream(self, writer, body, content):
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+            b"Transfer-Encoding: chunked\r\nConnection: keep-alive\r\n\r\n"
+        )
+
+        def chunk(payload):
+            data = f"data: {payload}\n\n".encode()
+            writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+        chunk(json.dumps(chunk_response(body, {"role": "assistant", "content": ""})))
+        for token in tokens(content):
+            if self.tokens_per_second:
+                await asyncio.sleep(1 / self.tokens_per_second)
+            chunk(json.dumps(chunk_response(body, {"content": token})))
+            await writer.drain()
+        chunk(json.dumps(chunk_response(body, {}, "stop")))
+        chunk("[DONE]")
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def complete(self, writer, request):
+        self.requests += 1
+        await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+        if random.random() < self.error_rate:
+            self.errors += 1
+            await self.send_json(writer, self.error_status, {
+                "error": {"message": "Injected mock failure", "type": "server_error", "code": None}
+            })
+            return
+
+        content = mock_content(request)
+        if request.get("stream"):
+            await self.send_stream(writer, request, content)
+            return
+        if self.tokens_per_second:
+            await asyncio.sleep(len(tokens(content)) / self.tokens_per_second)
+        await self.send_json(writer, 200, completion_response(request, content))
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", "0")))
+
+                if method == "POST" and path.rstrip("/").endswith("/chat/completions"):
+                    await self.complete(writer, json.loads(body or b"{}"))
+                else:
+                    await self.send_json(writer, 404, {"error": {"message": f"No mock for {method} {path}"}})
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str, port: int):
+        server = await asyncio.start_server(self.handle, host, port, backlog=4096)
+        async with server:
+            await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=2.0, help="Seconds before the first token")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency, up to this many seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Generation speed (0 = instant)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of completions that fail")
+    parser.add_argument("--error-status", type=int, default=500, help="HTTP status of injected failures")
+    args = parser.parse_args()
+    print(f"Mock LLM listening on http://{args.host}:{args.port}/v1 (latency {args.latency:g}s, "
+          f"{args.tokens_per_second:g} tokens/s, error rate {args.error_rate:g})", flush=True)
+    server = MockLLMServer(args.latency, args.jitter, args.tokens_per_second, args.error_rate, args.error_status)
+    asyncio.run(server.serve(args.host, args.port))
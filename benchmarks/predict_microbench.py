@@ -0,0 +1,125 @@
+"""
+Microbenchmark for the career prediction paths /predict and /predict/batch serve.
+
+Compares the original pandas-based path (DataFrame -> scaler.transform ->
+model.predict_proba -> top-k) with CareerPredictor.predict_one_top_k for
+single rows and with CareerPredictor.predict_batch_top_k for a batch, checks
+that every path returns the same careers in the same order with the same
+probabilities, and reports p50/p99 latency for each.
+
+Usage:
+    python benchmarks/predict_microbench.py [--iterations 5000] [--batch-size 1000] [--top-k 3]
+                                            [--model-dir ../recommender-models]
+"""
+import argparse
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from predictor import CareerPredictor  # noqa: E402
+
+FEATURES = [
+    "math_score", "history_score", "physics_score",
+    "chemistry_score", "biology_score", "english_score", "geography_score"
+]
+
+# Largest probability difference accepted between the paths
+PROBABILITY_TOLERANCE = 1e-6
+
+
+def legacy_top_k(model, scaler, label_encoder, records, k):
+    features_df = pd.DataFrame(records)
+    features_df = features_df[FEATURES]
+    features_scaled = scaler.transform(features_df)
+    proba = model.predict_proba(features_scaled)
+    return [
+        [(str(label_encoder.classes_[i]), float(row[i])) for i in np.argsort(-row, kind="stable")[:k]]
+        for row in proba
+    ]
+
+
+def same_top_k(expected, actual):
+    """Same careers in the same order, with probabilities within PROBABILITY_TOLERANCE."""
+    return len(expected) == len(actual) and all(
+        career == other and abs(probability - other_probability) <= PROBABILITY_TOLERANCE
+        for (career, probability), (other, other_probability) in zip(expected, actual)
+    )
+
+
+def percentiles(samples):
+    samples = np.asarray(samples) * 1e6
+    return np.percentile(samples, 50), np.percentile(samples, 99)
+
+
+def timed(fn, inputs):
+    times = []
+    for value in inputs:
+        start = time.perf_counter()
+        fn(value)
+        times.append(time.perf_counter() - start)
+    return percentiles(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--batches", type=int, default=50, help="Batches timed for each batch path")
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument(
+        "--model-dir",
+        default=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "../recommender-models")
+    )
+    args = parser.parse_args()
+    k = args.top_k
+
+    model = joblib.load(os.path.join(args.model_dir, "career_xgb.pkl"))
+    scaler = joblib.load(os.path.join(args.model_dir, "scaler.pkl"))
+    label_encoder = joblib.load(os.path.join(args.model_dir, "label_encoder.pkl"))
+    predictor = CareerPredictor(model, scaler, label_encoder, FEATURES)
+
+    rng = np.random.default_rng(0)
+    rows = rng.uniform(30, 100, size=(args.iterations, len(FEATURES))).round(1)
+    records = [dict(zip(FEATURES, row)) for row in rows.tolist()]
+    batch = rows[:args.batch_size]
+    batch_records = records[:args.batch_size]
+
+    # Correctness: the served paths must agree with the legacy path on every row
+    legacy = legacy_top_k(model, scaler, label_encoder, records, k)
+    single_mismatches = sum(
+        not same_top_k(expected, predictor.predict_one_top_k(row, k))
+        for expected, row in zip(legacy, rows.tolist())
+    )
+    batch_mismatches = sum(
+        not same_top_k(expected, actual)
+        for expected, actual in zip(legacy, predictor.predict_batch_top_k(batch.copy(), k))
+    )
+
+    results = [
+        ("legacy", "single", timed(lambda record: legacy_top_k(model, scaler, label_encoder, [record], k), records)),
+        ("fast", "single", timed(lambda row: predictor.predict_one_top_k(row, k), rows.tolist())),
+        ("legacy", "batch", timed(lambda _: legacy_top_k(model, scaler, label_encoder, batch_records, k),
+                                  range(args.batches))),
+        ("fast", "batch", timed(lambda _: predictor.predict_batch_top_k(batch.copy(), k), range(args.batches))),
+    ]
+
+    print(f"Rows: {args.iterations}  top-k: {k}  "
+          f"Mismatches: single {single_mismatches}, batch {batch_mismatches} (of {len(batch)})")
+    print(f"{'path':<10}{'mode':<8}{'p50 (us)':>12}{'p99 (us)':>12}")
+    for path, mode, (p50, p99) in results:
+        print(f"{path:<10}{mode:<8}{p50:>12.1f}{p99:>12.1f}")
+    for mode in ("single", "batch"):
+        (legacy_p50, legacy_p99), (fast_p50, fast_p99) = [times for _, m, times in results if m == mode]
+        print(f"Speedup ({mode}): p50 {legacy_p50 / fast_p50:.1f}x, p99 {legacy_p99 / fast_p99:.1f}x")
+
+    return 1 if single_mismatches or batch_mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+"""
+Per-process OpenAI rate and spend budgets with adaptive degradation.
+
+Every completion reserves from its model's budget before it is sent: one
+request from the requests/min bucket, the estimated prompt plus max_tokens
+from the tokens/min bucket and, for capped models, one concurrency slot. The
+reservation is settled against response.usage when the call returns.
+
+When a model's budget is nearly spent (less than 1 - LLM_BUDGET_DEGRADE_AT of
+a bucket left, or all of its optional concurrency slots taken) the call is moved to the next
+cheaper model in DOWNGRADES, unless the caller passed allow_downgrade=False
+because it caches results under the model it asked for. When no model can take it, BudgetExceeded is
+raised straight away, so callers answer from their local fallbacks instead of
+queueing behind provider 429s.
+
+Budgets are per worker process; divide the organisation's limits by the
+number of workers when overriding them.
+"""
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+from context_builder import count_message_tokens
+from metrics import counter
+from rate_limit import RateLimiter
+
+# Per-model limits for this process; override with LLM_BUDGETS as JSON, e.g.
+# {"gpt-4o": {"rpm": 100, "tpm": 20000, "concurrency": 4}}
+# concurrency caps calls in flight to a model (None: no cap). A capped model
+# hands extra calls to its downgrade, or rejects them if it has none, so leave
+# the last model of a chain uncapped: its in-flight calls are then bounded by
+# the client's connection pool (LLM_MAX_CONNECTIONS in the async serving mode)
+# and by the rpm/tpm buckets.
+DEFAULT_BUDGETS = {
+    "gpt-4o": {"rpm": 250, "tpm": 15000, "concurrency": 8},
+    "gpt-4-turbo-preview": {"rpm": 250, "tpm": 15000, "concurrency": 8},
+    "gpt-3.5-turbo": {"rpm": 1750, "tpm": 100000, "concurrency": None},
+}
+
+# Where traffic goes when a model's budget runs low; models not listed fall back locally
+DOWNGRADES = {
+    "gpt-4o": "gpt-3.5-turbo",
+    "gpt-4-turbo-preview": "gpt-3.5-turbo",
+}
+
+# Share of a bucket a model may use while a cheaper model is available
+LLM_BUDGET_DEGRADE_AT = float(os.getenv("LLM_BUDGET_DEGRADE_AT", "0.9"))
+
+# Completion tokens reserved when a call sets no max_tokens
+DEFAULT_COMPLETION_TOKENS = 500
+
+# USD per 1K (prompt, completion) tokens, for the spend counter
+MODEL_PRICES = {
+    "gpt-4o": (0.005, 0.015),
+    "gpt-4-turbo-preview": (0.01, 0.03),
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+}
+
+budget_decisions = counter(
+    "llm_budget_decisions_total", "Budget admissions, by requested model and decision", ("model", "decision")
+)
+llm_spend = counter("llm_spend_dollars_total", "Estimated spend from response.usage, by model", ("model",))
+
+
+class BudgetExceeded(Exception):
+    """No model in the downgrade chain has budget left for the call."""
+
+
+class ModelBudget:
+    def __init__(self, model: str, rpm: float, tpm: float, concurrency: Optional[int] = None):
+        self.model = model
+        self.requests = RateLimiter(rpm, per=60)
+        self.tokens = RateLimiter(tpm, per=60)
+        self.concurrency = concurrency
+        self.slots = threading.BoundedSemaphore(concurrency) if concurrency else None
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def try_reserve(self, tokens: float, headroom: float) -> bool:
+        """Take a slot, a request and tokens, keeping headroom (a share of each bucket) untouched."""
+        if self.slots is not None and not self.slots.acquire(blocking=False):
+            return False
+        if not self.requests.try_acquire(1, keep=self.requests.capacity * headroom):
+            self._release_slot()
+            return False
+        if not self.tokens.try_acquire(tokens, keep=self.tokens.capacity * headroom):
+            self.requests.consume(-1)
+            self._release_slot()
+            return False
+        with self._lock:
+            self.in_flight += 1
+        return True
+
+    def _release_slot(self):
+        if self.slots is not None:
+            self.slots.release()
+
+    def release(self, reserved_tokens: float, used_tokens: Optional[float]):
+        with self._lock:
+            self.in_flight -= 1
+        self._release_slot()
+        if used_tokens is not None:
+            self.tokens.consume(used_tokens - reserved_tokens)
+
+    def stats(self) -> Dict:
+        return {
+            "requests_available": round(self.requests.available(), 1),
+            "requests_per_minute": self.requests.capacity,
+            "tokens_available": round(self.tokens.available(), 1),
+            "tokens_per_minute": self.tokens.capacity,
+            "in_flight": self.in_flight,
+            "concurrency": self.concurrency,
+        }
+
+
+class Reservation:
+    """Budget held by one call; kwargs carry the model the call must be sent to."""
+
+    def __init__(self, budget: Optional[ModelBudget], model: str, tokens: float):
+        self.budget = budget
+        self.model = model
+        self.tokens = tokens
+
+
+class BudgetManager:
+    def __init__(self, budgets: Dict[str, Dict], downgrades: Dict[str, str] = DOWNGRADES,
+                 degrade_at: float = LLM_BUDGET_DEGRADE_AT):
+        self.budgets = {model: ModelBudget(model, **limits) for model, limits in budgets.items()}
+        self.downgrades = downgrades
+        self.headroom = max(0.0, 1.0 - degrade_at)
+
+    def chain(self, model: str) -> List[str]:
+        """The model followed by its cheaper replacements, in order."""
+        models = [model]
+        while models[-1] in self.downgrades and self.downgrades[models[-1]] not in models:
+            models.append(self.downgrades[models[-1]])
+        return models
+
+    def reserve(self, kwargs: Dict, allow_downgrade: bool = True) -> Reservation:
+        """
+        Reserve budget for a completion, switching kwargs["model"] to a cheaper
+        model if the requested one is running low
+
+        Args:
+            allow_downgrade: False for callers that store results under the
+                requested model (e.g. long-lived caches keyed on it); they get
+                the requested model or BudgetExceeded
+
+        Raises:
+            BudgetExceeded: when every model in the chain is out of budget
+        """
+        requested = kwargs.get("model", "")
+        if requested not in self.budgets:
+            return Reservation(None, requested, 0)
+
+        tokens = count_message_tokens(kwargs.get("messages", []), requested) + \
+            (kwargs.get("max_tokens") or DEFAULT_COMPLETION_TOKENS)
+        chain = self.chain(requested) if allow_downgrade else [requested]
+        for i, model in enumerate(chain):
+            budget = self.budgets.get(model)
+            if budget is None:
+                continue
+            # The last model in the chain may use its whole budget; the others leave headroom
+            headroom = self.headroom if i < len(chain) - 1 else 0.0
+            # A call larger than the usable bucket is admitted once the bucket is that full
+            amount = min(tokens, budget.tokens.capacity * (1 - headroom))
+            if budget.try_reserve(amount, headroom):
+                budget_decisions.inc(model=requested, decision="admitted" if i == 0 else "downgraded")
+                kwargs["model"] = model
+                return Reservation(budget, model, amount)
+
+        budget_decisions.inc(model=requested, decision="rejected")
+        raise BudgetExceeded(f"No LLM budget left for {requested}")
+
+    def release(self, reservation: Reservation, usage=None):
+        """Free the concurrency slot and settle the token reservation against response.usage."""
+        if reservation.budget is None:
+            return
+        used = None
+        if usage is not None:
+            prompt = getattr(usage, "prompt_tokens", 0) or 0
+            completion = getattr(usage, "completion_tokens", 0) or 0
+            used = prompt + completion
+            prices = MODEL_PRICES.get(reservation.model)
+            if prices:
+                llm_spend.inc((prompt * prices[0] + completion * prices[1]) / 1000, model=reservation.model)
+        reservation.budget.release(reservation.tokens, used)
+
+    def cancel(self, reservation: Reservation):
+        """The call was never sent (e.g. the circuit is open): return its request, tokens and slot."""
+        if reservation.budget is None:
+            return
+        reservation.budget.release(reservation.tokens, 0)
+        reservation.budget.requests.consume(-1)
+
+    def throttled(self, reservation: Reservation):
+        """The provider answered 429: treat the model's request budget as spent until it refills."""
+        if reservation.budget is not None:
+            requests = reservation.budget.requests
+            requests.consume(requests.available())
+
+    def stats(self) -> Dict:
+        return {model: budget.stats() for model, budget in self.budgets.items()}
+
+
+def load_budgets() -> Dict[str, Dict]:
+    budgets = {model: dict(limits) for model, limits in DEFAULT_BUDGETS.items()}
+    for model, limits in json.loads(os.getenv("LLM_BUDGETS", "{}")).items():
+        budgets.setdefault(model, {"rpm": 1000, "tpm": 100000, "concurrency": None}).update(limits)
+    return budgets
+
+
+# One budget manager shared by every LLM call in the process
+budget_manager = BudgetManager(load_budgets())
+
+
+def budget_collector(manager: BudgetManager = budget_manager):
+    """Collector exposing the remaining budget per model as llm_budget_* gauges."""
+    def collect():
+        for model, values in manager.stats().items():
+            labels = {"model": model}
+            yield "llm_budget_requests_available", "gauge", "Requests left in the per-minute bucket", \
+                labels, values["requests_available"]
+            yield "llm_budget_tokens_available", "gauge", "Tokens left in the per-minute bucket", \
+                labels, values["tokens_available"]
+            yield "llm_budget_in_flight", "gauge", "Completions in flight against the budget", \
+                labels, values["in_flight"]
+    return collect
@@ -0,0 +1,181 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+_MISSING = object()
+
+logger = logging.getLogger(__name__)
+
+
+def collapse_whitespace(value: str) -> str:
+    """Collapse runs of whitespace to one space and strip the ends; case is kept."""
+    return " ".join(str(value).split())
+
+
+def normalize_text(value: str) -> str:
+    """Normalize free text (career names, university names) for use in cache keys."""
+    return collapse_whitespace(value).casefold()
+
+
+def make_key(*parts: Any) -> str:
+    """Build a content-addressed cache key from JSON-serializable parts."""
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TTLCache:
+    """
+    Thread-safe in-process LRU cache with per-entry TTL and an optional SQLite backing store.
+
+    The SQLite file lets entries survive process restarts and be shared by several
+    gunicorn workers on the same machine; it is created on first use. Values must
+    be JSON-serializable.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: Optional[float] = None, path: Optional[str] = None, name: str = "cache"):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = path
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+        # The SQLite file is created on first use, not when the cache is defined at import time
+        self._store_ready = False
+        self._store_lock = threading.Lock()
+
+    def _ensure_store(self):
+        with self._store_lock:
+            if self._store_ready:
+                return
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5)
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                with conn:
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS entries ("
+                        "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, expires_at REAL, "
+                        "PRIMARY KEY (namespace, key))"
+                    )
+            finally:
+                conn.close()
+            self._store_ready = True
+
+    def _execute(self, sql: str, params: tuple = ()):
+        self._ensure_store()
+        # A short-lived connection per operation keeps this safe across threads and forks
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            with conn:
+                return conn.execute(sql, params).fetchone()
+        finally:
+            conn.close()
+
+    def _expires_at(self, ttl: Optional[float]) -> Optional[float]:
+        ttl = self.ttl if ttl is None else ttl
+        return time.time() + ttl if ttl else None
+
+    def _store_memory(self, key: str, value: Any, expires_at: Optional[float]):
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _read_disk(self, key: str):
+        try:
+            row = self._execute(
+                "SELECT value, expires_at FROM entries WHERE namespace = ? AND key = ?",
+                (self.name, key)
+            )
+        except (sqlite3.Error, OSError) as e:
+            logger.warning("Cache read error in %s: %s", self.name, e)
+            return _MISSING, None
+        if row is None:
+            return _MISSING, None
+        value, expires_at = row
+        if expires_at is not None and expires_at <= time.time():
+            return _MISSING, None
+        return json.loads(value), expires_at
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the cached value for key, or default if it is missing or expired."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+        if self.path:
+            value, expires_at = self._read_disk(key)
+            if value is not _MISSING:
+                with self._lock:
+                    self._store_memory(key, value, expires_at)
+                    self.hits += 1
+                    self.disk_hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return default
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Store value under key. ttl (seconds) overrides the cache default for this entry."""
+        expires_at = self._expires_at(ttl)
+        with self._lock:
+            self._store_memory(key, value, expires_at)
+
+        if self.path:
+            try:
+                self._execute(
+                    "INSERT OR REPLACE INTO entries (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                    (self.name, key, json.dumps(value), expires_at)
+                )
+            except (sqlite3.Error, OSError) as e:
+                logger.warning("Cache write error in %s: %s", self.name, e)
+
+    def delete(self, key: str):
+        """Remove key from memory and from the backing store."""
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.path:
+            self._execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (self.name, key))
+
+    def clear(self):
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.disk_hits = self.evictions = 0
+        if self.path:
+            self._execute("DELETE FROM entries WHERE namespace = ?", (self.name,))
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "persistent": bool(self.path)
+            }
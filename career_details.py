@@ -1,105 +1,261 @@
+import asyncio
 import os
-from openai import OpenAI
+import logging
 from dotenv import load_dotenv
 import json
+from cache import TTLCache, make_key, normalize_text
+from streaming import stream_completion_text
+from llm import chat_completion, achat_completion, stream_chat_completion
+from knowledge_base import get_knowledge_base
+from metrics import track_phase
+from prompts import PromptTemplate
+from structured_output import (
+    JSON_MODE, acomplete, complete, is_list, is_number, is_text, missing_sections, parse_json_object
+)
 
+logger = logging.getLogger(__name__)
 
-# Load environment variables and API key
+
+# Load environment variables
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-def get_career_details(career_name):
+# Answers are cached under this model, so their completions never downgrade to a cheaper one
+CAREER_DETAILS_MODEL = "gpt-3.5-turbo"
+
+# Bump whenever the prompt below changes so stale cached answers are not served
+CAREER_DETAILS_PROMPT_VERSION = "2"
+
+# Cached details are reused for a week; unparseable answers only for an hour
+CAREER_DETAILS_TTL = float(os.getenv("CAREER_DETAILS_CACHE_TTL", str(7 * 24 * 3600)))
+CAREER_DETAILS_UNPARSED_TTL = 3600
+
+# Set CAREER_DETAILS_CACHE_PATH to a SQLite file to keep entries across restarts and workers
+career_details_cache = TTLCache(
+    maxsize=int(os.getenv("CAREER_DETAILS_CACHE_SIZE", "512")),
+    ttl=CAREER_DETAILS_TTL,
+    path=os.getenv("CAREER_DETAILS_CACHE_PATH") or None,
+    name="career_details"
+)
+
+# Sections every generated answer must contain; missing ones are requested again on their own
+CAREER_DETAILS_SCHEMA = {
+    "description": is_text,
+    "salary_range": is_text,
+    "difficulty": lambda value: is_number(value) or is_text(value),
+    "education": is_text,
+    "skills": is_list,
+    "job_outlook": is_text,
+    "day_to_day": is_text,
+    "advancement": is_text,
+    # A bare rating is turned into an object by normalize_career_details
+    "work_life_balance": lambda value: isinstance(value, dict) or is_number(value) or is_text(value),
+    "pros": is_list,
+    "cons": is_list,
+}
+
+def career_details_cache_key(career_name):
+    """Cache key for a career: normalized name plus prompt version and model."""
+    return make_key(normalize_text(career_name), CAREER_DETAILS_PROMPT_VERSION, CAREER_DETAILS_MODEL)
+
+# The field list is the static prefix; only the career name changes between calls
+CAREER_DETAILS_PROMPT = PromptTemplate(
+    "career_details",
+    instructions="""
+    You are a career information specialist that provides accurate, concise details about careers in JSON format.
+    Return the response in JSON format with the following fields:
+    - description: A 2-3 sentence overview of the career
+    - salary_range: The typical salary range for this career (e.g. $X-$Y per year)
+    - difficulty: Rating from 1-10 how challenging this career is to pursue
+    - education: Required educational background
+    - skills: List of 5 key skills needed
+    - job_outlook: Future prospects for this career field
+    - day_to_day: Brief description of typical day-to-day activities
+    - advancement: Career advancement opportunities
+    - work_life_balance: An object with 'rating' (number 1-10) and 'explanation' (brief text explanation)
+    - pros: List of 3 advantages of this career
+    - cons: List of 3 challenges or disadvantages
+    Ensure the work_life_balance field is structured as an object with 'rating' and 'explanation' properties.
+    """,
+    suffix="Provide detailed information about a career as a {career_name}."
+)
+
+def build_career_details_messages(career_name):
+    """Build the messages asking for structured details about a career."""
+    with track_phase("prompt_build"):
+        return CAREER_DETAILS_PROMPT.messages(career_name=career_name)
+
+def normalize_career_details(career_data):
+    """
+    Validate the response has the correct work_life_balance structure
+    
+    Args:
+        career_data: The model's answer, as text or as an already parsed object
+
+    Returns:
+        A (career_data, parsed) tuple; parsed is False when no JSON object could be
+        recovered from the text and career_data is returned unchanged
+    """
+    try:
+        parsed_data = career_data if isinstance(career_data, dict) else parse_json_object(career_data)
+        if parsed_data is None:
+            return career_data, False
+        if not isinstance(parsed_data.get('work_life_balance'), dict):
+            # Fix the work_life_balance field if it's not an object
+            if isinstance(parsed_data.get('work_life_balance'), (int, str)):
+                value = parsed_data.get('work_life_balance')
+                rating = int(value) if isinstance(value, int) else 5
+                parsed_data['work_life_balance'] = {
+                    "rating": rating,
+                    "explanation": "Work-life balance details unavailable"
+                }
+        return json.dumps(parsed_data), True
+    except (json.JSONDecodeError, TypeError, ValueError, AttributeError):
+        # If there's an error parsing, we'll just return the original data
+        return career_data, False
+
+def fallback_career_details(career_name, error):
+    """Placeholder details returned when OpenAI cannot be reached."""
+    return {
+        "success": False,
+        "error": str(error),
+        "data": json.dumps({
+            "description": f"Information about {career_name} is currently unavailable.",
+            "salary_range": "Data unavailable",
+            "difficulty": "Data unavailable",
+            "education": "Data unavailable",
+            "skills": ["Data unavailable"],
+            "job_outlook": "Data unavailable",
+            "day_to_day": "Data unavailable",
+            "advancement": "Data unavailable",
+            "work_life_balance": {
+                "rating": 5,
+                "explanation": "Data unavailable"
+            },
+            "pros": ["Data unavailable"],
+            "cons": ["Data unavailable"]
+        })
+    }
+
+def lookup_career_details(career_name, use_knowledge_base=True):
+    """Precomputed or cached details for a career, or None when they have to be generated."""
+    if use_knowledge_base:
+        precomputed = get_knowledge_base().details(career_name)
+        if precomputed is not None:
+            return precomputed
+
+    cached = career_details_cache.get(career_details_cache_key(career_name))
+    return dict(cached) if cached is not None else None
+
+def store_career_details(career_name, career_data, complete=True):
+    """
+    Normalize a generated answer, cache it and return the endpoint result
+
+    Answers that could not be parsed, or still lack sections (complete=False),
+    are cached briefly so they are regenerated soon.
+    """
+    career_data, parsed = normalize_career_details(career_data)
+    result = {"success": True, "data": career_data}
+    career_details_cache.set(
+        career_details_cache_key(career_name), result,
+        ttl=CAREER_DETAILS_TTL if parsed and complete else CAREER_DETAILS_UNPARSED_TTL
+    )
+    return result
+
+def career_details_completion(career_name):
+    """Arguments of the structured completion for a career (shared by the sync and async paths)."""
+    return {
+        "name": "career_details",
+        "schema": CAREER_DETAILS_SCHEMA,
+        "messages": build_career_details_messages(career_name),
+        "model": CAREER_DETAILS_MODEL,
+        "allow_downgrade": False,
+        "temperature": 0.7
+    }
+
+def generated_career_details(career_name, data, missing):
+    """Cache and return a generated answer; raises ValueError when nothing usable came back."""
+    if not data:
+        raise ValueError("The model returned no usable JSON")
+    return store_career_details(career_name, data, complete=not missing)
+
+def failed_career_details(career_name, error):
+    logger.error("Error getting career details: %s", error, extra={"career": career_name})
+    return fallback_career_details(career_name, error)
+
+def get_career_details(career_name, use_knowledge_base=True):
     """
     Get detailed information about a career using OpenAI's API
     
     Args:
         career_name: The name of the career to get details for
+        use_knowledge_base: Serve precomputed details when available (the
+            knowledge base build turns this off)
         
     Returns:
         A dictionary containing various details about the career
     """
+    known = lookup_career_details(career_name, use_knowledge_base)
+    if known is not None:
+        return known
+
     try:
-        # Create a prompt for OpenAI to generate structured information about the career        
-        user_prompt = f"""You are a career information specialist that provides accurate, concise details about careers in JSON format.
-
-        Provide detailed information about a career as a {career_name}. 
-        Return the response in JSON format with the following fields:
-        - description: A 2-3 sentence overview of the career
-        - salary_range: The typical salary range for this career (e.g. $X-$Y per year)
-        - difficulty: Rating from 1-10 how challenging this career is to pursue
-        - education: Required educational background
-        - skills: List of 5 key skills needed
-        - job_outlook: Future prospects for this career field
-        - day_to_day: Brief description of typical day-to-day activities
-        - advancement: Career advancement opportunities
-        - work_life_balance: An object with 'rating' (number 1-10) and 'explanation' (brief text explanation)
-        - pros: List of 3 advantages of this career
-        - cons: List of 3 challenges or disadvantages
-        
-        Ensure the work_life_balance field is structured as an object with 'rating' and 'explanation' properties.
-        """
-        
-        try:
-            # Use gpt-3.5-turbo model which is more reliable
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.7
-            )
-            career_data = response.choices[0].message.content
-            
-        except Exception as api_error:
-            print(f"Error with primary model: {str(api_error)}")
-            # Try an even simpler fallback without JSON format requirements
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.7
-            )
-            career_data = response.choices[0].message.content
-        
-        # Validate the response has the correct work_life_balance structure
-        try:
-            parsed_data = json.loads(career_data)
-            if not isinstance(parsed_data.get('work_life_balance'), dict):
-                # Fix the work_life_balance field if it's not an object
-                if isinstance(parsed_data.get('work_life_balance'), (int, str)):
-                    value = parsed_data.get('work_life_balance')
-                    rating = int(value) if isinstance(value, int) else 5
-                    parsed_data['work_life_balance'] = {
-                        "rating": rating,
-                        "explanation": "Work-life balance details unavailable"
-                    }
-            career_data = json.dumps(parsed_data)
-        except (json.JSONDecodeError, TypeError, ValueError):
-            # If there's an error parsing, we'll just return the original data
-            pass
-        
-        return {"success": True, "data": career_data}
-        
+        # Transient failures are retried with backoff inside chat_completion;
+        # sections missing from the answer are requested again on their own
+        data, missing = complete(chat_completion, **career_details_completion(career_name))
+        return generated_career_details(career_name, data, missing)
     except Exception as e:
-        print(f"Error getting career details: {str(e)}")
-        return {
-            "success": False,
-            "error": str(e),
-            "data": json.dumps({
-                "description": f"Information about {career_name} is currently unavailable.",
-                "salary_range": "Data unavailable",
-                "difficulty": "Data unavailable",
-                "education": "Data unavailable",
-                "skills": ["Data unavailable"],
-                "job_outlook": "Data unavailable",
-                "day_to_day": "Data unavailable",
-                "advancement": "Data unavailable",
-                "work_life_balance": {
-                    "rating": 5,
-                    "explanation": "Data unavailable"
-                },
-                "pros": ["Data unavailable"],
-                "cons": ["Data unavailable"]
-            })
-        } 
\ No newline at end of file
+        return failed_career_details(career_name, e)
+
+async def aget_career_details(career_name, use_knowledge_base=True):
+    """
+    get_career_details for the async serving mode: same lookups, cache and result,
+    with the completion awaited on the shared async client
+    """
+    # The cache may be a SQLite file, so its reads and writes run in a thread
+    known = await asyncio.to_thread(lookup_career_details, career_name, use_knowledge_base)
+    if known is not None:
+        return known
+
+    try:
+        data, missing = await acomplete(achat_completion, **career_details_completion(career_name))
+        return await asyncio.to_thread(generated_career_details, career_name, data, missing)
+    except Exception as e:
+        return failed_career_details(career_name, e)
+
+def stream_career_details(career_name):
+    """
+    Stream career details as they are generated
+    
+    Yields:
+        (event, payload) tuples: ("chunk", {"content"}) for every text delta, then
+        ("done", result) with the same result get_career_details would return.
+        Precomputed and cached careers produce a single "done" event.
+    """
+    known = lookup_career_details(career_name)
+    if known is not None:
+        yield "done", known
+        return
+
+    chunks = []
+    try:
+        response = stream_chat_completion(
+            model=CAREER_DETAILS_MODEL,
+            allow_downgrade=False,
+            messages=build_career_details_messages(career_name),
+            temperature=0.7,
+            response_format=JSON_MODE
+        )
+        for delta in stream_completion_text(response):
+            chunks.append(delta)
+            yield "chunk", {"content": delta}
+    except Exception as e:
+        logger.error("Error streaming career details: %s", e, extra={"career": career_name})
+        yield "done", fallback_career_details(career_name, e)
+        return
+
+    text = "".join(chunks)
+    data = parse_json_object(text)
+    if data is None:
+        yield "done", store_career_details(career_name, text, complete=False)
+    else:
+        yield "done", store_career_details(career_name, data, complete=not missing_sections(data, CAREER_DETAILS_SCHEMA)) 
\ No newline at end of file
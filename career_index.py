@@ -0,0 +1,178 @@
+"""
+In-process nearest-neighbour index over career names and descriptions.
+
+Every career in the datasets (and in the knowledge base, when one is built) is
+embedded with TF-IDF: character n-grams of the name, so casing, spacing and
+spelling variants land close together, plus word n-grams of the knowledge base
+description and skills when available. Rows are L2-normalized into a dense
+float32 matrix, so cosine similarity is a single matrix-vector product and a
+brute-force top-k over a few hundred careers takes microseconds. Everything is
+built locally from files on disk; no network access is needed.
+"""
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from cache import normalize_text
+from datasets import load_table, similar_careers_map
+from knowledge_base import get_knowledge_base
+from startup import Lazy
+
+# Share of the similarity that comes from the career name (the rest from its description)
+NAME_WEIGHT = float(os.getenv("CAREER_INDEX_NAME_WEIGHT", "0.7"))
+
+# Neighbours scoring below this are not returned as similar careers
+SIMILAR_CAREER_MIN_SCORE = float(os.getenv("SIMILAR_CAREER_MIN_SCORE", "0.2"))
+
+# A query scoring at least this against a known career is treated as that career
+ALIAS_MIN_SCORE = float(os.getenv("CAREER_ALIAS_MIN_SCORE", "0.8"))
+
+# Query vectors for names outside the catalog, most recently used
+QUERY_CACHE_SIZE = 1024
+
+
+def catalog_documents() -> "OrderedDict[str, Tuple[str, str]]":
+    """Normalized career name -> (display name, description text) for every known career."""
+    documents: "OrderedDict[str, Tuple[str, str]]" = OrderedDict()
+
+    def add(name: Optional[str]):
+        if name and name.strip():
+            documents.setdefault(normalize_text(name), (name.strip(), ""))
+
+    for career, similar in similar_careers_map().items():
+        add(career)
+        for other in similar.split(","):
+            add(other)
+    try:
+        for career in load_table("universities")["Career_Field"].values.tolist():
+            add(career)
+    except FileNotFoundError:
+        pass
+
+    for key, entry in get_knowledge_base().careers.items():
+        add(entry.get("name"))
+        details = entry.get("details")
+        if details:
+            try:
+                data = json.loads(details["data"])
+                text = " ".join([str(data.get("description", ""))] + [str(s) for s in data.get("skills", [])])
+            except (TypeError, ValueError, AttributeError):
+                continue
+            documents[key] = (documents[key][0], text)
+    return documents
+
+
+class CareerIndex:
+    """Normalized TF-IDF matrix over the career catalog with brute-force cosine search."""
+
+    def __init__(self, documents: "OrderedDict[str, Tuple[str, str]]"):
+        self.keys = list(documents)
+        self.careers = [name for name, _ in documents.values()]
+        self.row = {key: i for i, key in enumerate(self.keys)}
+
+        self.name_vectorizer = TfidfVectorizer(analyzer="char_wb", ngram_range=(2, 4), lowercase=True)
+        names = self.name_vectorizer.fit_transform(self.careers).toarray()
+
+        descriptions = [text for _, text in documents.values()]
+        self.description_vectorizer = None
+        if any(descriptions):
+            self.description_vectorizer = TfidfVectorizer(ngram_range=(1, 2), stop_words="english", sublinear_tf=True)
+            described = self.description_vectorizer.fit_transform(descriptions).toarray()
+        else:
+            described = np.zeros((len(self.careers), 0))
+
+        # Blend the two unit-length blocks, then renormalize so rows are unit vectors again
+        self.name_dims = names.shape[1]
+        matrix = np.hstack([np.sqrt(NAME_WEIGHT) * names, np.sqrt(1 - NAME_WEIGHT) * described])
+        self.matrix = self._normalize(matrix).astype(np.float32)
+
+        self._query_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.careers)
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        return matrix / np.where(norms > 0, norms, 1.0)
+
+    def _query_vector(self, career: str) -> np.ndarray:
+        key = normalize_text(career)
+        row = self.row.get(key)
+        if row is not None:
+            return self.matrix[row]
+        with self._lock:
+            vector = self._query_cache.get(key)
+            if vector is not None:
+                self._query_cache.move_to_end(key)
+                return vector
+        # Unknown careers have no description, so only the name block is populated
+        vector = np.zeros(self.matrix.shape[1], dtype=np.float32)
+        vector[:self.name_dims] = self.name_vectorizer.transform([career]).toarray()[0]
+        vector = self._normalize(vector)
+        with self._lock:
+            self._query_cache[key] = vector
+            while len(self._query_cache) > QUERY_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
+        return vector
+
+    def search(self, career: str, k: int = 5, exclude_self: bool = True) -> List[Tuple[str, float]]:
+        """
+        Top-k careers closest to career
+
+        Args:
+            career: Any career name, in or out of the catalog
+            k: Number of neighbours to return
+            exclude_self: Leave out the catalog entry matching career itself
+
+        Returns:
+            (career, cosine similarity) pairs, most similar first
+        """
+        if not career or not career.strip() or not self.careers:
+            return []
+        scores = self.matrix @ self._query_vector(career)
+        if exclude_self:
+            row = self.row.get(normalize_text(career))
+            if row is not None:
+                scores[row] = -1.0
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.careers[i], float(scores[i])) for i in top if scores[i] > 0]
+
+    def resolve(self, career: str, min_score: float = ALIAS_MIN_SCORE) -> Optional[str]:
+        """Catalog name for career, allowing casing and spelling variants; None if nothing is close."""
+        if not career:
+            return None
+        row = self.row.get(normalize_text(career))
+        if row is not None:
+            return self.careers[row]
+        best = self.search(career, k=1, exclude_self=False)
+        return best[0][0] if best and best[0][1] >= min_score else None
+
+
+def build_career_index() -> CareerIndex:
+    return CareerIndex(catalog_documents())
+
+
+_career_index = Lazy(build_career_index, "career_index")
+
+
+def get_career_index() -> CareerIndex:
+    """Return the process-wide career index, building it on first use."""
+    return _career_index.get()
+
+
+def find_similar_careers(career: str, k: int = 5, min_score: float = SIMILAR_CAREER_MIN_SCORE) -> List[Dict]:
+    """Nearest careers to career as [{"career", "score"}], best first."""
+    return [
+        {"career": name, "score": round(score, 4)}
+        for name, score in get_career_index().search(career, k)
+        if score >= min_score
+    ]
@@ -1,24 +1,92 @@
-import os
-from openai import OpenAI
-from dotenv import load_dotenv
 import json
+import logging
+from streaming import JSONSectionStream, stream_completion_text
+from llm import chat_completion, achat_completion, stream_chat_completion
+from knowledge_base import get_knowledge_base
+from metrics import track_phase
+from prompts import PromptTemplate
+from structured_output import JSON_MODE, acomplete, complete, is_list_or_text, repair
 
-# Load environment variables and API key
-load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+logger = logging.getLogger(__name__)
 
-def generate_career_roadmap(career, subject_grades, gpa=None):
-    """
-    Generate a career roadmap for a specific career based on user's academic performance
-    
-    Args:
-        career: The predicted career path
-        subject_grades: Dictionary of subject grades
-        gpa: The user's overall GPA (optional)
-    
-    Returns:
-        Dict containing structured roadmap data
+# Sections every roadmap must contain
+REQUIRED_KEYS = [
+    "short-term goals", "mid-term goals", "long-term goals", 
+    "education requirements", "skills to develop", "experience needed", 
+    "industry certifications", "personal development recommendations", 
+    "networking suggestions", "timeline_milestones"
+]
+
+# A section may come back as a single string; normalize_roadmap turns it into a list
+ROADMAP_SCHEMA = {key: is_list_or_text for key in REQUIRED_KEYS}
+
+# max_tokens per section when only missing sections are requested again
+ROADMAP_SECTION_TOKENS = 200
+
+# Model settings of every roadmap completion, streamed or not
+ROADMAP_COMPLETION = {"model": "gpt-3.5-turbo", "temperature": 0.7, "max_tokens": 1500}
+
+DEFAULT_TIMELINE_MILESTONES = [
+    "Year 1: Complete foundational courses",
+    "Year 2: Gain internship experience",
+    "Year 3: Complete degree requirements",
+    "Year 4: Secure entry-level position",
+    "Year 5: Pursue advanced certifications"
+]
+
+# Basic structure returned when the model output cannot be parsed
+FALLBACK_ROADMAP = {
+    "short-term goals": ["Begin by focusing on coursework in relevant subjects"],
+    "mid-term goals": ["Pursue a bachelor's degree in a related field"],
+    "long-term goals": ["Seek specialization and career advancement"],
+    "education requirements": ["Bachelor's degree in relevant field"],
+    "skills to develop": ["Critical thinking", "Problem-solving"],
+    "experience needed": ["Internships in related field"],
+    "industry certifications": ["Relevant professional certifications"],
+    "personal development recommendations": ["Develop time management skills"],
+    "networking suggestions": ["Join professional organizations"],
+    "timeline_milestones": DEFAULT_TIMELINE_MILESTONES
+}
+
+# Sections and format are the static prefix; only the user's profile changes between calls
+ROADMAP_PROMPT = PromptTemplate(
+    "career_roadmap",
+    instructions="""
+    You are a career roadmap expert. Provide detailed, structured career roadmaps to help people achieve their professional goals.
+    Create a structured career roadmap, tailored to the user's academic profile, with the following sections:
+    1. Short-term goals (0-2 years)
+    2. Mid-term goals (2-5 years)
+    3. Long-term goals (5+ years)
+    4. Education requirements
+    5. Skills to develop
+    6. Experience needed
+    7. Industry certifications
+    8. Personal development recommendations
+    9. Networking suggestions
+    10. Timeline milestones (include specific years and durations)
+    For each section, provide specific, actionable advice tailored to this person's academic profile.
+    Format the response as a JSON object with these sections as keys and arrays of step-by-step guidance as values.
+    Use the exact keys: "short-term goals", "mid-term goals", "long-term goals", "education requirements", "skills to develop", "experience needed", "industry certifications", "personal development recommendations", "networking suggestions", "timeline_milestones".
+    Each key should have an array of strings as its value.
+    For timeline_milestones, each entry should be in the format: "Year X: [milestone description]"
+    Keep each step brief and actionable, and ensure the entire response is JSON-parsable.
+    """,
+    suffix="""
+    Generate a detailed career roadmap for someone pursuing a career as a {career}.
+    USER INFORMATION:
+    {grades_info}
+    Overall GPA: {gpa}/100
+    Strengths: {strengths}
+    Areas to improve: {areas_to_improve}
     """
+)
+
+def build_roadmap_messages(career, subject_grades, gpa=None):
+    """Build the roadmap messages from the user's academic profile."""
+    with track_phase("prompt_build"):
+        return _roadmap_messages(career, subject_grades, gpa)
+
+def _roadmap_messages(career, subject_grades, gpa):
     # Format subject grades information
     grades_info = ""
     strengths = []
@@ -36,108 +104,160 @@ def generate_career_roadmap(career, subject_grades, gpa=None):
             elif grade_val < 50:
                 areas_to_improve.append(subject.replace('_score', ''))
     
-    # Build the prompt
-    prompt = f"""You are a career roadmap expert. Provide detailed, structured career roadmaps to help people achieve their professional goals.
-
-Generate a detailed career roadmap for someone pursuing a career as a {career}.
-
-USER INFORMATION:
-{grades_info}
-Overall GPA: {gpa if gpa else 'Not specified'}/100
-
-Strengths: {', '.join(strengths) if strengths else 'Not enough information'}
-Areas to improve: {', '.join(areas_to_improve) if areas_to_improve else 'Not enough information'}
-
-Your task is to create a structured career roadmap with the following sections:
-1. Short-term goals (0-2 years)
-2. Mid-term goals (2-5 years)
-3. Long-term goals (5+ years)
-4. Education requirements
-5. Skills to develop
-6. Experience needed
-7. Industry certifications
-8. Personal development recommendations
-9. Networking suggestions
-10. Timeline milestones (include specific years and durations)
-
-For each section, provide specific, actionable advice tailored to this person's academic profile.
-Format the response as a JSON object with these sections as keys and arrays of step-by-step guidance as values.
-Use the exact keys: "short-term goals", "mid-term goals", "long-term goals", "education requirements", "skills to develop", "experience needed", "industry certifications", "personal development recommendations", "networking suggestions", "timeline_milestones".
-Each key should have an array of strings as its value.
-For timeline_milestones, each entry should be in the format: "Year X: [milestone description]"
-Keep each step brief and actionable, and ensure the entire response is JSON-parsable.
-"""
+    return ROADMAP_PROMPT.messages(
+        career=career,
+        grades_info=grades_info.strip(),
+        gpa=gpa if gpa else 'Not specified',
+        strengths=', '.join(strengths) if strengths else 'Not enough information',
+        areas_to_improve=', '.join(areas_to_improve) if areas_to_improve else 'Not enough information'
+    )
 
-    try:
-        # Call the OpenAI API
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=1500
-        )
-        
-        # The response will be a JSON string
-        roadmap_data = response.choices[0].message.content
-        
-        # Try to parse the JSON to ensure it's valid
-        try:
-            parsed_data = json.loads(roadmap_data)
-            
-            # Create a fallback structure if any required keys are missing
-            required_keys = [
-                "short-term goals", "mid-term goals", "long-term goals", 
-                "education requirements", "skills to develop", "experience needed", 
-                "industry certifications", "personal development recommendations", 
-                "networking suggestions", "timeline_milestones"
-            ]
-            
-            # Check for missing keys and add placeholders
-            for key in required_keys:
-                if key not in parsed_data:
-                    if key == "timeline_milestones":
-                        parsed_data[key] = [
-                            "Year 1: Complete foundational courses",
-                            "Year 2: Gain internship experience",
-                            "Year 3: Complete degree requirements",
-                            "Year 4: Secure entry-level position",
-                            "Year 5: Pursue advanced certifications"
-                        ]
-                    else:
-                        parsed_data[key] = ["Information not available"]
-                elif not isinstance(parsed_data[key], list):
-                    parsed_data[key] = [str(parsed_data[key])]
-                
-            roadmap_data = json.dumps(parsed_data)
-            
-        except json.JSONDecodeError as e:
-            print(f"JSON parse error in roadmap generation: {e}")
-            
-            # Create a basic structure as fallback
-            fallback_data = {
-                "short-term goals": ["Begin by focusing on coursework in relevant subjects"],
-                "mid-term goals": ["Pursue a bachelor's degree in a related field"],
-                "long-term goals": ["Seek specialization and career advancement"],
-                "education requirements": ["Bachelor's degree in relevant field"],
-                "skills to develop": ["Critical thinking", "Problem-solving"],
-                "experience needed": ["Internships in related field"],
-                "industry certifications": ["Relevant professional certifications"],
-                "personal development recommendations": ["Develop time management skills"],
-                "networking suggestions": ["Join professional organizations"],
-                "timeline_milestones": [
-                    "Year 1: Complete foundational courses",
-                    "Year 2: Gain internship experience",
-                    "Year 3: Complete degree requirements",
-                    "Year 4: Secure entry-level position",
-                    "Year 5: Pursue advanced certifications"
-                ]
-            }
-            roadmap_data = json.dumps(fallback_data)
-        
-        return {"success": True, "data": roadmap_data}
+def normalize_roadmap(parsed_data):
+    """Fill in missing sections with placeholders and make every section a list."""
+    # Check for missing keys and add placeholders
+    for key in REQUIRED_KEYS:
+        if key not in parsed_data:
+            if key == "timeline_milestones":
+                parsed_data[key] = list(DEFAULT_TIMELINE_MILESTONES)
+            else:
+                parsed_data[key] = ["Information not available"]
+        elif not isinstance(parsed_data[key], list):
+            parsed_data[key] = [str(parsed_data[key])]
+    return parsed_data
+
+def roadmap_result(parsed_data, missing=()):
+    """
+    Normalize the model's roadmap, as recovered by structured_output, into the endpoint result
+
+    Sections still missing after repair are filled with placeholders and listed
+    under "missing_sections".
+    """
+    if parsed_data:
+        # Placeholders for any sections that are still missing
+        roadmap_data = json.dumps(normalize_roadmap(parsed_data))
+    else:
+        logger.warning("No usable JSON in roadmap generation")
         
+        # Create a basic structure as fallback
+        roadmap_data = json.dumps(FALLBACK_ROADMAP)
+    
+    result = {"success": True, "data": roadmap_data}
+    if parsed_data and missing:
+        result["missing_sections"] = list(missing)
+    return result
+
+def precomputed_roadmap(career, subject_grades, gpa=None):
+    """Base roadmap from the knowledge base, only when there is nothing to personalize."""
+    if subject_grades or gpa:
+        return None
+    return get_knowledge_base().roadmap(career)
+
+def roadmap_completion(career, subject_grades, gpa=None):
+    """Arguments of the structured roadmap completion (shared by the sync and async paths)."""
+    return {
+        "name": "career_roadmap",
+        "schema": ROADMAP_SCHEMA,
+        "messages": build_roadmap_messages(career, subject_grades, gpa),
+        "tokens_per_section": ROADMAP_SECTION_TOKENS,
+        **ROADMAP_COMPLETION
+    }
+
+def failed_roadmap(career, error):
+    logger.error("Error generating career roadmap: %s", error, extra={"career": career})
+    return {"success": False, "error": str(error)}
+
+def generate_career_roadmap(career, subject_grades, gpa=None, use_knowledge_base=True):
+    """
+    Generate a career roadmap for a specific career based on user's academic performance
+    
+    Args:
+        career: The predicted career path
+        subject_grades: Dictionary of subject grades
+        gpa: The user's overall GPA (optional)
+        use_knowledge_base: Serve the precomputed base roadmap when there are
+            no grades to personalize with
+    
+    Returns:
+        Dict containing structured roadmap data
+    """
+    if use_knowledge_base:
+        precomputed = precomputed_roadmap(career, subject_grades, gpa)
+        if precomputed is not None:
+            return precomputed
+
+    try:
+        # Call the OpenAI API in JSON mode; a truncated or incomplete answer keeps
+        # its finished sections and only the missing ones are requested again
+        data, missing = complete(chat_completion, **roadmap_completion(career, subject_grades, gpa))
+        return roadmap_result(data, missing)
+    except Exception as e:
+        return failed_roadmap(career, e)
+
+async def agenerate_career_roadmap(career, subject_grades, gpa=None, use_knowledge_base=True):
+    """
+    generate_career_roadmap for the async serving mode, awaiting the completion
+    on the shared async client
+    """
+    if use_knowledge_base:
+        precomputed = precomputed_roadmap(career, subject_grades, gpa)
+        if precomputed is not None:
+            return precomputed
+
+    try:
+        data, missing = await acomplete(achat_completion, **roadmap_completion(career, subject_grades, gpa))
+        return roadmap_result(data, missing)
+    except Exception as e:
+        return failed_roadmap(career, e)
+
+def stream_career_roadmap(career, subject_grades, gpa=None):
+    """
+    Stream a career roadmap, emitting each top-level section as soon as it is complete
+    
+    Yields:
+        (event, payload) tuples: ("section", {"key", "value"}) for every section
+        parsed from the stream, then for each missing section requested again
+        once the stream ends, then ("done", result) with the same result
+        generate_career_roadmap would return. Precomputed roadmaps are emitted
+        section by section straight away.
+    """
+    precomputed = precomputed_roadmap(career, subject_grades, gpa)
+    if precomputed is not None:
+        for key, value in json.loads(precomputed["data"]).items():
+            yield "section", {"key": key, "value": value}
+        yield "done", precomputed
+        return
+
+    messages = build_roadmap_messages(career, subject_grades, gpa)
+    parser = JSONSectionStream()
+    sections = {}
+    interrupted = False
+
+    try:
+        response = stream_chat_completion(messages=messages, response_format=JSON_MODE, **ROADMAP_COMPLETION)
+
+        for delta in stream_completion_text(response):
+            for key, value in parser.feed(delta):
+                if key in REQUIRED_KEYS and not isinstance(value, list):
+                    value = [str(value)]
+                sections[key] = value
+                yield "section", {"key": key, "value": value}
+
     except Exception as e:
-        print(f"Error generating career roadmap: {str(e)}")
-        return {"success": False, "error": str(e)} 
\ No newline at end of file
+        logger.error("Error streaming career roadmap: %s", e, extra={"career": career})
+        if not sections:
+            yield "done", {"success": False, "error": str(e)}
+            return
+        interrupted = True
+
+    # Sections the stream did not deliver are requested again, as in generate_career_roadmap
+    streamed = set(sections)
+    missing = repair(
+        chat_completion, "career_roadmap", ROADMAP_SCHEMA, messages, sections,
+        tokens_per_section=ROADMAP_SECTION_TOKENS, strict=not interrupted, **ROADMAP_COMPLETION
+    )
+    for key in REQUIRED_KEYS:
+        if key in sections and key not in streamed:
+            if not isinstance(sections[key], list):
+                sections[key] = [str(sections[key])]
+            yield "section", {"key": key, "value": sections[key]}
+    yield "done", roadmap_result(sections, missing) 
\ No newline at end of file
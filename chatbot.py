@@ -1,35 +1,100 @@
-import pandas as pd
-import os
+from bisect import bisect_left
+
+import numpy as np
+from datasets import load_table, similar_careers_map
 
 class CareerChatbot:
     def __init__(self):
-        # Use relative paths, or handle multiple possible locations with try/except
-        try:
-            # First try with the expected relative path
-            self.universities = pd.read_csv('recommender-data/raw/career_university_dataset.csv')
-            self.similar_careers = pd.read_csv('recommender-data/raw/similar_careers_dataset.csv')
-        except FileNotFoundError:
-            # If that fails, try with a path relative to this file
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            base_dir = os.path.dirname(script_dir)  # Go up one directory
-            
-            self.universities = pd.read_csv(
-                os.path.join(base_dir, 'recommender-data/raw/career_university_dataset.csv')
-            )
-            self.similar_careers = pd.read_csv(
-                os.path.join(base_dir, 'recommender-data/raw/similar_careers_dataset.csv')
-            )
+        # Datasets are loaded once per process and shared by every consumer
+        self.universities = load_table('universities')
+        self.similar_careers = similar_careers_map()
+
+        self._build_indexes()
+
+    def _build_indexes(self):
+        """
+        Turn the datasets into per-career lookup tables so queries avoid full scans.
+
+        A career's GPA ranges split the GPA axis into elementary segments: each
+        distinct range endpoint, and the open gaps between consecutive endpoints.
+        Every GPA inside a segment falls in the same set of ranges, so each
+        segment's universities are computed here once and a query is one bisect
+        over the endpoints.
+        """
+        careers = self.universities['Career_Field']
+        min_gpa = np.asarray(self.universities['Min_GPA_100'], dtype=np.float64)
+        max_gpa = np.asarray(self.universities['Max_GPA_100'], dtype=np.float64)
+
+        # Group row numbers by career code, each group in dataset order
+        codes = np.asarray(careers.codes)
+        order = np.argsort(codes, kind='stable')
+        boundaries = np.flatnonzero(np.diff(codes[order])) + 1
+        self._universities_by_career = {}
+        for rows in np.split(order, boundaries):
+            if len(rows) == 0 or codes[rows[0]] < 0:
+                continue
+            career = str(careers.values[codes[rows[0]]])
+            self._universities_by_career[career] = self._segment_index(min_gpa[rows], max_gpa[rows], rows)
+
+        self._similar_by_career = {
+            career: similar.split(", ") if similar else []
+            for career, similar in self.similar_careers.items()
+        }
+
+    def _segment_index(self, min_gpa, max_gpa, rows):
+        """
+        (endpoints, segments) for one career's rows
+
+        endpoints is the sorted list of distinct range endpoints e0 < e1 < ... < ek.
+        segments[2 * i + 1] holds the universities for a GPA equal to ei and
+        segments[2 * i] those for a GPA strictly between e(i-1) and ei (below e0
+        for i = 0, above ek for i = k + 1), as (names, tiers) in dataset order.
+        """
+        endpoints = np.unique(np.concatenate([min_gpa, max_gpa]))
+        endpoints = endpoints[~np.isnan(endpoints)]
+        # One GPA inside each segment: the gaps' midpoints (and points beyond either end), then the endpoints
+        gaps = np.concatenate([[-np.inf], (endpoints[:-1] + endpoints[1:]) / 2, [np.inf]])
+        probes = np.empty(2 * len(endpoints) + 1)
+        probes[0::2] = gaps
+        probes[1::2] = endpoints
+        contains = (min_gpa[None, :] <= probes[:, None]) & (probes[:, None] <= max_gpa[None, :])
+        segments = []
+        for mask in contains:
+            matches = rows[mask]
+            segments.append((
+                self.universities.take('University_Name', matches),
+                self.universities.take('Rank_Tier', matches)
+            ))
+        return endpoints.tolist(), segments
+
+    def universities_for(self, gpa, career):
+        """Universities offering the career whose GPA range contains gpa, in dataset order."""
+        index = self._universities_by_career.get(career)
+        if index is None:
+            return []
+        endpoints, segments = index
+        i = bisect_left(endpoints, gpa)
+        if i < len(endpoints) and endpoints[i] == gpa:
+            names, tiers = segments[2 * i + 1]
+        elif gpa == gpa:
+            names, tiers = segments[2 * i]
+        else:
+            # NaN is in no range
+            return []
+        return [
+            {'University_Name': name, 'Rank_Tier': tier}
+            for name, tier in zip(names, tiers)
+        ]
+
+    def similar_careers_for(self, career):
+        """Pre-split list of careers similar to career."""
+        return list(self._similar_by_career.get(career, []))
 
     def recommend(self, gpa, predicted_career):
         # Filter matching universities based on GPA and career
-        uni_matches = self.universities[
-            (self.universities['Career_Field'] == predicted_career) &
-            (self.universities['Min_GPA_100'] <= gpa) &
-            (self.universities['Max_GPA_100'] >= gpa)
-        ][['University_Name', 'Rank_Tier']].to_dict(orient='records')
+        uni_matches = self.universities_for(gpa, predicted_career)
 
         # Fetch similar careers
-        similar_row = self.similar_careers[self.similar_careers['Career_Field'] == predicted_career]
-        similar_list = similar_row['Similar_Careers'].iloc[0].split(", ") if not similar_row.empty else []
+        similar_list = self.similar_careers_for(predicted_career)
 
         return uni_matches, similar_list
@@ -0,0 +1,124 @@
+import logging
+import math
+import os
+from functools import lru_cache
+from typing import Callable, Dict, List, Sequence, Tuple
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - optional dependency
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# A turn is one (user message, assistant response) exchange
+Turn = Tuple[str, str]
+
+# Prompt tokens allowed for conversation history (summary included)
+CHAT_HISTORY_TOKEN_BUDGET = int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "1200"))
+
+# Replace turns that no longer fit the budget with a short summary of what was asked
+CHAT_HISTORY_SUMMARY = os.getenv("CHAT_HISTORY_SUMMARY", "0") == "1"
+
+# Share of the budget the summary may use
+SUMMARY_BUDGET_SHARE = 0.25
+
+# Tokens the chat format adds around every message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: str):
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # The BPE file could not be loaded (e.g. no cache and no network)
+        logger.warning("Tokenizer unavailable, estimating token counts: %s", e)
+        return None
+
+
+def load_tokenizers(models: Sequence[str]):
+    """Load the tokenizers of models now rather than on their first count."""
+    for model in models:
+        _encoding(model)
+
+
+def count_tokens(text: str, model: str = "gpt-3.5-turbo") -> int:
+    """Count tokens with the model's local tokenizer, or estimate ~4 characters per token."""
+    encoding = _encoding(model)
+    if encoding is None:
+        return math.ceil(len(text) / 4)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(messages: Sequence[Dict[str, str]], model: str = "gpt-3.5-turbo") -> int:
+    """Prompt tokens for a list of chat messages, including per-message overhead."""
+    return sum(count_tokens(m["content"], model) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+def select_recent_turns(turns: Sequence[Turn], budget: int,
+                        count: Callable[[str], int] = count_tokens) -> Tuple[List[Turn], List[Turn]]:
+    """
+    Pick the most recent turns that fit in the token budget
+
+    Returns:
+        A (kept, dropped) tuple, both oldest first
+    """
+    used = 0
+    start = len(turns)
+    for user_message, assistant_message in reversed(turns):
+        cost = count(user_message) + count(assistant_message) + 2 * MESSAGE_OVERHEAD_TOKENS
+        if used + cost > budget:
+            break
+        used += cost
+        start -= 1
+    return list(turns[start:]), list(turns[:start])
+
+
+def summarize_turns(turns: Sequence[Turn], budget: int, count: Callable[[str], int] = count_tokens) -> str:
+    """
+    Extractive summary of older turns: the user's questions, most recent first until the budget runs out
+    """
+    header = "Earlier in this conversation the user asked about:"
+    used = count(header) + MESSAGE_OVERHEAD_TOKENS
+    questions = []
+    for user_message, _ in reversed(turns):
+        question = " ".join(user_message.split())
+        if len(question) > 200:
+            question = question[:197] + "..."
+        cost = count(question) + 2
+        if used + cost > budget:
+            break
+        used += cost
+        questions.append(question)
+    if not questions:
+        return ""
+    return header + "\n" + "\n".join(f"- {q}" for q in reversed(questions))
+
+
+def build_history_messages(turns: Sequence[Turn], budget: int = CHAT_HISTORY_TOKEN_BUDGET,
+                           summarize: bool = CHAT_HISTORY_SUMMARY) -> List[Dict[str, str]]:
+    """
+    Chat messages for the most recent history that fits in the token budget
+
+    When summarize is set and not every turn fits, part of the budget is reserved
+    for a summary of the older turns, sent as a system message ahead of the kept turns.
+    """
+    kept, dropped = select_recent_turns(turns, budget)
+
+    messages = []
+    if dropped and summarize:
+        summary_budget = int(budget * SUMMARY_BUDGET_SHARE)
+        kept, dropped = select_recent_turns(turns, budget - summary_budget)
+        summary = summarize_turns(dropped, summary_budget)
+        if summary:
+            messages.append({"role": "system", "content": summary})
+    for user_message, assistant_message in kept:
+        messages.append({"role": "user", "content": user_message})
+        messages.append({"role": "assistant", "content": assistant_message})
+    return messages
@@ -0,0 +1,231 @@
+"""
+Shared, per-process access to the recommender datasets.
+
+Each dataset is loaded once per process and kept in a compact columnar form:
+numeric columns as NumPy arrays and string columns dictionary-encoded as
+int32 codes plus an array of distinct values. When a compiled copy exists
+(built with ``python datasets.py build``) the arrays are memory-mapped
+read-only, so forked gunicorn workers share the same pages instead of each
+holding its own parsed DataFrame. Without one, the CSV is parsed with pandas
+and converted in memory.
+"""
+import json
+import logging
+import os
+import sys
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+DATASET_FILES = {
+    "universities": "career_university_dataset.csv",
+    "similar_careers": "similar_careers_dataset.csv",
+}
+
+# Bump when the compiled layout changes so old builds are ignored
+COMPILED_FORMAT_VERSION = 1
+
+logger = logging.getLogger(__name__)
+
+_script_dir = os.path.dirname(os.path.abspath(__file__))
+
+
+def raw_data_dirs() -> List[str]:
+    """Candidate raw data directories, in the order they are tried."""
+    dirs = []
+    if os.getenv("RECOMMENDER_DATA_DIR"):
+        dirs.append(os.path.join(os.getenv("RECOMMENDER_DATA_DIR"), "raw"))
+    # First the expected relative path, then a path relative to this file
+    dirs.append(os.path.join("recommender-data", "raw"))
+    dirs.append(os.path.join(os.path.dirname(_script_dir), "recommender-data", "raw"))
+    return dirs
+
+
+def find_raw_file(name: str) -> str:
+    filename = DATASET_FILES[name]
+    for directory in raw_data_dirs():
+        path = os.path.join(directory, filename)
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"Could not find {filename} in any of: {', '.join(raw_data_dirs())}")
+
+
+def compiled_dir(name: str, raw_path: Optional[str] = None) -> str:
+    """Directory holding the compiled copy of a dataset (next to the raw CSVs by default)."""
+    base = os.getenv("RECOMMENDER_COMPILED_DIR")
+    if not base:
+        raw_path = raw_path or find_raw_file(name)
+        base = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(raw_path))), "compiled")
+    return os.path.join(base, name)
+
+
+class StringColumn:
+    """Dictionary-encoded string column: int32 codes into an array of distinct values (-1 is missing)."""
+
+    def __init__(self, codes: np.ndarray, values: np.ndarray):
+        self.codes = codes
+        self.values = values
+
+    def __len__(self):
+        return len(self.codes)
+
+    def take(self, rows) -> List[Optional[str]]:
+        """Decode the given rows to Python strings (None where missing)."""
+        codes = np.asarray(self.codes[rows])
+        if len(codes) == 0 or codes.min() >= 0:
+            return self.values[codes].tolist()
+        decoded = self.values[np.maximum(codes, 0)].tolist() if len(self.values) else [None] * len(codes)
+        return [value if code >= 0 else None for code, value in zip(codes.tolist(), decoded)]
+
+    def lookup(self, value: str) -> int:
+        """Code for value, or -1 if it never occurs."""
+        matches = np.flatnonzero(self.values == value)
+        return int(matches[0]) if len(matches) else -1
+
+
+class Table:
+    """Read-only columnar table."""
+
+    def __init__(self, name: str, columns: Dict[str, object], source: str):
+        self.name = name
+        self.columns = columns
+        self.source = source
+
+    def __len__(self):
+        first = next(iter(self.columns.values()), None)
+        return len(first) if first is not None else 0
+
+    def __getitem__(self, column: str):
+        return self.columns[column]
+
+    def take(self, column: str, rows) -> List:
+        """Values of a column at the given rows, as Python objects."""
+        data = self.columns[column]
+        if isinstance(data, StringColumn):
+            return data.take(rows)
+        return np.asarray(data)[rows].tolist()
+
+
+def _encode_frame(df: pd.DataFrame) -> Dict[str, object]:
+    columns = {}
+    for column in df.columns:
+        series = df[column]
+        if pd.api.types.is_bool_dtype(series) or pd.api.types.is_integer_dtype(series):
+            columns[column] = series.to_numpy()
+        elif pd.api.types.is_float_dtype(series):
+            columns[column] = series.to_numpy(dtype=np.float64)
+        else:
+            # Missing values get code -1
+            codes, uniques = pd.factorize(series.astype(object))
+            values = np.array([str(u) for u in uniques], dtype=str)
+            columns[column] = StringColumn(codes.astype(np.int32), values)
+    return columns
+
+
+def _source_signature(raw_path: str) -> Dict:
+    stat = os.stat(raw_path)
+    return {"size": stat.st_size, "mtime": int(stat.st_mtime)}
+
+
+def compile_dataset(name: str) -> str:
+    """Convert a raw CSV into the compiled, memory-mappable layout. Returns the output directory."""
+    raw_path = find_raw_file(name)
+    out_dir = compiled_dir(name, raw_path)
+    os.makedirs(out_dir, exist_ok=True)
+
+    columns = _encode_frame(pd.read_csv(raw_path))
+    manifest = {"version": COMPILED_FORMAT_VERSION, "source": _source_signature(raw_path), "columns": []}
+    for index, (column, data) in enumerate(columns.items()):
+        prefix = os.path.join(out_dir, f"{index:03d}")
+        if isinstance(data, StringColumn):
+            np.save(prefix + ".codes.npy", data.codes)
+            np.save(prefix + ".values.npy", data.values)
+            manifest["columns"].append({"name": column, "kind": "string", "file": f"{index:03d}"})
+        else:
+            np.save(prefix + ".npy", np.ascontiguousarray(data))
+            manifest["columns"].append({"name": column, "kind": "numeric", "file": f"{index:03d}"})
+
+    with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return out_dir
+
+
+def _load_compiled(name: str, raw_path: Optional[str]) -> Optional[Table]:
+    if raw_path is None and not os.getenv("RECOMMENDER_COMPILED_DIR"):
+        return None
+    out_dir = compiled_dir(name, raw_path)
+    if not os.path.exists(os.path.join(out_dir, "manifest.json")):
+        return None
+
+    with open(os.path.join(out_dir, "manifest.json")) as f:
+        manifest = json.load(f)
+    if manifest.get("version") != COMPILED_FORMAT_VERSION:
+        return None
+    if raw_path and manifest.get("source") != _source_signature(raw_path):
+        logger.info("Compiled %s dataset is stale, reading %s instead", name, raw_path)
+        return None
+
+    columns = {}
+    for column in manifest["columns"]:
+        prefix = os.path.join(out_dir, column["file"])
+        if column["kind"] == "string":
+            columns[column["name"]] = StringColumn(
+                np.load(prefix + ".codes.npy", mmap_mode="r"),
+                np.load(prefix + ".values.npy", mmap_mode="r")
+            )
+        else:
+            columns[column["name"]] = np.load(prefix + ".npy", mmap_mode="r")
+    return Table(name, columns, out_dir)
+
+
+_tables: Dict[str, Table] = {}
+_tables_lock = threading.Lock()
+
+
+def load_table(name: str) -> Table:
+    """Load a dataset once per process, preferring the memory-mapped compiled copy."""
+    table = _tables.get(name)
+    if table is not None:
+        return table
+    with _tables_lock:
+        table = _tables.get(name)
+        if table is None:
+            try:
+                raw_path = find_raw_file(name)
+            except FileNotFoundError:
+                raw_path = None
+            table = _load_compiled(name, raw_path)
+            if table is None:
+                if raw_path is None:
+                    raise FileNotFoundError(f"No raw or compiled copy of the {name} dataset was found")
+                table = Table(name, _encode_frame(pd.read_csv(raw_path)), raw_path)
+            _tables[name] = table
+    return table
+
+
+_similar_careers: Optional[Dict[str, str]] = None
+
+
+def similar_careers_map() -> Dict[str, str]:
+    """Career_Field -> raw Similar_Careers text, taken from the first row for each career."""
+    global _similar_careers
+    if _similar_careers is None:
+        table = load_table("similar_careers")
+        careers = table["Career_Field"].take(slice(None))
+        similar = table["Similar_Careers"].take(slice(None))
+        mapping = {}
+        for career, text in zip(careers, similar):
+            if career is not None and career not in mapping:
+                mapping[career] = text or ""
+        _similar_careers = mapping
+    return _similar_careers
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["build"]:
+        print("Usage: python datasets.py build")
+        sys.exit(2)
+    for dataset in DATASET_FILES:
+        print(f"Compiled {dataset} -> {compile_dataset(dataset)}")
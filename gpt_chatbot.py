@@ -1,38 +1,81 @@
 # recommender-ai/gpt_chatbot.py
 
-import os
-from openai import OpenAI
+import asyncio
+import logging
 from dotenv import load_dotenv
 from chatbot import CareerChatbot
+from streaming import stream_completion_text
+from session_store import create_session_store
+from context_builder import build_history_messages
+from llm import chat_completion, achat_completion, stream_chat_completion
+from startup import Lazy
+from metrics import track_phase
+from prompts import PromptTemplate
 
-# Load environment variables and API key
+logger = logging.getLogger(__name__)
+
+# Load environment variables
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-# Initialize the career chatbot
-career_chatbot = CareerChatbot()
+# The career chatbot (and its datasets) is loaded on first use
+_career_chatbot = Lazy(CareerChatbot, "career_chatbot")
+
+def get_career_chatbot():
+    """Return the shared CareerChatbot, loading it on first use."""
+    return _career_chatbot.get()
 
-# Store chat history
-chat_histories = {}
+# Instructions first and unchanged on every turn; the user's profile follows as its own system message
+CHAT_PROMPT = PromptTemplate(
+    "chat",
+    instructions="""
+    You are a specialized career advisor focused exclusively on the user's career interest, its education requirements, university recommendations, and related career paths. The user's profile follows.
 
-def handle_chat(message, career=None, gpa=None, subject_grades=None, session_id="default"):
+    IMPORTANT INSTRUCTIONS:
+    1. ONLY answer questions related to careers, education, universities, academic performance, and professional development.
+    2. If the user asks about topics outside this scope (sports, politics, entertainment, general knowledge, etc.), politely redirect them to career-related topics.
+    3. For off-topic questions, respond with: "I specialize in providing career advice for <their career interest>, university recommendations, and information on related careers. If you have any questions related to those topics or if there's anything else I can assist you with, feel free to let me know!"
+    4. Be conversational and friendly, but stay strictly within your defined scope.
+    5. If the user asks about universities and you have university recommendations, share them.
+    6. If they ask about universities but you don't have their GPA, ask for it.
+    7. If they ask about their grades or academic performance, refer to their subject grades if available.
+
+    Your primary purpose is to help users with career guidance and educational planning, not to be a general-purpose assistant.
+    """,
+    suffix="""
+    USER INFORMATION:
+    Career Interest: {career}
+    Overall GPA: {gpa}/100
+    {grades_info}
+    UNIVERSITY RECOMMENDATIONS: {university_info}
+    SIMILAR CAREERS: {similar_careers_info}
     """
-    Handle chat messages using OpenAI's API with fallback to rule-based responses
-    
-    Args:
-        message: The user's message
-        career: The user's selected career
-        gpa: The user's overall GPA
-        subject_grades: Dictionary of subject grades
-        session_id: Unique identifier for the chat session
+)
+
+# Model settings of every chat completion, streamed or not
+CHAT_COMPLETION = {"model": "gpt-3.5-turbo", "temperature": 0.7, "max_tokens": 500}
+
+# Appended to a streamed answer that broke off, so the saved history shows it is incomplete
+INTERRUPTED_MARKER = " [response interrupted]"
+
+# Store chat history (bounded; see session_store for the available backends)
+session_store = create_session_store()
+
+def session_turns(session_id):
+    """Stored turns of a session; a request without a session_id has no history."""
+    return session_store.get_turns(session_id) if session_id else []
+
+def save_turn(session_id, message, response_text):
+    """Record one exchange; nothing is kept for requests without a session_id."""
+    if session_id:
+        session_store.append_turn(session_id, message, response_text)
+
+def build_chat_context(career=None, gpa=None, subject_grades=None):
     """
-    # Initialize chat history for this session if it doesn't exist
-    if session_id not in chat_histories:
-        chat_histories[session_id] = []
-    
-    if subject_grades is None:
-        subject_grades = {}
+    Build the university, similar-career and grades sections of the system prompt
     
+    Returns:
+        A (university_info, similar_careers_info, grades_info) tuple of strings
+    """
     # Get university and career information
     university_info = ""
     similar_careers_info = ""
@@ -51,7 +94,7 @@ def handle_chat(message, career=None, gpa=None, subject_grades=None, session_id=
                 gpa = float(gpa)
                 
             # Get university recommendations and similar careers
-            unis, similar_careers = career_chatbot.recommend(gpa, career)
+            unis, similar_careers = get_career_chatbot().recommend(gpa, career)
             
             # Format university information
             if unis:
@@ -68,73 +111,135 @@ def handle_chat(message, career=None, gpa=None, subject_grades=None, session_id=
             if similar_careers:
                 similar_careers_info = f"\n\nSimilar careers to {career} include: {', '.join(similar_careers[:5])}"
         except Exception as e:
-            print(f"Error getting recommendations: {str(e)}")
+            logger.warning("Error getting recommendations: %s", e)
+    
+    return university_info, similar_careers_info, grades_info
+
+def handle_chat(message, career=None, gpa=None, subject_grades=None, session_id=None):
+    """
+    Handle chat messages using OpenAI's API with fallback to rule-based responses
+    
+    Args:
+        message: The user's message
+        career: The user's selected career
+        gpa: The user's overall GPA
+        subject_grades: Dictionary of subject grades
+        session_id: Unique identifier for the chat session; without one the
+            message is answered without history and nothing is stored
+    """
+    if subject_grades is None:
+        subject_grades = {}
+    
+    university_info, similar_careers_info, grades_info = build_chat_context(career, gpa, subject_grades)
     
     try:
         # Try to use OpenAI API
         response_text = get_openai_response(message, career, gpa, subject_grades, university_info, similar_careers_info, grades_info, session_id)
         
         # Update chat history
-        chat_histories[session_id].append(message)
-        chat_histories[session_id].append(response_text)
+        save_turn(session_id, message, response_text)
         
         return response_text
         
     except Exception as e:
-        print(f"OpenAI API error: {str(e)}")
-        # Fall back to rule-based responses
-        return get_fallback_response(message, career, gpa, subject_grades, university_info, similar_careers_info, grades_info)
+        return chat_fallback(e, message, career, gpa, subject_grades, university_info, similar_careers_info, grades_info)
 
-def get_openai_response(message, career=None, gpa=None, subject_grades=None, university_info="", similar_careers_info="", grades_info="", session_id="default"):
-    """Get response from OpenAI API"""
+async def ahandle_chat(message, career=None, gpa=None, subject_grades=None, session_id=None):
+    """
+    handle_chat for the async serving mode: the completion is awaited on the
+    shared async client instead of blocking a worker thread
+    """
+    if subject_grades is None:
+        subject_grades = {}
     
-    # Create system message with context
-    system_message = f"""You are a specialized career advisor focused exclusively on providing information about {career if career else 'various careers'}, education requirements, university recommendations, and related career paths.
-
-    USER INFORMATION:
-    Career Interest: {career if career else 'Not specified'}
-    Overall GPA: {gpa if gpa else 'Not specified'}/100
-    {grades_info}
+    university_info, similar_careers_info, grades_info = await asyncio.to_thread(build_chat_context, career, gpa, subject_grades)
     
-    UNIVERSITY RECOMMENDATIONS:{university_info}
+    try:
+        response_text = await aget_openai_response(message, career, gpa, subject_grades, university_info, similar_careers_info, grades_info, session_id)
+        
+        # Update chat history (the session store may be a SQLite file)
+        await asyncio.to_thread(save_turn, session_id, message, response_text)
+        
+        return response_text
+        
+    except Exception as e:
+        return chat_fallback(e, message, career, gpa, subject_grades, university_info, similar_careers_info, grades_info)
+
+def chat_fallback(error, message, career, gpa, subject_grades, university_info, similar_careers_info, grades_info):
+    """Rule-based answer when the OpenAI call failed."""
+    logger.warning("OpenAI API error, using fallback response: %s", error)
+    return get_fallback_response(message, career, gpa, subject_grades, university_info, similar_careers_info, grades_info)
+
+def handle_chat_stream(message, career=None, gpa=None, subject_grades=None, session_id=None):
+    """
+    Streaming variant of handle_chat
     
-    SIMILAR CAREERS:{similar_careers_info}
+    Yields:
+        Text chunks of the response as they arrive from OpenAI. If the API fails
+        before anything was sent, the rule-based fallback is yielded as one chunk.
+        An answer that breaks off mid-stream is saved to the history with
+        INTERRUPTED_MARKER; one abandoned by the client is not saved.
+    """
+    if subject_grades is None:
+        subject_grades = {}
     
-    IMPORTANT INSTRUCTIONS:
-    1. ONLY answer questions related to careers, education, universities, academic performance, and professional development.
-    2. If the user asks about topics outside this scope (sports, politics, entertainment, general knowledge, etc.), politely redirect them to career-related topics.
-    3. For off-topic questions, respond with: "I specialize in providing career advice for {career}, university recommendations, and information on related careers. If you have any questions related to those topics or if there's anything else I can assist you with, feel free to let me know!"
-    4. Be conversational and friendly, but stay strictly within your defined scope.
-    5. If the user asks about universities and you have university recommendations, share them.
-    6. If they ask about universities but you don't have their GPA, ask for it.
-    7. If they ask about their grades or academic performance, refer to their subject grades if available.
+    university_info, similar_careers_info, grades_info = build_chat_context(career, gpa, subject_grades)
     
-    Your primary purpose is to help users with career guidance and educational planning, not to be a general-purpose assistant.
-    """
+    chunks = []
+    interrupted = False
+    try:
+        messages = build_messages(message, career, gpa, university_info, similar_careers_info, grades_info, session_id)
+        response = stream_chat_completion(messages=messages, **CHAT_COMPLETION)
+        for delta in stream_completion_text(response):
+            chunks.append(delta)
+            yield delta
+    except Exception as e:
+        logger.warning("OpenAI API error while streaming: %s", e)
+        if not chunks:
+            # Fall back to rule-based responses
+            yield get_fallback_response(message, career, gpa, subject_grades, university_info, similar_careers_info, grades_info)
+            return
+        interrupted = True
     
-    # Build the conversation history for the API
-    messages = [{"role": "system", "content": system_message}]
+    # Update chat history
+    save_turn(session_id, message, "".join(chunks) + (INTERRUPTED_MARKER if interrupted else ""))
+
+def build_messages(message, career=None, gpa=None, university_info="", similar_careers_info="", grades_info="", session_id=None):
+    """Build the system prompt, recent history and current message for the API"""
+    with track_phase("prompt_build"):
+        return _build_messages(message, career, gpa, university_info, similar_careers_info, grades_info, session_id)
+
+def _build_messages(message, career, gpa, university_info, similar_careers_info, grades_info, session_id):
+    # Static instructions, then the user's context
+    messages = CHAT_PROMPT.messages(
+        role="system",
+        career=career or "Not specified",
+        gpa=gpa or "Not specified",
+        grades_info=grades_info.strip(),
+        university_info=university_info.strip() or "None available",
+        similar_careers_info=similar_careers_info.strip() or "None available"
+    )
     
-    # Add chat history (limited to last 5 exchanges to save tokens)
-    history = chat_histories.get(session_id, [])
-    for i in range(0, min(len(history), 10), 2):
-        if i/2 >= 5:  # Only include the last 5 exchanges
-            break
-        messages.append({"role": "user", "content": history[i]})
-        if i+1 < len(history):
-            messages.append({"role": "assistant", "content": history[i+1]})
+    # Add the most recent chat history that fits in the token budget
+    messages.extend(build_history_messages(session_turns(session_id)))
     
     # Add the current message
     messages.append({"role": "user", "content": message})
     
-    # Call the OpenAI API using the new format
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=messages,
-        temperature=0.7,
-        max_tokens=500
-    )
+    return messages
+
+def get_openai_response(message, career=None, gpa=None, subject_grades=None, university_info="", similar_careers_info="", grades_info="", session_id=None):
+    """Get response from OpenAI API"""
     
+    messages = build_messages(message, career, gpa, university_info, similar_careers_info, grades_info, session_id)
+    response = chat_completion(messages=messages, **CHAT_COMPLETION)
+    return response.choices[0].message.content
+
+async def aget_openai_response(message, career=None, gpa=None, subject_grades=None, university_info="", similar_careers_info="", grades_info="", session_id=None):
+    """get_openai_response awaiting the completion on the shared async client"""
+    # Loading the history and counting its tokens block, so they run in a thread
+    messages = await asyncio.to_thread(build_messages, message, career, gpa, university_info, similar_careers_info, grades_info, session_id)
+    response = await achat_completion(messages=messages, **CHAT_COMPLETION)
     return response.choices[0].message.content
 
 def get_fallback_response(message, career=None, gpa=None, subject_grades=None, university_info="", similar_careers_info="", grades_info=""):
@@ -161,7 +266,7 @@ def get_fallback_response(message, career=None, gpa=None, subject_grades=None, u
             return f"Here are university recommendations for a career in {career} with a GPA of {gpa}:{university_info}"
         elif gpa and career:
             try:
-                unis, _ = career_chatbot.recommend(float(gpa), career)
+                unis, _ = get_career_chatbot().recommend(float(gpa), career)
                 if unis:
                     response = f"Based on your GPA of {gpa} and interest in {career}, here are some university recommendations:\n\n"
                     for i, uni in enumerate(unis[:5], 1):
@@ -184,7 +289,7 @@ def get_fallback_response(message, career=None, gpa=None, subject_grades=None, u
             return f"Here are some career alternatives you might consider:{similar_careers_info}"
         elif career:
             try:
-                _, similar_careers = career_chatbot.recommend(70, career)  # Use a default GPA just to get similar careers
+                similar_careers = get_career_chatbot().similar_careers_for(career)
                 if similar_careers:
                     return f"Similar careers to {career} include: {', '.join(similar_careers[:5])}"
                 else:
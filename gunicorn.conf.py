@@ -0,0 +1,40 @@
+# Production gunicorn configuration: gunicorn -c gunicorn.conf.py app:app
+#
+# The app is imported once in the master (preload_app) with every resource loaded
+# eagerly, then the heap is frozen before workers fork. Workers share the model,
+# datasets and interpreter state copy-on-write instead of each loading their own.
+import gc
+import os
+
+# Load models and datasets at import so they live in the master before fork.
+# Must be set before the app is imported, which preload_app does right after this file.
+os.environ.setdefault("LAZY_STARTUP", "0")
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+# Threads let one worker keep several slow OpenAI calls in flight
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+preload_app = True
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "0"))
+
+
+def when_ready(server):
+    # Move everything loaded so far into the permanent generation. The collector
+    # then never writes to these objects' headers, so their pages stay shared.
+    gc.collect()
+    gc.freeze()
+    from startup import memory_usage
+    server.log.info(f"Master ready, frozen {gc.get_freeze_count()} objects, memory: {memory_usage()}")
+
+
+def post_fork(server, worker):
+    # Each worker opens its own HTTP connection pool to OpenAI
+    from llm import reset_client
+    reset_client()
+
+
+def post_worker_init(worker):
+    from startup import memory_usage
+    worker.log.info(f"Worker {worker.pid} booted, memory: {memory_usage()}")
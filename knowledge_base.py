@@ -0,0 +1,243 @@
+"""
+Precomputed career knowledge base.
+
+Career details, base roadmaps (no grade personalization) and subject
+requirements depend only on the career label, so they are generated offline
+for every career the service knows about and written to a versioned artifact:
+
+    python knowledge_base.py build [--concurrency 4] [--rpm 60] [--output PATH]
+
+The artifact is loaded once per process on first use; endpoints serve from it
+with a dict lookup and only call GPT on a miss.
+"""
+import argparse
+import gzip
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+from cache import normalize_text
+from startup import Lazy
+
+logger = logging.getLogger(__name__)
+
+# Bump when the artifact layout changes; old artifacts are then ignored
+KB_VERSION = 1
+
+_script_dir = os.path.dirname(os.path.abspath(__file__))
+CAREER_KB_PATH = os.getenv("CAREER_KB_PATH", os.path.join(_script_dir, "data", f"career_kb.v{KB_VERSION}.json.gz"))
+
+# Subjects the requirements prompt may choose from; the first seven have student scores
+KNOWN_SUBJECTS = [
+    "Mathematics", "Physics", "Chemistry", "Biology", "English", "Geography", "History",
+    "Computer Science", "Statistics", "Economics", "Art", "Business", "Social Studies",
+    "Communication", "Management", "Critical Thinking"
+]
+
+
+class KnowledgeBase:
+    """Read-only career lookups keyed on the normalized career name."""
+
+    def __init__(self, careers: Dict[str, Dict], version: Optional[int] = None, built_at: Optional[float] = None,
+                 path: Optional[str] = None):
+        self.careers = careers
+        self.version = version
+        self.built_at = built_at
+        self.path = path
+
+    def _entry(self, career: str) -> Optional[Dict]:
+        return self.careers.get(normalize_text(career)) if career else None
+
+    def details(self, career: str) -> Optional[Dict]:
+        """Cached get_career_details result, or None on a miss."""
+        entry = self._entry(career)
+        return dict(entry["details"]) if entry and entry.get("details") else None
+
+    def roadmap(self, career: str) -> Optional[Dict]:
+        """Base roadmap result (no grade personalization), or None on a miss."""
+        entry = self._entry(career)
+        return dict(entry["roadmap"]) if entry and entry.get("roadmap") else None
+
+    def requirements(self, career: str) -> Optional[List[str]]:
+        """Typical required subjects, or None on a miss."""
+        entry = self._entry(career)
+        return list(entry["requirements"]) if entry and entry.get("requirements") else None
+
+    def stats(self) -> Dict:
+        return {"version": self.version, "careers": len(self.careers), "built_at": self.built_at, "path": self.path}
+
+
+def load_knowledge_base(path: str = CAREER_KB_PATH) -> KnowledgeBase:
+    """Load the artifact at path; a missing or incompatible artifact gives an empty knowledge base."""
+    if not os.path.exists(path):
+        return KnowledgeBase({}, path=path)
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        artifact = json.load(f)
+    if artifact.get("version") != KB_VERSION:
+        logger.warning("Ignoring career knowledge base %s: version %s != %s", path, artifact.get("version"), KB_VERSION)
+        return KnowledgeBase({}, path=path)
+    return KnowledgeBase(artifact["careers"], artifact["version"], artifact.get("built_at"), path)
+
+
+_knowledge_base = Lazy(load_knowledge_base, "career_knowledge_base")
+
+
+def get_knowledge_base() -> KnowledgeBase:
+    """Return the process-wide knowledge base, loading it on first use."""
+    return _knowledge_base.get()
+
+
+# --- Offline build pipeline -------------------------------------------------
+
+def catalog_careers() -> List[str]:
+    """Every career label the service can be asked about: model classes plus the similar-careers dataset."""
+    import joblib
+    from datasets import similar_careers_map
+
+    model_dir = os.getenv("MODEL_DIR", os.path.join(_script_dir, "../recommender-models"))
+    label_encoder = joblib.load(os.path.join(model_dir, "label_encoder.pkl"))
+
+    careers = [str(c) for c in label_encoder.classes_]
+    for career, similar in similar_careers_map().items():
+        careers.append(career)
+        careers.extend(c.strip() for c in similar.split(",") if c.strip())
+
+    seen = set()
+    unique = []
+    for career in careers:
+        key = normalize_text(career)
+        if key not in seen:
+            seen.add(key)
+            unique.append(career)
+    return unique
+
+
+def _valid_details(result: Dict) -> bool:
+    if not result.get("success"):
+        return False
+    try:
+        data = json.loads(result["data"])
+    except (TypeError, ValueError):
+        return False
+    return isinstance(data, dict) and all(field in data for field in ("description", "skills", "work_life_balance"))
+
+
+def _valid_roadmap(result: Dict) -> bool:
+    from career_roadmap import REQUIRED_KEYS, FALLBACK_ROADMAP
+
+    if not result.get("success"):
+        return False
+    try:
+        data = json.loads(result["data"])
+    except (TypeError, ValueError):
+        return False
+    if data == FALLBACK_ROADMAP:
+        return False
+    return all(isinstance(data.get(key), list) and data[key] != ["Information not available"] for key in REQUIRED_KEYS)
+
+
+def generate_requirements(career: str) -> Optional[List[str]]:
+    """Ask GPT for the three school subjects most relevant to a career, restricted to KNOWN_SUBJECTS."""
+    from llm import chat_completion
+
+    response = chat_completion(
+        model="gpt-3.5-turbo",
+        messages=[
+            {"role": "system", "content": "You are a career counseling expert. Respond ONLY with valid JSON."},
+            {"role": "user", "content": (
+                f"Which three school subjects matter most for a career as a {career}? "
+                f"Choose only from: {', '.join(KNOWN_SUBJECTS)}. "
+                'Return JSON of the form {"subjects": ["subject1", "subject2", "subject3"]}, most important first.'
+            )}
+        ],
+        temperature=0,
+        max_tokens=60,
+        response_format={"type": "json_object"}
+    )
+    subjects = json.loads(response.choices[0].message.content).get("subjects", [])
+    subjects = [s for s in subjects if s in KNOWN_SUBJECTS]
+    return subjects[:3] if len(subjects) >= 2 else None
+
+
+def build_entry(career: str) -> Dict:
+    """Generate and validate every knowledge base section for one career; invalid sections are left out."""
+    from career_details import get_career_details
+    from career_roadmap import generate_career_roadmap
+
+    entry = {"name": career}
+
+    details = get_career_details(career, use_knowledge_base=False)
+    if _valid_details(details):
+        entry["details"] = details
+
+    roadmap = generate_career_roadmap(career, {}, None, use_knowledge_base=False)
+    if _valid_roadmap(roadmap):
+        entry["roadmap"] = roadmap
+
+    try:
+        requirements = generate_requirements(career)
+    except Exception as e:
+        logger.warning("Error generating requirements for %s: %s", career, e)
+        requirements = None
+    if requirements:
+        entry["requirements"] = requirements
+
+    return entry
+
+
+def build_knowledge_base(output: str, concurrency: int, rpm: float) -> int:
+    from rate_limit import RateLimiter
+
+    careers = catalog_careers()
+    print(f"📚 Building career knowledge base for {len(careers)} careers "
+          f"(concurrency {concurrency}, {rpm:g} careers/min)")
+
+    limiter = RateLimiter(rpm, per=60, burst=concurrency)
+
+    def build(career):
+        limiter.acquire()
+        return build_entry(career)
+
+    entries = {}
+    incomplete = 0
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {executor.submit(build, career): career for career in careers}
+        for done, future in enumerate(as_completed(futures), 1):
+            career = futures[future]
+            try:
+                entry = future.result()
+            except Exception as e:
+                print(f"❌ {career}: {str(e)}")
+                incomplete += 1
+                continue
+            if not all(section in entry for section in ("details", "roadmap", "requirements")):
+                incomplete += 1
+                print(f"⚠️ {career}: missing {', '.join(s for s in ('details', 'roadmap', 'requirements') if s not in entry)}")
+            entries[normalize_text(career)] = entry
+            if done % 10 == 0 or done == len(futures):
+                print(f"  {done}/{len(futures)} done ({time.monotonic() - started:.0f}s)")
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    artifact = {"version": KB_VERSION, "built_at": time.time(), "careers": entries}
+    tmp_path = output + ".tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        json.dump(artifact, f, separators=(",", ":"))
+    os.replace(tmp_path, output)
+
+    print(f"✅ Wrote {len(entries)} careers to {output} ({incomplete} incomplete)")
+    return 1 if incomplete else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--output", default=CAREER_KB_PATH)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rpm", type=float, default=20, help="Careers started per minute (each makes 3 completions)")
+    args = parser.parse_args()
+    sys.exit(build_knowledge_base(args.output, args.concurrency, args.rpm))
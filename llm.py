@@ -0,0 +1,215 @@
+import os
+import httpx
+from functools import partial
+from openai import OpenAI, AsyncOpenAI, RateLimitError
+from dotenv import load_dotenv
+from startup import Lazy
+from cache import collapse_whitespace, make_key
+from singleflight import SingleFlight
+from metrics import llm_in_flight, llm_requests, record_usage, track_phase
+from budget import budget_manager
+from resilience import CircuitBreaker, CircuitOpenError, ResiliencePolicy
+
+# Load environment variables and API key
+load_dotenv()
+
+# Connections the async client keeps open to OpenAI; bounds in-flight completions per process
+# (budget.DEFAULT_BUDGETS concurrency caps, where set, apply before this)
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "200"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "50"))
+
+# Seconds to open a connection and to wait for each read from OpenAI
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "3"))
+LLM_READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", "30"))
+
+def _timeout():
+    return httpx.Timeout(LLM_READ_TIMEOUT, connect=LLM_CONNECT_TIMEOUT)
+
+def _create_client():
+    # Retries are done by the resilience policy below, not by the SDK
+    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"), timeout=_timeout(), max_retries=0)
+
+def _create_async_client():
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS
+        ),
+        timeout=_timeout()
+    )
+    return AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), http_client=http_client, max_retries=0)
+
+# One OpenAI client (and HTTP connection pool) shared by every module in the process
+_client = Lazy(_create_client, "openai_client")
+
+# The async serving mode (asgi.py) shares one pooled async client per process the same way
+_async_client = Lazy(_create_async_client, "openai_async_client")
+
+# Identical completions requested concurrently share one upstream call
+completion_flight = SingleFlight("chat_completion")
+
+# Set LLM_SINGLE_FLIGHT=0 to send every completion on its own (e.g. when benchmarking upstream latency)
+LLM_SINGLE_FLIGHT = os.getenv("LLM_SINGLE_FLIGHT", "1") != "0"
+
+# Deadline, retries, hedging and the circuit breaker for every OpenAI call
+openai_breaker = CircuitBreaker("openai")
+completion_resilience = ResiliencePolicy(
+    openai_breaker, connect_timeout=LLM_CONNECT_TIMEOUT, read_timeout=LLM_READ_TIMEOUT
+)
+
+def completion_key(**kwargs):
+    """
+    Single-flight key for a completion: every argument except the timeout, with
+    whitespace-normalized prompts (case is kept: it can change the answer)
+    """
+    kwargs.pop("timeout", None)
+    messages = [
+        {"role": message["role"], "content": collapse_whitespace(message["content"])}
+        for message in kwargs.pop("messages", [])
+    ]
+    return make_key(messages, kwargs)
+
+def get_client():
+    """Return the process-wide OpenAI client, creating it on first use."""
+    return _client.get()
+
+def get_async_client():
+    """Return the process-wide AsyncOpenAI client, creating it on first use inside the event loop."""
+    return _async_client.get()
+
+def _failed(reservation, error):
+    llm_requests.inc(model=reservation.model, outcome="error")
+    if isinstance(error, RateLimitError):
+        budget_manager.throttled(reservation)
+
+def _send(reservation, **kwargs):
+    """One upstream attempt, counted in the llm_* metrics."""
+    model = reservation.model
+    try:
+        with llm_in_flight.track(model=model):
+            with track_phase("llm_wait"):
+                response = get_client().chat.completions.create(**kwargs)
+    except Exception as e:
+        _failed(reservation, e)
+        raise
+    llm_requests.inc(model=model, outcome="ok")
+    record_usage(model, getattr(response, "usage", None))
+    return response
+
+async def _asend(reservation, **kwargs):
+    model = reservation.model
+    try:
+        with llm_in_flight.track(model=model):
+            with track_phase("llm_wait"):
+                response = await get_async_client().chat.completions.create(**kwargs)
+    except Exception as e:
+        _failed(reservation, e)
+        raise
+    llm_requests.inc(model=model, outcome="ok")
+    record_usage(model, getattr(response, "usage", None))
+    return response
+
+def _create(allow_downgrade=True, **kwargs):
+    """
+    One logical completion: the model's budget is reserved once, then the
+    attempts (retries and hedges) are sent under the resilience policy
+    (coalesced callers are not counted again)
+
+    Raises:
+        BudgetExceeded: without calling the provider, when no model has budget left
+    """
+    reservation = budget_manager.reserve(kwargs, allow_downgrade)
+    try:
+        response = completion_resilience.call(partial(_send, reservation), **kwargs)
+    except CircuitOpenError:
+        budget_manager.cancel(reservation)
+        raise
+    except BaseException:
+        budget_manager.release(reservation)
+        raise
+    budget_manager.release(reservation, getattr(response, "usage", None))
+    return response
+
+async def _acreate(allow_downgrade=True, **kwargs):
+    reservation = budget_manager.reserve(kwargs, allow_downgrade)
+    try:
+        response = await completion_resilience.acall(partial(_asend, reservation), **kwargs)
+    except CircuitOpenError:
+        budget_manager.cancel(reservation)
+        raise
+    except BaseException:
+        budget_manager.release(reservation)
+        raise
+    budget_manager.release(reservation, getattr(response, "usage", None))
+    return response
+
+def chat_completion(allow_downgrade=True, **kwargs):
+    """
+    client.chat.completions.create for non-streaming calls, coalesced with any
+    identical completion already in flight in this process
+
+    Args:
+        allow_downgrade: Let the budget move the call to a cheaper model; pass
+            False when the result is cached under the requested model
+
+    Raises:
+        CircuitOpenError: without calling the provider, while it is considered down
+    """
+    if not LLM_SINGLE_FLIGHT:
+        return _create(allow_downgrade, **kwargs)
+    key = completion_key(allow_downgrade=allow_downgrade, **kwargs)
+    return completion_flight.do(key, _create, allow_downgrade, **kwargs)
+
+async def achat_completion(allow_downgrade=True, **kwargs):
+    """Async chat_completion on the shared async client."""
+    if not LLM_SINGLE_FLIGHT:
+        return await _acreate(allow_downgrade, **kwargs)
+    key = completion_key(allow_downgrade=allow_downgrade, **kwargs)
+    return await completion_flight.ado(key, _acreate, allow_downgrade, **kwargs)
+
+def stream_chat_completion(allow_downgrade=True, **kwargs):
+    """
+    client.chat.completions.create(stream=True), counted like chat_completion
+
+    Yields the response's chunks; llm_wait covers the wait for the response to
+    start. Streamed responses carry no usage block, so no tokens are counted
+    and the budget keeps the full token reservation. Only opening the stream
+    is retried; a failure after chunks were yielded is raised to the caller.
+    When the consumer stops early (e.g. the SSE client disconnected) the
+    upstream response is closed at once and counted as abandoned.
+    """
+    reservation = budget_manager.reserve(kwargs, allow_downgrade)
+    model = reservation.model
+    stream = None
+    try:
+        with llm_in_flight.track(model=model):
+            with track_phase("llm_wait"):
+                stream = completion_resilience.call(get_client().chat.completions.create, stream=True, **kwargs)
+            yield from stream
+    except CircuitOpenError:
+        budget_manager.cancel(reservation)
+        raise
+    except GeneratorExit:
+        llm_requests.inc(model=model, outcome="abandoned")
+        budget_manager.release(reservation)
+        raise
+    except Exception as e:
+        _failed(reservation, e)
+        budget_manager.release(reservation)
+        raise
+    finally:
+        if stream is not None:
+            stream.close()
+    budget_manager.release(reservation)
+    llm_requests.inc(model=model, outcome="ok")
+
+def reset_client():
+    """Forget the clients so a forked worker opens its own connection pools."""
+    _client.reset()
+    _async_client.reset()
+
+async def aclose_async_client():
+    """Close the async client's connection pool (on ASGI shutdown)."""
+    if _async_client.loaded:
+        await _async_client.get().close()
+        _async_client.reset()
@@ -0,0 +1,91 @@
+"""
+Leveled, structured and sampled logging for the service.
+
+configure_logging() installs one stderr handler on the root logger. Records
+are formatted as JSON lines or key=value pairs and can carry extra fields
+(logger.info("...", extra={"career": career})). LOG_SAMPLE_RATE keeps only a
+share of INFO and DEBUG records so per-request logging stays cheap under load;
+warnings and errors are never dropped.
+"""
+import json
+import logging
+import os
+import random
+import sys
+import time
+
+# Minimum level logged (DEBUG, INFO, WARNING, ...)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+# "json" for one JSON object per line, "kv" for key=value pairs
+LOG_FORMAT = os.getenv("LOG_FORMAT", "kv")
+
+# Share of INFO/DEBUG records kept (1.0 keeps all)
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+
+# Client libraries that log every HTTP request at INFO; kept at WARNING unless LOG_LEVEL is DEBUG
+QUIET_LOGGERS = ("httpx", "httpcore", "openai")
+
+# Attributes every LogRecord has; anything else came from extra={...}
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+def _extra_fields(record):
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_FIELDS}
+
+
+class SamplingFilter(logging.Filter):
+    """Keep `rate` of the records below WARNING, all records from WARNING up."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or self.rate >= 1.0 or random.random() < self.rate
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage(),
+            **_extra_fields(record)
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class KeyValueFormatter(logging.Formatter):
+    def format(self, record):
+        fields = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage(),
+            **_extra_fields(record)
+        }
+        line = " ".join(f"{key}={json.dumps(value, default=str)}" for key, value in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+def configure_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT, sample_rate: float = LOG_SAMPLE_RATE):
+    """Route all loggers through one sampled, structured stderr handler (idempotent)."""
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if getattr(handler, "_recommender", False):
+            root.removeHandler(handler)
+
+    handler = logging.StreamHandler(sys.stderr)
+    handler._recommender = True
+    handler.setFormatter(JSONFormatter() if fmt == "json" else KeyValueFormatter())
+    handler.addFilter(SamplingFilter(sample_rate))
+    root.addHandler(handler)
+    root.setLevel(level)
+    for name in QUIET_LOGGERS:
+        logging.getLogger(name).setLevel(logging.DEBUG if level == "DEBUG" else logging.WARNING)
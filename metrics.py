@@ -0,0 +1,273 @@
+"""
+In-process metrics with Prometheus text exposition.
+
+Counters, gauges and histograms live in one registry per process and are
+rendered by render() for the /metrics endpoint. Every gunicorn or uvicorn
+worker keeps and reports its own values (process_info names the pid), so
+aggregate across workers with sum() on the Prometheus side.
+
+Instrumented here:
+    http_request_duration_seconds / http_requests_total / http_requests_in_flight
+    phase_duration_seconds   scale, predict, decode, prompt_build, llm_wait, json_parse, json_repair
+    llm_requests_total / llm_tokens_total / llm_requests_in_flight, from response.usage
+    prompt_suffix_tokens / prompt_prefix_tokens, per prompt template (prompts.py)
+plus any collector registered with register_collector (cache and coalescing stats).
+"""
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Latency buckets (seconds) spanning in-process work through slow completions
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0
+)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in items
+        ]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track(self, **labels):
+        """Count the wrapped block as in flight."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in items
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [bucket counts..., sum, count]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            if index < len(self.buckets):
+                state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall time of the wrapped block."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(state)) for key, state in self._values.items()]
+        lines = self.header()
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                le = 'le="%s"' % _format_value(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {state[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {state[-1]}")
+        return lines
+
+
+_metrics: List[_Metric] = []
+_collectors: List[Callable[[], Iterable[Tuple[str, str, str, Dict[str, str], float]]]] = []
+
+
+def _register(metric):
+    _metrics.append(metric)
+    return metric
+
+
+def counter(name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+    return _register(Counter(name, help, labels))
+
+
+def gauge(name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+    return _register(Gauge(name, help, labels))
+
+
+def histogram(name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    return _register(Histogram(name, help, labels, buckets))
+
+
+def register_collector(collect: Callable[[], Iterable[Tuple[str, str, str, Dict[str, str], float]]]):
+    """
+    Add a callback sampled on every render
+
+    collect() yields (name, kind, help, labels, value) tuples, for values that
+    are already counted elsewhere (e.g. cache statistics).
+    """
+    _collectors.append(collect)
+
+
+def render() -> str:
+    """All metrics of this process in Prometheus text format."""
+    lines = [
+        "# HELP process_info Worker process that produced these samples",
+        "# TYPE process_info gauge",
+        f'process_info{{pid="{os.getpid()}"}} 1'
+    ]
+    for metric in _metrics:
+        lines.extend(metric.render())
+
+    # Samples of one metric must be contiguous, even when several collectors report it
+    families: Dict[str, List] = {}
+    for collect in _collectors:
+        try:
+            samples = list(collect())
+        except Exception:
+            continue
+        for name, kind, help, labels, value in samples:
+            family = families.setdefault(name, [f"# HELP {name} {help}", f"# TYPE {name} {kind}"])
+            family.append(f"{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}")
+    for family in families.values():
+        lines.extend(family)
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# --- Shared instruments -----------------------------------------------------
+
+http_request_duration = histogram(
+    "http_request_duration_seconds", "Time to produce a response, by route", ("route", "method")
+)
+http_requests = counter("http_requests_total", "Responses sent, by route and status", ("route", "method", "status"))
+http_in_flight = gauge("http_requests_in_flight", "Requests being handled, by route", ("route",))
+
+phase_duration = histogram("phase_duration_seconds", "Time spent in each hot-path phase", ("phase",))
+
+llm_requests = counter("llm_requests_total", "Upstream completions, by model and outcome", ("model", "outcome"))
+llm_tokens = counter("llm_tokens_total", "Tokens reported in response.usage, by model and kind", ("model", "kind"))
+llm_in_flight = gauge("llm_requests_in_flight", "Upstream completions awaiting a response, by model", ("model",))
+
+
+def track_phase(name: str):
+    """Time the wrapped block as one hot-path phase."""
+    return phase_duration.time(phase=name)
+
+
+def record_usage(model: str, usage) -> None:
+    """Count the prompt and completion tokens of a response's usage block."""
+    if usage is None:
+        return
+    llm_tokens.inc(getattr(usage, "prompt_tokens", 0) or 0, model=model, kind="prompt")
+    llm_tokens.inc(getattr(usage, "completion_tokens", 0) or 0, model=model, kind="completion")
+
+
+def cache_collector(name: str, stats: Callable[[], Dict]):
+    """Collector exposing a TTLCache-style stats() dict as cache_* series."""
+    def collect():
+        values = stats()
+        labels = {"cache": name}
+        yield "cache_hits_total", "counter", "Cache lookups that found an entry", labels, values.get("hits", 0)
+        yield "cache_misses_total", "counter", "Cache lookups that found nothing", labels, values.get("misses", 0)
+        yield "cache_hit_ratio", "gauge", "Share of cache lookups that were hits", labels, values.get("hit_rate", 0.0)
+        yield "cache_entries", "gauge", "Entries held in memory", labels, values.get("size", 0)
+    return collect
+
+
+def flight_collector(flight):
+    """Collector exposing a SingleFlight's counters as single_flight_* series."""
+    def collect():
+        values = flight.stats()
+        labels = {"flight": values["name"]}
+        yield "single_flight_calls_total", "counter", "Calls made through the coalescing layer", labels, values["calls"]
+        yield "single_flight_coalesced_total", "counter", "Calls that shared an in-flight call's result", labels, values["coalesced"]
+        yield "single_flight_in_flight", "gauge", "Distinct calls currently running", labels, values["in_flight"]
+    return collect
@@ -0,0 +1,134 @@
+import json
+import threading
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from metrics import track_phase
+
+# Objectives whose booster output is class probabilities, which is what the top-k paths return
+PROBABILITY_OBJECTIVES = ("multi:softprob", "binary:logistic")
+
+
+def _iteration_range(model):
+    """Mirror the tree range XGBClassifier.predict uses (honours early stopping)."""
+    try:
+        best_iteration = model.best_iteration
+    except AttributeError:
+        return (0, 0)
+    if best_iteration is None:
+        return (0, 0)
+    return (0, int(best_iteration) + 1)
+
+
+def _objective(booster) -> str:
+    return json.loads(booster.save_config())["learner"]["objective"]["name"]
+
+
+class CareerPredictor:
+    """
+    Precompiled inference path built once from the loaded scaler, model and label encoder.
+
+    Skips the per-request DataFrame construction by applying the StandardScaler
+    mean/scale directly, calling the XGBoost booster on raw arrays and decoding
+    labels through a precomputed class array.
+
+    Raises:
+        ValueError: when the booster's objective does not output probabilities
+            (e.g. multi:softmax, which returns labels)
+    """
+
+    def __init__(self, model, scaler, label_encoder, feature_names: Sequence[str]):
+        self.feature_names = list(feature_names)
+        n_features = len(self.feature_names)
+
+        # StandardScaler parameters; None means the step was disabled at fit time
+        mean = getattr(scaler, "mean_", None) if getattr(scaler, "with_mean", True) else None
+        scale = getattr(scaler, "scale_", None) if getattr(scaler, "with_std", True) else None
+        self._mean = np.ascontiguousarray(mean, dtype=np.float64) if mean is not None else None
+        self._scale = np.ascontiguousarray(scale, dtype=np.float64) if scale is not None else None
+
+        self._model = model
+        try:
+            self._booster = model.get_booster()
+        except AttributeError:
+            self._booster = None
+        if self._booster is not None:
+            objective = _objective(self._booster)
+            if objective not in PROBABILITY_OBJECTIVES:
+                raise ValueError(
+                    f"CareerPredictor needs a model trained with {' or '.join(PROBABILITY_OBJECTIVES)}, "
+                    f"not {objective}"
+                )
+        self._iteration_range = _iteration_range(model)
+
+        self.classes = np.asarray(label_encoder.classes_)
+
+        # Per-thread preallocated buffers for the single-row path. The scaler math
+        # runs in float64 like sklearn does, and the booster receives float32 just
+        # as XGBoost would convert it internally, so outputs match the old path.
+        self._local = threading.local()
+        self._n_features = n_features
+
+    def _buffers(self):
+        local = self._local
+        if not hasattr(local, "row"):
+            local.row = np.empty((1, self._n_features), dtype=np.float64)
+            local.row32 = np.empty((1, self._n_features), dtype=np.float32)
+        return local.row, local.row32
+
+    def _scale_inplace(self, X: np.ndarray) -> np.ndarray:
+        if self._mean is not None:
+            X -= self._mean
+        if self._scale is not None:
+            X /= self._scale
+        return X
+
+    def _predict_raw(self, X32: np.ndarray) -> np.ndarray:
+        if self._booster is not None:
+            return self._booster.inplace_predict(X32, iteration_range=self._iteration_range)
+        return self._model.predict_proba(X32)
+
+    def _proba_from_raw(self, raw: np.ndarray) -> np.ndarray:
+        # Binary objectives return P(class 1) only; expand to both columns
+        if raw.ndim > 1 and raw.shape[1] > 1:
+            return raw
+        raw = raw.reshape(-1)
+        return np.column_stack([1.0 - raw, raw])
+
+    def _top_k(self, proba_row: np.ndarray, k: int) -> List[Tuple[str, float]]:
+        # Stable sort so ties resolve to the lowest label, like argmax does
+        top = np.argsort(-proba_row, kind="stable")[:max(1, k)]
+        return [(str(self.classes[i]), float(proba_row[i])) for i in top]
+
+    def predict_batch_top_k(self, X: np.ndarray, k: int = 3) -> List[List[Tuple[str, float]]]:
+        """
+        Predict the top-k careers with probabilities for every row of X (scaled in place).
+
+        The first entry of each list is the career XGBClassifier.predict returns.
+        """
+        with track_phase("scale"):
+            X32 = np.asarray(self._scale_inplace(X), dtype=np.float32)
+        with track_phase("predict"):
+            raw = self._predict_raw(X32)
+        with track_phase("decode"):
+            proba = self._proba_from_raw(raw)
+            return [self._top_k(row, k) for row in proba]
+
+    def predict_one_top_k(self, values: Sequence[float], k: int = 3) -> List[Tuple[str, float]]:
+        """
+        Predict the top-k careers with probabilities for a single row, in one forward pass.
+
+        Returns:
+            A list of (career, probability) tuples sorted by descending probability
+        """
+        row, row32 = self._buffers()
+        with track_phase("scale"):
+            row[0, :] = values
+            self._scale_inplace(row)
+            row32[0, :] = row[0, :]
+        with track_phase("predict"):
+            raw = self._predict_raw(row32)
+        with track_phase("decode"):
+            proba = self._proba_from_raw(raw)
+            return self._top_k(proba[0], k)
@@ -0,0 +1,91 @@
+"""
+Offline job that fills the university summary cache ahead of serving time.
+
+Walks every distinct university in career_university_dataset.csv and generates
+its summary with bounded concurrency and a requests-per-minute cap, skipping
+universities that are already cached. At serving time summaries can then be
+read with UniversitySummaryGenerator.generate_summary(..., cache_only=True).
+
+The summaries are written to UNIVERSITY_SUMMARY_CACHE_PATH. The image does not
+ship them (.dockerignore drops *.sqlite3), so in production run the job on the
+machine that serves them, against its /data volume (see fly.toml):
+
+    fly volumes create recommender_data --size 1   # once, before the first deploy
+    fly ssh console -C "python /app/pregenerate_university_summaries.py"
+
+Usage:
+    python pregenerate_university_summaries.py [--concurrency 4] [--rpm 60] [--limit N] [--force]
+"""
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from datasets import load_table
+from rate_limit import RateLimiter
+from university_summaries import (
+    university_summary_generator, university_summary_cache, university_summary_cache_key
+)
+
+
+def distinct_universities():
+    table = load_table("universities")
+    seen = set()
+    names = []
+    for name in table["University_Name"].take(slice(None)):
+        if name and name not in seen:
+            seen.add(name)
+            names.append(name)
+    return names
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=4, help="Completions in flight at once")
+    parser.add_argument("--rpm", type=float, default=60, help="Maximum completions started per minute")
+    parser.add_argument("--limit", type=int, default=None, help="Only process the first N universities")
+    parser.add_argument("--force", action="store_true", help="Regenerate summaries that are already cached")
+    args = parser.parse_args()
+
+    universities = distinct_universities()[:args.limit]
+    if not args.force:
+        universities = [
+            name for name in universities
+            if university_summary_generator.get_cached_summary(name) is None
+        ]
+    else:
+        for name in universities:
+            university_summary_cache.delete(university_summary_cache_key(name))
+    print(f"📚 Generating {len(universities)} university summaries "
+          f"(concurrency {args.concurrency}, {args.rpm:g} requests/min)")
+
+    limiter = RateLimiter(args.rpm, per=60, burst=args.concurrency)
+
+    def generate(name):
+        limiter.acquire()
+        university_summary_generator.generate_summary(name)
+        # A cache entry only exists if the summary was generated and validated
+        return university_summary_generator.get_cached_summary(name) is not None
+
+    started = time.monotonic()
+    succeeded = failed = 0
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        futures = {executor.submit(generate, name): name for name in universities}
+        for done, future in enumerate(as_completed(futures), 1):
+            name = futures[future]
+            try:
+                ok = future.result()
+            except Exception as e:
+                print(f"❌ {name}: {str(e)}")
+                ok = False
+            succeeded += ok
+            failed += not ok
+            if done % 25 == 0 or done == len(futures):
+                print(f"  {done}/{len(futures)} done ({failed} failed, {time.monotonic() - started:.0f}s)")
+
+    print(f"✅ Cached {succeeded} summaries, {failed} failed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+Prompt templates with a byte-stable static prefix and a compact dynamic suffix.
+
+A PromptTemplate pairs fixed instructions with a format string for the
+per-request data (user profile, universities, careers to analyze). The
+instructions are sent as the first system message and are identical on every
+call, so the provider can reuse its cached prefix and single-flight keys stay
+stable; only the short suffix after it changes.
+
+Templates are compiled once, when their module is imported: indentation and
+runs of blank lines are removed from both parts and the suffix's fields are
+checked up front. The prefix's token count is measured once per template and
+the suffix's on every render; both are reported as prompt_* metrics and by
+template_stats().
+"""
+import threading
+from functools import cached_property
+from string import Formatter
+from typing import Dict, List
+
+from context_builder import count_tokens
+from metrics import histogram
+
+# Token-count buckets for rendered suffixes
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096)
+
+suffix_tokens = histogram(
+    "prompt_suffix_tokens", "Tokens in the dynamic part of rendered prompts, by template", ("template",), TOKEN_BUCKETS
+)
+
+# Every compiled template, by name
+_templates: Dict[str, "PromptTemplate"] = {}
+
+
+def compact(text: str) -> str:
+    """Strip every line's indentation and trailing spaces and collapse blank-line runs."""
+    lines = []
+    for line in text.strip().splitlines():
+        line = line.strip()
+        if line or (lines and lines[-1]):
+            lines.append(line)
+    return "\n".join(lines)
+
+
+class PromptTemplate:
+    """
+    Static instructions plus a str.format suffix for one kind of completion
+
+    Args:
+        name: Label for metrics and stats; must be unique
+        instructions: The static prefix, sent unchanged as the system message
+        suffix: Format string for the per-request part
+        model: Model whose tokenizer is used for the counts
+    """
+
+    def __init__(self, name: str, instructions: str, suffix: str, model: str = "gpt-3.5-turbo"):
+        if name in _templates:
+            raise ValueError(f"Prompt template {name!r} is already defined")
+        self.name = name
+        self.model = model
+        self.instructions = compact(instructions)
+        self.suffix = compact(suffix)
+        self.fields = frozenset(field for _, field, _, _ in Formatter().parse(self.suffix) if field)
+        self.prefix = {"role": "system", "content": self.instructions}
+        self.renders = 0
+        self.suffix_tokens = 0
+        self._lock = threading.Lock()
+        _templates[name] = self
+
+    @cached_property
+    def prefix_tokens(self) -> int:
+        return count_tokens(self.instructions, self.model)
+
+    def render(self, **values) -> str:
+        """
+        The dynamic suffix for one request
+
+        Raises:
+            KeyError: when a field of the suffix has no value
+        """
+        missing = self.fields - values.keys()
+        if missing:
+            raise KeyError(f"Prompt template {self.name!r} is missing {', '.join(sorted(missing))}")
+        text = self.suffix.format_map(values).strip()
+        tokens = count_tokens(text, self.model)
+        suffix_tokens.observe(tokens, template=self.name)
+        with self._lock:
+            self.renders += 1
+            self.suffix_tokens += tokens
+        return text
+
+    def messages(self, role: str = "user", **values) -> List[Dict[str, str]]:
+        """The static prefix followed by the rendered suffix as a role message."""
+        return [dict(self.prefix), {"role": role, "content": self.render(**values)}]
+
+    def stats(self) -> Dict:
+        return {
+            "prefix_tokens": self.prefix_tokens,
+            "renders": self.renders,
+            "avg_suffix_tokens": round(self.suffix_tokens / self.renders, 1) if self.renders else 0.0,
+        }
+
+
+def template_stats() -> Dict[str, Dict]:
+    """Prefix and average suffix token counts of every template."""
+    return {name: template.stats() for name, template in _templates.items()}
+
+
+def prompt_collector():
+    """Collector exposing each template's static prefix size as prompt_prefix_tokens."""
+    def collect():
+        for name, template in _templates.items():
+            yield "prompt_prefix_tokens", "gauge", "Tokens in the static prefix of each prompt template", \
+                {"template": name}, template.prefix_tokens
+    return collect
@@ -0,0 +1,54 @@
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Blocking token-bucket limiter: at most `rate` acquisitions per `per` seconds,
+    with bursts of up to `burst` (defaults to rate).
+    """
+
+    def __init__(self, rate: float, per: float = 60.0, burst: float = None):
+        self.rate = rate
+        self.per = per
+        self.capacity = burst if burst is not None else rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate / self.per)
+        self._updated = now
+
+    def try_acquire(self, amount: float = 1.0, keep: float = 0.0) -> bool:
+        """Take amount tokens if that leaves at least keep tokens in the bucket right now."""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens - amount >= keep:
+                self._tokens -= amount
+                return True
+            return False
+
+    def consume(self, amount: float):
+        """Take amount tokens unconditionally (the bucket may go into debt); a negative amount returns tokens."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self.capacity, self._tokens - amount)
+
+    def available(self) -> float:
+        """Tokens that could be taken right now."""
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+    def acquire(self, amount: float = 1.0):
+        """Wait until amount tokens are available, then take them."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                wait = (amount - self._tokens) * self.per / self.rate
+            time.sleep(wait)
@@ -0,0 +1,267 @@
+"""
+Retries, hedging and a circuit breaker for upstream LLM calls.
+
+ResiliencePolicy.call runs a completion function under:
+    - a per-call deadline (LLM_CALL_DEADLINE) that also caps each attempt's
+      connect and read timeouts, so a caller never waits longer than the
+      deadline and a dead host still fails after the connect timeout;
+    - retries of transient failures (connection errors, timeouts, 429, 5xx)
+      with capped exponential backoff and full jitter;
+    - optional hedging: when an attempt has not answered after
+      LLM_HEDGE_AFTER seconds a second identical request is sent and the first
+      answer wins (a losing sync attempt cannot be cancelled and runs to its end);
+    - a circuit breaker: after LLM_BREAKER_FAILURES consecutive transient
+      failures calls fail immediately with CircuitOpenError for
+      LLM_BREAKER_RESET seconds, then a single probe decides whether to close.
+
+Callers keep their existing except branches, which serve the rule-based
+fallbacks; while the breaker is open they are reached without any network
+wait.
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import httpx
+from openai import APIConnectionError, InternalServerError, RateLimitError
+
+from metrics import counter, gauge
+
+# Transient failures worth another attempt (APITimeoutError is an APIConnectionError)
+RETRYABLE_ERRORS = (APIConnectionError, RateLimitError, InternalServerError)
+
+# Retries after the first attempt, and the backoff before each (seconds, before jitter)
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "8"))
+
+# Seconds a caller may wait for one completion, retries and backoff included
+LLM_CALL_DEADLINE = float(os.getenv("LLM_CALL_DEADLINE", "45"))
+
+# Send a duplicate request when an attempt is slower than this many seconds (0 disables hedging)
+LLM_HEDGE_AFTER = float(os.getenv("LLM_HEDGE_AFTER", "0"))
+
+# Consecutive transient failures that open the breaker, and seconds it stays open
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_RESET = float(os.getenv("LLM_BREAKER_RESET", "30"))
+
+retries = counter("llm_retries_total", "Completion attempts retried, by error", ("error",))
+hedges = counter("llm_hedges_total", "Hedged completion requests, by which attempt answered", ("winner",))
+breaker_state = gauge("circuit_breaker_state", "0 closed, 1 half-open, 2 open", ("breaker",))
+breaker_rejections = counter("circuit_breaker_rejections_total", "Calls failed fast by an open breaker", ("breaker",))
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """The upstream is considered down; use the local fallback."""
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = LLM_BREAKER_FAILURES,
+                 reset_timeout: float = LLM_BREAKER_RESET):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+        breaker_state.set(0, breaker=name)
+
+    def _set_state(self, state: str):
+        self.state = state
+        breaker_state.set(_STATE_VALUES[state], breaker=self.name)
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now; after the reset timeout one probe is let through."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self._set_state(HALF_OPEN)
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            if self.state != CLOSED:
+                self._set_state(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                self._set_state(OPEN)
+
+    def release(self):
+        """The call ended without telling us anything about the upstream; let the next call probe."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._set_state(OPEN)
+
+    def stats(self) -> Dict:
+        return {"name": self.name, "state": self.state, "consecutive_failures": self.failures}
+
+
+def backoff_delay(attempt: int, base: float = LLM_BACKOFF_BASE, cap: float = LLM_BACKOFF_MAX) -> float:
+    """Full-jitter exponential backoff before retry number attempt + 1."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class ResiliencePolicy:
+    """Deadline, retries, hedging and circuit breaking around one upstream."""
+
+    def __init__(self, breaker: CircuitBreaker, max_retries: int = LLM_MAX_RETRIES,
+                 deadline: float = LLM_CALL_DEADLINE, hedge_after: float = LLM_HEDGE_AFTER,
+                 connect_timeout: Optional[float] = None, read_timeout: Optional[float] = None):
+        self.breaker = breaker
+        self.max_retries = max_retries
+        self.deadline = deadline
+        self.hedge_after = hedge_after
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self._hedge_executor = None
+        self._executor_lock = threading.Lock()
+
+    def _admit(self):
+        if not self.breaker.allow():
+            breaker_rejections.inc(breaker=self.breaker.name)
+            raise CircuitOpenError(f"{self.breaker.name} circuit is open")
+
+    def attempt_timeout(self, remaining: float, timeout: Optional[float] = None) -> httpx.Timeout:
+        """
+        Connect and read timeouts for one attempt: the configured ones (or the
+        caller's timeout, if shorter), never longer than what is left of the deadline
+        """
+        read = min(t for t in (timeout, self.read_timeout, remaining) if t is not None)
+        connect = read if self.connect_timeout is None else min(self.connect_timeout, read)
+        return httpx.Timeout(read, connect=connect)
+
+    def _attempt_kwargs(self, kwargs: Dict, started: float) -> Dict:
+        # Each attempt may only use what is left of the call's deadline
+        remaining = max(0.0, self.deadline - (time.monotonic() - started))
+        return {**kwargs, "timeout": self.attempt_timeout(remaining, kwargs.get("timeout"))}
+
+    def _retry_delay(self, attempt: int, started: float, error: Exception):
+        """Backoff before the next attempt, or None when the call should give up."""
+        if attempt >= self.max_retries or not self.breaker.allow():
+            return None
+        delay = backoff_delay(attempt)
+        if time.monotonic() - started + delay >= self.deadline:
+            return None
+        retries.inc(error=type(error).__name__)
+        return delay
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-hedge")
+            return self._hedge_executor
+
+    def _hedged(self, fn: Callable[..., Any], kwargs: Dict) -> Any:
+        """
+        fn with a duplicate attempt after hedge_after seconds; the first success wins
+
+        A blocking HTTP call cannot be cancelled, so the losing attempt keeps
+        running (and holding its connection) in the background until it ends.
+        Both attempts share the caller's single budget reservation; the
+        loser's tokens are not settled against it.
+        """
+        executor = self._executor()
+        first = executor.submit(fn, **kwargs)
+        done, _ = wait([first], timeout=self.hedge_after)
+        if done:
+            return first.result()
+        futures = [first, executor.submit(fn, **kwargs)]
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    hedges.inc(winner="first" if future is first else "hedge")
+                    return future.result()
+        raise first.exception()
+
+    async def _ahedged(self, fn: Callable[..., Awaitable[Any]], kwargs: Dict) -> Any:
+        first = asyncio.ensure_future(fn(**kwargs))
+        done, _ = await asyncio.wait([first], timeout=self.hedge_after)
+        if done:
+            return first.result()
+        tasks = [first, asyncio.ensure_future(fn(**kwargs))]
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        hedges.inc(winner="first" if task is first else "hedge")
+                        return task.result()
+            raise first.exception()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def call(self, fn: Callable[..., Any], **kwargs) -> Any:
+        """
+        fn(**kwargs) with retries, hedging and the breaker
+
+        Raises:
+            CircuitOpenError: immediately, while the breaker is open
+        """
+        self._admit()
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt_kwargs = self._attempt_kwargs(kwargs, started)
+            try:
+                if self.hedge_after > 0:
+                    result = self._hedged(fn, attempt_kwargs)
+                else:
+                    result = fn(**attempt_kwargs)
+            except RETRYABLE_ERRORS as e:
+                self.breaker.record_failure()
+                delay = self._retry_delay(attempt, started, e)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                continue
+            except BaseException:
+                self.breaker.release()
+                raise
+            self.breaker.record_success()
+            return result
+
+    async def acall(self, fn: Callable[..., Awaitable[Any]], **kwargs) -> Any:
+        """Async call for coroutine functions."""
+        self._admit()
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt_kwargs = self._attempt_kwargs(kwargs, started)
+            try:
+                if self.hedge_after > 0:
+                    result = await self._ahedged(fn, attempt_kwargs)
+                else:
+                    result = await fn(**attempt_kwargs)
+            except RETRYABLE_ERRORS as e:
+                self.breaker.record_failure()
+                delay = self._retry_delay(attempt, started, e)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            except BaseException:
+                self.breaker.release()
+                raise
+            self.breaker.record_success()
+            return result
@@ -0,0 +1,259 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+# A turn is one (user message, assistant response) exchange
+Turn = Tuple[str, str]
+
+
+def _turn_size(message: str, response: str) -> int:
+    return len(message.encode("utf-8")) + len(response.encode("utf-8"))
+
+
+class InMemorySessionStore:
+    """
+    Per-process chat history with hard caps and idle eviction.
+
+    Sessions are kept in least-recently-used order. Appending a turn drops the
+    oldest turns beyond max_turns, sessions idle for longer than idle_ttl seconds,
+    and the least recently used sessions while over max_sessions or max_bytes.
+    """
+
+    def __init__(self, max_sessions: int = 1000, max_turns: int = 20, idle_ttl: Optional[float] = 3600,
+                 max_bytes: Optional[int] = None):
+        self.max_sessions = max_sessions
+        self.max_turns = max_turns
+        self.idle_ttl = idle_ttl
+        self.max_bytes = max_bytes
+        # session_id -> (last_access, [turns], size in bytes)
+        self._sessions: "OrderedDict[str, list]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def _drop(self, session_id: str):
+        _, _, size = self._sessions.pop(session_id)
+        self._bytes -= size
+        self.evictions += 1
+
+    def _evict(self, now: float):
+        if self.idle_ttl:
+            while self._sessions:
+                session_id, (last_access, _, _) = next(iter(self._sessions.items()))
+                if now - last_access <= self.idle_ttl:
+                    break
+                self._drop(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._drop(next(iter(self._sessions)))
+        while self.max_bytes and self._bytes > self.max_bytes and len(self._sessions) > 1:
+            self._drop(next(iter(self._sessions)))
+
+    def get_turns(self, session_id: str) -> List[Turn]:
+        """Return the stored turns for a session, oldest first."""
+        now = time.time()
+        with self._lock:
+            self._evict(now)
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return []
+            entry[0] = now
+            self._sessions.move_to_end(session_id)
+            return list(entry[1])
+
+    def append_turn(self, session_id: str, message: str, response: str):
+        """Record one exchange and enforce the caps."""
+        now = time.time()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                entry = self._sessions[session_id] = [now, [], 0]
+            entry[0] = now
+            entry[1].append((message, response))
+            size = _turn_size(message, response)
+            entry[2] += size
+            self._bytes += size
+            while len(entry[1]) > self.max_turns:
+                old_message, old_response = entry[1].pop(0)
+                removed = _turn_size(old_message, old_response)
+                entry[2] -= removed
+                self._bytes -= removed
+            self._sessions.move_to_end(session_id)
+            self._evict(now)
+
+    def clear(self, session_id: str):
+        """Forget a session."""
+        with self._lock:
+            if session_id in self._sessions:
+                _, _, size = self._sessions.pop(session_id)
+                self._bytes -= size
+
+    def stats(self) -> Dict:
+        """Session counts and memory accounting."""
+        with self._lock:
+            return {
+                "backend": "memory",
+                "sessions": len(self._sessions),
+                "turns": sum(len(turns) for _, turns, _ in self._sessions.values()),
+                "bytes": self._bytes,
+                "evictions": self.evictions
+            }
+
+
+class SQLiteSessionStore:
+    """
+    Chat history in a local SQLite file shared by every worker on the machine.
+
+    Enforces the same caps as InMemorySessionStore; max_bytes counts the stored text.
+    """
+
+    def __init__(self, path: str, max_sessions: int = 1000, max_turns: int = 20, idle_ttl: Optional[float] = 3600,
+                 max_bytes: Optional[int] = None):
+        self.path = path
+        self.max_sessions = max_sessions
+        self.max_turns = max_turns
+        self.idle_ttl = idle_ttl
+        self.max_bytes = max_bytes
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS sessions ("
+                    "session_id TEXT PRIMARY KEY, last_access REAL NOT NULL, bytes INTEGER NOT NULL DEFAULT 0)"
+                )
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS turns ("
+                    "id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT NOT NULL, "
+                    "message TEXT NOT NULL, response TEXT NOT NULL, bytes INTEGER NOT NULL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS turns_by_session ON turns (session_id, id)")
+                conn.execute("CREATE INDEX IF NOT EXISTS sessions_by_access ON sessions (last_access)")
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        # A short-lived connection per operation keeps this safe across threads and forks
+        return sqlite3.connect(self.path, timeout=5)
+
+    def _drop_sessions(self, conn: sqlite3.Connection, session_ids: List[str]):
+        for session_id in session_ids:
+            conn.execute("DELETE FROM turns WHERE session_id = ?", (session_id,))
+            conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        if self.idle_ttl:
+            expired = conn.execute(
+                "SELECT session_id FROM sessions WHERE last_access < ?", (now - self.idle_ttl,)
+            ).fetchall()
+            self._drop_sessions(conn, [row[0] for row in expired])
+
+        (count,) = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()
+        if count > self.max_sessions:
+            oldest = conn.execute(
+                "SELECT session_id FROM sessions ORDER BY last_access LIMIT ?", (count - self.max_sessions,)
+            ).fetchall()
+            self._drop_sessions(conn, [row[0] for row in oldest])
+
+        if self.max_bytes:
+            (total,) = conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM sessions").fetchone()
+            for session_id, size in conn.execute(
+                "SELECT session_id, bytes FROM sessions ORDER BY last_access"
+            ).fetchall()[:-1]:
+                if total <= self.max_bytes:
+                    break
+                self._drop_sessions(conn, [session_id])
+                total -= size
+
+    def get_turns(self, session_id: str) -> List[Turn]:
+        """Return the stored turns for a session, oldest first."""
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                row = conn.execute("SELECT last_access FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+                if row is None:
+                    return []
+                if self.idle_ttl and now - row[0] > self.idle_ttl:
+                    self._drop_sessions(conn, [session_id])
+                    return []
+                conn.execute("UPDATE sessions SET last_access = ? WHERE session_id = ?", (now, session_id))
+                return conn.execute(
+                    "SELECT message, response FROM turns WHERE session_id = ? ORDER BY id", (session_id,)
+                ).fetchall()
+        finally:
+            conn.close()
+
+    def append_turn(self, session_id: str, message: str, response: str):
+        """Record one exchange and enforce the caps."""
+        now = time.time()
+        size = _turn_size(message, response)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT INTO sessions (session_id, last_access, bytes) VALUES (?, ?, 0) "
+                    "ON CONFLICT(session_id) DO UPDATE SET last_access = excluded.last_access",
+                    (session_id, now)
+                )
+                conn.execute(
+                    "INSERT INTO turns (session_id, message, response, bytes) VALUES (?, ?, ?, ?)",
+                    (session_id, message, response, size)
+                )
+                conn.execute(
+                    "DELETE FROM turns WHERE session_id = ? AND id NOT IN "
+                    "(SELECT id FROM turns WHERE session_id = ? ORDER BY id DESC LIMIT ?)",
+                    (session_id, session_id, self.max_turns)
+                )
+                conn.execute(
+                    "UPDATE sessions SET bytes = (SELECT COALESCE(SUM(bytes), 0) FROM turns WHERE session_id = ?) "
+                    "WHERE session_id = ?",
+                    (session_id, session_id)
+                )
+                self._evict(conn, now)
+        finally:
+            conn.close()
+
+    def clear(self, session_id: str):
+        """Forget a session."""
+        conn = self._connect()
+        try:
+            with conn:
+                self._drop_sessions(conn, [session_id])
+        finally:
+            conn.close()
+
+    def stats(self) -> Dict:
+        """Session counts and storage accounting."""
+        conn = self._connect()
+        try:
+            sessions, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM sessions").fetchone()
+            (turns,) = conn.execute("SELECT COUNT(*) FROM turns").fetchone()
+        finally:
+            conn.close()
+        return {"backend": "sqlite", "sessions": sessions, "turns": turns, "bytes": total}
+
+
+def create_session_store():
+    """
+    Build the session store configured by the environment
+
+    SESSION_STORE selects the backend: "memory" (default, per process) or "sqlite"
+    (shared by every worker through SESSION_DB_PATH).
+    """
+    options = {
+        "max_sessions": int(os.getenv("SESSION_MAX_SESSIONS", "1000")),
+        "max_turns": int(os.getenv("SESSION_MAX_TURNS", "20")),
+        "idle_ttl": float(os.getenv("SESSION_IDLE_TTL", "3600")),
+        "max_bytes": int(os.getenv("SESSION_MAX_BYTES", str(32 * 1024 * 1024)))
+    }
+    backend = os.getenv("SESSION_STORE", "memory")
+    if backend == "sqlite":
+        return SQLiteSessionStore(os.getenv("SESSION_DB_PATH", "/tmp/chat_sessions.db"), **options)
+    if backend != "memory":
+        raise ValueError(f"Unknown SESSION_STORE backend: {backend}")
+    return InMemorySessionStore(**options)
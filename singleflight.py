@@ -0,0 +1,109 @@
+"""
+Single-flight request coalescing.
+
+While a call for a key is in flight, further calls for the same key wait for
+it and share its result (or its exception) instead of starting their own.
+Nothing is remembered once the call finishes; caching is a separate concern.
+"""
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key, for threads and for asyncio tasks."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[str, _Call] = {}
+        self._async_calls: Dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) unless a call for key is already running; either way return its result."""
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    async def ado(self, key: str, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Async variant of do for coroutine functions on the running event loop."""
+        with self._lock:
+            self.calls += 1
+            future = self._async_calls.get(key)
+            if future is not None and future.get_loop() is asyncio.get_running_loop():
+                self.coalesced += 1
+                leader = False
+            else:
+                future = self._async_calls[key] = asyncio.get_running_loop().create_future()
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            # shield: a cancelled waiter must not cancel the shared call
+            return await asyncio.shield(future)
+
+        try:
+            result = await fn(*args, **kwargs)
+        except BaseException as e:
+            if not future.done():
+                if isinstance(e, asyncio.CancelledError):
+                    # Waiters were not cancelled themselves; give them an ordinary error to handle
+                    e = RuntimeError(f"Coalesced {self.name} call was cancelled")
+                future.set_exception(e)
+                # Mark retrieved so an unawaited failure does not log "exception never retrieved"
+                future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                if self._async_calls.get(key) is future:
+                    del self._async_calls[key]
+
+    def stats(self) -> Dict:
+        """Call counters; coalesced calls shared another call's result."""
+        with self._lock:
+            in_flight = len(self._calls) + len(self._async_calls)
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "coalesced_rate": round(self.coalesced / self.calls, 4) if self.calls else 0.0,
+            "in_flight": in_flight
+        }
@@ -0,0 +1,91 @@
+import os
+import resource
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Defer loading models, datasets and clients until first use (set LAZY_STARTUP=0 to load at import)
+LAZY_STARTUP = os.getenv("LAZY_STARTUP", "1") == "1"
+
+_process_started = time.perf_counter()
+_timings: "OrderedDict[str, float]" = OrderedDict()
+_timings_lock = threading.Lock()
+
+
+@contextmanager
+def phase(name: str):
+    """Record how long the wrapped block takes under name in the startup timing report."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        with _timings_lock:
+            _timings[name] = _timings.get(name, 0.0) + elapsed
+
+
+def timing_report() -> Dict[str, float]:
+    """Per-phase durations in milliseconds, in the order the phases first ran."""
+    with _timings_lock:
+        report = {name: round(seconds * 1000, 2) for name, seconds in _timings.items()}
+    report["since_process_start"] = round((time.perf_counter() - _process_started) * 1000, 2)
+    return report
+
+
+def memory_usage() -> Dict[str, int]:
+    """
+    Memory of the current process in kB
+
+    Reads /proc/self/smaps_rollup where available, so pages shared with the
+    gunicorn master after fork show up in shared_kb/pss_kb rather than rss_kb only.
+    """
+    usage = {"pid": os.getpid()}
+    fields = {
+        "Rss": "rss_kb", "Pss": "pss_kb",
+        "Shared_Clean": "shared_clean_kb", "Shared_Dirty": "shared_dirty_kb",
+        "Private_Clean": "private_clean_kb", "Private_Dirty": "private_dirty_kb"
+    }
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in fields:
+                    usage[fields[key]] = int(rest.split()[0])
+    except OSError:
+        # Not Linux (or an old kernel): peak RSS is the best we can report
+        usage["max_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage
+
+
+class Lazy(Generic[T]):
+    """Thread-safe, load-once holder for an expensive resource."""
+
+    def __init__(self, factory: Callable[[], T], name: str):
+        self._factory = factory
+        self.name = name
+        self._value: Optional[T] = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def reset(self):
+        """Drop the loaded value so the next get() builds a fresh one."""
+        with self._lock:
+            self._value = None
+            self._loaded = False
+
+    def get(self) -> T:
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    with phase(f"load:{self.name}"):
+                        self._value = self._factory()
+                    self._loaded = True
+        return self._value
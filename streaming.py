@@ -0,0 +1,86 @@
+import json
+from typing import Any, Iterator, Optional, Tuple
+
+
+def sse_event(data: Any, event: Optional[str] = None) -> str:
+    """Format a Server-Sent Events message with a JSON payload."""
+    message = f"event: {event}\n" if event else ""
+    return message + f"data: {json.dumps(data)}\n\n"
+
+
+def stream_completion_text(response) -> Iterator[str]:
+    """
+    Yield the text deltas of a streamed chat completion, skipping empty chunks
+
+    The response is closed when this generator is, so a consumer that stops
+    early releases the upstream connection straight away.
+    """
+    try:
+        for chunk in response:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+    finally:
+        close = getattr(response, "close", None)
+        if close is not None:
+            close()
+
+
+class JSONSectionStream:
+    """
+    Incrementally parse a streamed JSON object and emit each top-level member once complete.
+
+    Feed raw completion text as it arrives; every call to feed returns the
+    (key, value) pairs whose values finished in that chunk. Text before the
+    opening brace (such as a markdown fence) is ignored.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start = None
+        self.closed = False
+
+    def feed(self, chunk: str) -> Iterator[Tuple[str, Any]]:
+        self.text += chunk
+        sections = []
+        text = self.text
+        while self._pos < len(text) and not self.closed:
+            char = text[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                if self._depth > 0:
+                    self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+                if self._depth == 1:
+                    self._member_start = self._pos + 1
+            elif char in "}]":
+                if self._depth == 1:
+                    sections.extend(self._parse_member(text[self._member_start:self._pos]))
+                    self.closed = True
+                self._depth -= 1
+            elif char == "," and self._depth == 1:
+                sections.extend(self._parse_member(text[self._member_start:self._pos]))
+                self._member_start = self._pos + 1
+            self._pos += 1
+        return sections
+
+    def _parse_member(self, member: str):
+        if not member.strip():
+            return []
+        try:
+            return list(json.loads("{" + member + "}").items())
+        except json.JSONDecodeError:
+            return []
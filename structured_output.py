@@ -0,0 +1,209 @@
+"""
+Structured (JSON) completions that are repaired instead of thrown away.
+
+complete/acomplete request JSON mode and parse the answer tolerantly:
+markdown fences and prose around the object are ignored, and a truncated
+object keeps every top-level section that was finished. The result is
+validated against a schema ({key: validator}); when sections are missing or
+invalid, one follow-up completion asks for only those sections and they are
+merged in (repair/arepair do just this step, e.g. after a stream). Callers
+fill whatever is still missing with their placeholders.
+"""
+import json
+import logging
+import os
+import re
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from metrics import counter, track_phase
+from streaming import JSONSectionStream
+
+logger = logging.getLogger(__name__)
+
+JSON_MODE = {"type": "json_object"}
+
+# Follow-up completions allowed for missing sections (0 disables repair requests)
+STRUCTURED_OUTPUT_REPAIRS = int(os.getenv("STRUCTURED_OUTPUT_REPAIRS", "1"))
+
+structured_outputs = counter(
+    "structured_output_total", "Structured completions, by schema and how they were completed", ("schema", "result")
+)
+
+_FENCE = re.compile(r"```(?:json)?\s*(.*?)(?:```|$)", re.DOTALL | re.IGNORECASE)
+
+Schema = Dict[str, Callable[[Any], bool]]
+
+
+def is_text(value) -> bool:
+    return isinstance(value, str) and bool(value.strip())
+
+
+def is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def is_list(value) -> bool:
+    return isinstance(value, list) and bool(value)
+
+
+def is_list_or_text(value) -> bool:
+    return is_list(value) or is_text(value)
+
+
+def parse_json_object(text: Optional[str]) -> Optional[Dict]:
+    """
+    Parse a JSON object from model output, tolerating fences, surrounding prose
+    and truncation
+
+    Returns:
+        The object, only its complete top-level members when it was cut off,
+        or None when nothing could be recovered
+    """
+    return _parse(text)[0]
+
+
+def _parse(text: Optional[str]) -> Tuple[Optional[Dict], bool]:
+    """parse_json_object plus whether the text was valid JSON as it stood."""
+    if not text:
+        return None, False
+    with track_phase("json_parse"):
+        try:
+            data = json.loads(text)
+            return (data, True) if isinstance(data, dict) else (None, False)
+        except json.JSONDecodeError:
+            pass
+
+    with track_phase("json_repair"):
+        fenced = _FENCE.search(text)
+        body = fenced.group(1) if fenced else text
+        start, end = body.find("{"), body.rfind("}")
+        if start != -1 and end > start:
+            try:
+                data = json.loads(body[start:end + 1])
+                if isinstance(data, dict):
+                    return data, False
+            except json.JSONDecodeError:
+                pass
+        # Keep the members that were complete before the text broke off
+        members = dict(JSONSectionStream().feed(body))
+        return members or None, False
+
+
+def missing_sections(data: Dict, schema: Schema) -> List[str]:
+    """Schema keys that are absent from data or fail their validator."""
+    return [key for key, valid in schema.items() if key not in data or not valid(data[key])]
+
+
+def repair_messages(messages: List[Dict], missing: List[str]) -> List[Dict]:
+    """The original request, narrowed to the sections still needed."""
+    keys = ", ".join(json.dumps(key) for key in missing)
+    return messages + [{
+        "role": "user",
+        "content": f"Return a JSON object containing ONLY these keys, in the format described above: {keys}."
+    }]
+
+
+def _merge(data: Dict, text: Optional[str], missing: List[str], schema: Schema):
+    for key, value in (parse_json_object(text) or {}).items():
+        if key in missing and schema[key](value):
+            data[key] = value
+
+
+def _record(name: str, first_missing: List[str], missing: List[str], strict: bool):
+    if not first_missing:
+        result = "valid" if strict else "repaired_locally"
+    else:
+        result = "incomplete" if missing else "sections_requested"
+    structured_outputs.inc(schema=name, result=result)
+
+
+def _content(response) -> str:
+    return response.choices[0].message.content
+
+
+def _repair_kwargs(kwargs: Dict, missing: List[str], tokens_per_section: Optional[int]) -> Dict:
+    if tokens_per_section is None:
+        return kwargs
+    return {**kwargs, "max_tokens": tokens_per_section * len(missing)}
+
+
+def repair(create: Callable[..., Any], name: str, schema: Schema, messages: List[Dict], data: Dict,
+           tokens_per_section: Optional[int] = None, strict: bool = True, **kwargs) -> List[str]:
+    """
+    Request the sections of data that are missing or invalid and merge them into data
+
+    complete() does this for its own answer; call it directly for answers
+    obtained another way, e.g. sections parsed from a stream.
+
+    Args:
+        strict: Whether data came from valid JSON as it stood (for the metrics)
+
+    Returns:
+        The schema keys still missing
+    """
+    first_missing = missing = missing_sections(data, schema)
+
+    for _ in range(STRUCTURED_OUTPUT_REPAIRS if missing else 0):
+        try:
+            response = create(messages=repair_messages(messages, missing), response_format=JSON_MODE,
+                              **_repair_kwargs(kwargs, missing, tokens_per_section))
+        except Exception as e:
+            logger.warning("Repair completion for %s failed: %s", name, e)
+            break
+        _merge(data, _content(response), missing, schema)
+        missing = missing_sections(data, schema)
+        if not missing:
+            break
+
+    _record(name, first_missing, missing, strict)
+    return missing
+
+
+async def arepair(acreate: Callable[..., Awaitable[Any]], name: str, schema: Schema, messages: List[Dict], data: Dict,
+                  tokens_per_section: Optional[int] = None, strict: bool = True, **kwargs) -> List[str]:
+    """repair for coroutine create functions."""
+    first_missing = missing = missing_sections(data, schema)
+
+    for _ in range(STRUCTURED_OUTPUT_REPAIRS if missing else 0):
+        try:
+            response = await acreate(messages=repair_messages(messages, missing), response_format=JSON_MODE,
+                                     **_repair_kwargs(kwargs, missing, tokens_per_section))
+        except Exception as e:
+            logger.warning("Repair completion for %s failed: %s", name, e)
+            break
+        _merge(data, _content(response), missing, schema)
+        missing = missing_sections(data, schema)
+        if not missing:
+            break
+
+    _record(name, first_missing, missing, strict)
+    return missing
+
+
+def complete(create: Callable[..., Any], name: str, schema: Schema, messages: List[Dict],
+             tokens_per_section: Optional[int] = None, **kwargs) -> Tuple[Dict, List[str]]:
+    """
+    Run a JSON-mode completion with create (e.g. llm.chat_completion) and
+    repair it against schema
+
+    Args:
+        tokens_per_section: When set, repair completions get max_tokens for
+            just the missing sections instead of the original max_tokens
+
+    Returns:
+        (data, missing): the parsed object and the schema keys still missing
+        after repair. Errors from the first completion are raised.
+    """
+    text = _content(create(messages=messages, response_format=JSON_MODE, **kwargs))
+    data, strict = _parse(text)
+    data = data or {}
+    return data, repair(create, name, schema, messages, data, tokens_per_section, strict, **kwargs)
+
+
+async def acomplete(acreate: Callable[..., Awaitable[Any]], name: str, schema: Schema, messages: List[Dict],
+                    tokens_per_section: Optional[int] = None, **kwargs) -> Tuple[Dict, List[str]]:
+    """complete for coroutine create functions (e.g. llm.achat_completion)."""
+    text = _content(await acreate(messages=messages, response_format=JSON_MODE, **kwargs))
+    data, strict = _parse(text)
+    data = data or {}
+    return data, await arepair(acreate, name, schema, messages, data, tokens_per_section, strict, **kwargs)
@@ -0,0 +1,148 @@
+"""
+Career x subject requirement weights and vectorized subject-match scoring.
+
+Weights come from data/career_subject_weights.csv (career, subject, weight),
+extended with the subjects recorded in the career knowledge base for careers
+the CSV does not cover. Only subjects students are scored on contribute to the
+match; a career's match is the weighted mean of the student's scores over the
+subjects it requires, or DEFAULT_MATCH_SCORE when none of them were given:
+
+    match = (W @ scores) / (W @ present)
+
+which ranks one student against every career in a single matrix-vector product.
+"""
+import csv
+import logging
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from cache import normalize_text
+from knowledge_base import get_knowledge_base
+from startup import Lazy
+
+logger = logging.getLogger(__name__)
+
+_script_dir = os.path.dirname(os.path.abspath(__file__))
+CAREER_SUBJECT_WEIGHTS_PATH = os.getenv(
+    "CAREER_SUBJECT_WEIGHTS_PATH", os.path.join(_script_dir, "data", "career_subject_weights.csv")
+)
+
+# Subjects students are scored on, with the key their score arrives under
+SCORED_SUBJECTS = [
+    ("Mathematics", "subject_mathematics"),
+    ("Physics", "subject_physics"),
+    ("Chemistry", "subject_chemistry"),
+    ("Biology", "subject_biology"),
+    ("English", "subject_english"),
+    ("Geography", "subject_geography"),
+    ("History", "subject_history"),
+]
+SUBJECT_INDEX = {subject: i for i, (subject, _) in enumerate(SCORED_SUBJECTS)}
+
+# Match score when none of a career's required subjects were scored
+DEFAULT_MATCH_SCORE = 70
+
+DEFAULT_REQUIREMENTS = ["Mathematics", "English", "Critical Thinking"]
+
+
+def score_vector(academic_scores: Dict) -> Tuple[np.ndarray, np.ndarray]:
+    """Student scores in SCORED_SUBJECTS order plus a 0/1 mask of the ones that were given."""
+    scores = np.zeros(len(SCORED_SUBJECTS))
+    present = np.zeros(len(SCORED_SUBJECTS))
+    for i, (_, key) in enumerate(SCORED_SUBJECTS):
+        value = academic_scores.get(key)
+        if value is not None:
+            scores[i] = float(value)
+            present[i] = 1.0
+    return scores, present
+
+
+def weight_vector(subjects: Sequence[str], weights: Optional[Sequence[float]] = None) -> np.ndarray:
+    """Weights over SCORED_SUBJECTS for a list of required subjects (equal weights by default)."""
+    row = np.zeros(len(SCORED_SUBJECTS))
+    for i, subject in enumerate(subjects):
+        if subject in SUBJECT_INDEX:
+            row[SUBJECT_INDEX[subject]] += 1.0 if weights is None else weights[i]
+    return row
+
+
+def _match(weighted_scores: np.ndarray, weighted_present: np.ndarray) -> np.ndarray:
+    safe = np.where(weighted_present > 0, weighted_present, 1.0)
+    return np.where(weighted_present > 0, weighted_scores / safe, float(DEFAULT_MATCH_SCORE))
+
+
+class SubjectMatchMatrix:
+    """Dense career x scored-subject weight matrix with the full requirement list per career."""
+
+    def __init__(self, careers: List[str], requirements: List[List[str]], weights: np.ndarray):
+        self.careers = careers
+        self.requirements = requirements
+        self.weights = weights
+        self.index = {normalize_text(career): i for i, career in enumerate(careers)}
+
+    def __len__(self):
+        return len(self.careers)
+
+    def row(self, career: str) -> Optional[int]:
+        return self.index.get(normalize_text(career)) if career else None
+
+    def requirements_for(self, career: str) -> Optional[List[str]]:
+        row = self.row(career)
+        return list(self.requirements[row]) if row is not None else None
+
+    def match_scores(self, academic_scores: Dict) -> np.ndarray:
+        """Subject-match score of every career in the matrix, in self.careers order."""
+        scores, present = score_vector(academic_scores)
+        return _match(self.weights @ scores, self.weights @ present)
+
+    def rank(self, academic_scores: Dict, limit: Optional[int] = None) -> List[Tuple[str, float]]:
+        """(career, match score) pairs, best first; ties keep catalog order."""
+        match = self.match_scores(academic_scores)
+        order = np.argsort(-match, kind="stable")[:limit]
+        return [(self.careers[i], float(match[i])) for i in order]
+
+
+def load_subject_match_matrix(path: str = CAREER_SUBJECT_WEIGHTS_PATH) -> SubjectMatchMatrix:
+    """Build the matrix from the weights CSV plus knowledge base requirements for other careers."""
+    rows: Dict[str, List[Tuple[str, float]]] = {}
+    names: Dict[str, str] = {}
+    if os.path.exists(path):
+        with open(path, newline="") as f:
+            for record in csv.DictReader(f):
+                key = normalize_text(record["career"])
+                names.setdefault(key, record["career"].strip())
+                rows.setdefault(key, []).append((record["subject"].strip(), float(record["weight"])))
+    else:
+        logger.warning("Subject weights file %s not found; only knowledge base requirements are used", path)
+
+    for key, entry in get_knowledge_base().careers.items():
+        if key not in rows and entry.get("requirements"):
+            names[key] = entry["name"]
+            rows[key] = [(subject, 1.0) for subject in entry["requirements"]]
+
+    careers, requirements = [], []
+    weights = np.zeros((len(rows), len(SCORED_SUBJECTS)))
+    for i, (key, subjects) in enumerate(rows.items()):
+        # Highest weight first; stable so equal weights keep file order
+        subjects = sorted(subjects, key=lambda item: -item[1])
+        careers.append(names[key])
+        requirements.append([subject for subject, _ in subjects])
+        weights[i] = weight_vector([s for s, _ in subjects], [w for _, w in subjects])
+    return SubjectMatchMatrix(careers, requirements, weights)
+
+
+_matrix = Lazy(load_subject_match_matrix, "subject_match_matrix")
+
+
+def get_subject_match_matrix() -> SubjectMatchMatrix:
+    """Return the process-wide matrix, loading it on first use."""
+    return _matrix.get()
+
+
+def subject_match_score(academic_scores: Dict, required_subjects: Sequence[str]) -> float:
+    """Equal-weight match score for an arbitrary list of required subjects."""
+    scores, present = score_vector(academic_scores)
+    row = weight_vector(required_subjects)
+    return float(_match(row @ scores, row @ present))
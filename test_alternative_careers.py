@@ -0,0 +1,15 @@
+import pytest
+
+from alternative_careers import AlternativeCareersAnalyzer
+
+
+@pytest.mark.parametrize("subjects, skills", [
+    (["Biology", "Chemistry", "Physics"], ["Proficiency in Biology", "Strong foundation in Chemistry"]),
+    (["Biology"], ["Proficiency in Biology"]),
+    ([], []),
+])
+def test_subject_match_analysis_uses_the_subjects_a_career_has(subjects, skills):
+    analysis = AlternativeCareersAnalyzer().subject_match_analysis("Doctor", subjects, 81.6)
+    assert analysis["matching_score"] == 82
+    assert analysis["key_skills"] == skills + ["Analytical and problem-solving abilities"]
+    assert "Doctor" in analysis["explanation"]
@@ -0,0 +1,111 @@
+import pytest
+
+import cache
+from cache import TTLCache, collapse_whitespace, make_key, normalize_text
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A controllable time.time() for the cache module."""
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_entries_expire_after_ttl(clock):
+    store = TTLCache(maxsize=4, ttl=10)
+    store.set("a", 1)
+    clock[0] += 9
+    assert store.get("a") == 1
+    clock[0] += 2
+    assert store.get("a", "gone") == "gone"
+    assert store.stats()["size"] == 0
+
+
+def test_per_entry_ttl_overrides_default(clock):
+    store = TTLCache(maxsize=4, ttl=10)
+    store.set("short", 1, ttl=1)
+    store.set("long", 2)
+    clock[0] += 5
+    assert store.get("short") is None
+    assert store.get("long") == 2
+
+
+def test_evicts_least_recently_used():
+    store = TTLCache(maxsize=2)
+    store.set("a", 1)
+    store.set("b", 2)
+    # Reading "a" makes "b" the least recently used
+    assert store.get("a") == 1
+    store.set("c", 3)
+    assert store.get("b") is None
+    assert store.get("a") == 1
+    assert store.get("c") == 3
+    assert store.stats()["evictions"] == 1
+
+
+def test_stats_count_hits_and_misses():
+    store = TTLCache(maxsize=2)
+    store.set("a", 1)
+    store.get("a")
+    store.get("missing")
+    stats = store.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+    store.clear()
+    assert store.stats()["hits"] == 0
+
+
+def test_disk_store_survives_a_new_instance(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    TTLCache(maxsize=2, path=path, name="details").set("a", {"value": [1, 2]})
+
+    reopened = TTLCache(maxsize=2, path=path, name="details")
+    assert reopened.get("a") == {"value": [1, 2]}
+    assert reopened.stats()["disk_hits"] == 1
+    # Now in memory, so the next read does not go to disk
+    assert reopened.get("a") == {"value": [1, 2]}
+    assert reopened.stats()["disk_hits"] == 1
+
+
+def test_disk_store_is_namespaced_and_honours_expiry(tmp_path, clock):
+    path = str(tmp_path / "cache.sqlite3")
+    TTLCache(path=path, name="details", ttl=10).set("a", 1)
+
+    assert TTLCache(path=path, name="other").get("a") is None
+    clock[0] += 11
+    assert TTLCache(path=path, name="details").get("a") is None
+
+
+def test_evicted_entries_fall_back_to_disk(tmp_path):
+    store = TTLCache(maxsize=1, path=str(tmp_path / "cache.sqlite3"))
+    store.set("a", 1)
+    store.set("b", 2)
+    assert store.get("a") == 1
+    assert store.stats()["disk_hits"] == 1
+
+
+def test_delete_removes_memory_and_disk_entries(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    store = TTLCache(path=path)
+    store.set("a", 1)
+    store.delete("a")
+    assert store.get("a") is None
+    assert TTLCache(path=path).get("a") is None
+
+
+def test_keys_ignore_case_and_whitespace_of_normalized_text():
+    assert normalize_text("  Software   Engineer ") == "software engineer"
+    assert make_key(normalize_text("Doctor"), 1) == make_key(normalize_text(" doctor "), 1)
+    assert make_key("a", 1) != make_key("a", 2)
+
+
+def test_collapse_whitespace_keeps_case():
+    assert collapse_whitespace("  Write a   Roadmap\n for SQL ") == "Write a Roadmap for SQL"
+
+
+def test_disk_store_is_created_on_first_use(tmp_path):
+    path = tmp_path / "nested" / "cache.sqlite3"
+    store = TTLCache(path=str(path))
+    assert not path.exists()
+    assert store.get("a") is None
+    assert path.exists()
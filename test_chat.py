@@ -0,0 +1,99 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import gpt_chatbot
+from session_store import InMemorySessionStore
+
+
+def completion(content):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+@pytest.fixture
+def store(monkeypatch):
+    """A fresh session store for gpt_chatbot."""
+    store = InMemorySessionStore()
+    monkeypatch.setattr(gpt_chatbot, "session_store", store)
+    return store
+
+
+@pytest.fixture
+def requests(monkeypatch):
+    """The messages of every chat completion, answered with "reply N"."""
+    sent = []
+
+    def chat_completion(messages, **kwargs):
+        sent.append(messages)
+        return completion(f"reply {len(sent)}")
+
+    monkeypatch.setattr(gpt_chatbot, "chat_completion", chat_completion)
+    return sent
+
+
+def history(messages):
+    """The user and assistant turns sent before the current message."""
+    return [message["content"] for message in messages[:-1] if message["role"] != "system"]
+
+
+def test_history_is_kept_per_session(store, requests):
+    gpt_chatbot.handle_chat("What do engineers do?", session_id="alice")
+    gpt_chatbot.handle_chat("Which universities?", session_id="alice")
+    gpt_chatbot.handle_chat("Hello", session_id="bob")
+
+    assert history(requests[1]) == ["What do engineers do?", "reply 1"]
+    assert history(requests[2]) == []
+
+
+def test_requests_without_a_session_share_no_history(store, requests):
+    gpt_chatbot.handle_chat("My GPA is 3.2, what about medicine?")
+    gpt_chatbot.handle_chat("Hello")
+
+    assert history(requests[1]) == []
+    assert store.stats()["sessions"] == 0
+
+
+def test_async_chat_keeps_history_per_session(store, monkeypatch):
+    sent = []
+
+    async def achat_completion(messages, **kwargs):
+        sent.append(messages)
+        return completion(f"reply {len(sent)}")
+
+    monkeypatch.setattr(gpt_chatbot, "achat_completion", achat_completion)
+
+    async def conversation():
+        await gpt_chatbot.ahandle_chat("What do engineers do?", session_id="alice")
+        return await gpt_chatbot.ahandle_chat("Which universities?", session_id="alice")
+
+    assert asyncio.run(conversation()) == "reply 2"
+    assert history(sent[1]) == ["What do engineers do?", "reply 1"]
+
+
+class BrokenStream:
+    """A streamed completion that fails after its deltas."""
+
+    def __init__(self, *deltas):
+        self.deltas = deltas
+
+    def __iter__(self):
+        for delta in self.deltas:
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=delta))])
+        raise ConnectionError("upstream went away")
+
+
+def test_interrupted_stream_is_saved_with_a_marker(store, monkeypatch):
+    monkeypatch.setattr(gpt_chatbot, "stream_chat_completion", lambda **kwargs: BrokenStream("Study ", "maths"))
+
+    chunks = list(gpt_chatbot.handle_chat_stream("How do I start?", session_id="alice"))
+
+    assert chunks == ["Study ", "maths"]
+    assert store.get_turns("alice") == [("How do I start?", "Study maths" + gpt_chatbot.INTERRUPTED_MARKER)]
+
+
+def test_streams_without_a_session_are_not_saved(store, monkeypatch):
+    monkeypatch.setattr(gpt_chatbot, "stream_chat_completion", lambda **kwargs: BrokenStream("Study ", "maths"))
+
+    assert "".join(gpt_chatbot.handle_chat_stream("How do I start?")) == "Study maths"
+    assert store.stats()["sessions"] == 0
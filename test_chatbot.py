@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from datasets import find_raw_file
+
+
+@pytest.fixture(scope="module")
+def chatbot():
+    try:
+        find_raw_file("universities")
+    except FileNotFoundError:
+        pytest.skip("recommender-data is not available")
+    from chatbot import CareerChatbot
+    return CareerChatbot()
+
+
+def scan(chatbot, gpa, career):
+    """The universities a full scan of the table finds, in dataset order."""
+    table = chatbot.universities
+    careers = np.asarray(table['Career_Field'].values)[np.asarray(table['Career_Field'].codes)]
+    min_gpa = np.asarray(table['Min_GPA_100'], dtype=np.float64)
+    max_gpa = np.asarray(table['Max_GPA_100'], dtype=np.float64)
+    rows = np.flatnonzero((careers == career) & (min_gpa <= gpa) & (max_gpa >= gpa))
+    return list(table.take('University_Name', rows))
+
+
+def test_universities_for_matches_a_full_scan(chatbot):
+    table = chatbot.universities
+    endpoints = np.unique(np.concatenate([
+        np.asarray(table['Min_GPA_100'], dtype=np.float64), np.asarray(table['Max_GPA_100'], dtype=np.float64)
+    ]))
+    gpas = np.concatenate([endpoints, endpoints + 0.25, endpoints - 0.25, [-1.0, 0.0, 100.0, 101.0]])
+    for career in chatbot._universities_by_career:
+        for gpa in gpas:
+            found = [university['University_Name'] for university in chatbot.universities_for(float(gpa), career)]
+            assert found == scan(chatbot, gpa, career), (career, gpa)
+
+
+def test_unknown_career_and_nan_gpa_match_nothing(chatbot):
+    career = next(iter(chatbot._universities_by_career))
+    assert chatbot.universities_for(float("nan"), career) == []
+    assert chatbot.universities_for(70.0, "Not A Career") == []
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+from predictor import CareerPredictor
+
+xgboost = pytest.importorskip("xgboost")
+
+FEATURES = ["math_score", "history_score", "physics_score"]
+CAREERS = ["Doctor", "Engineer", "Lawyer"]
+
+
+def fit(objective, careers=CAREERS):
+    rng = np.random.default_rng(0)
+    X = rng.uniform(30, 100, size=(300, len(FEATURES)))
+    names = np.asarray(careers)[np.argmax(X[:, :len(careers)], axis=1)]
+    scaler = StandardScaler().fit(X)
+    label_encoder = LabelEncoder().fit(names)
+    model = xgboost.XGBClassifier(n_estimators=10, max_depth=3, objective=objective)
+    model.fit(scaler.transform(X), label_encoder.transform(names))
+    return X, model, scaler, label_encoder
+
+
+def reference_top_k(model, scaler, label_encoder, X, k):
+    proba = model.predict_proba(scaler.transform(X))
+    return [
+        [(str(label_encoder.classes_[i]), float(row[i])) for i in np.argsort(-row, kind="stable")[:k]]
+        for row in proba
+    ]
+
+
+def assert_same_top_k(expected, actual):
+    assert [career for career, _ in expected] == [career for career, _ in actual]
+    np.testing.assert_allclose([p for _, p in expected], [p for _, p in actual], atol=1e-6)
+
+
+@pytest.mark.parametrize("objective, careers", [
+    ("multi:softprob", CAREERS),
+    ("binary:logistic", CAREERS[:2]),
+])
+def test_top_k_matches_predict_proba(objective, careers):
+    X, model, scaler, label_encoder = fit(objective, careers)
+    predictor = CareerPredictor(model, scaler, label_encoder, FEATURES)
+    expected = reference_top_k(model, scaler, label_encoder, X[:50], k=2)
+
+    for row, top in zip(X[:50].tolist(), expected):
+        assert_same_top_k(top, predictor.predict_one_top_k(row, k=2))
+    for top, actual in zip(expected, predictor.predict_batch_top_k(X[:50].copy(), k=2)):
+        assert_same_top_k(top, actual)
+    # The top career is the one the model predicts
+    assert [top[0][0] for top in expected] == list(label_encoder.inverse_transform(
+        model.predict(scaler.transform(X[:50]))
+    ))
+
+
+def test_rejects_objectives_without_probabilities():
+    _, model, scaler, label_encoder = fit("multi:softmax")
+    with pytest.raises(ValueError, match="multi:softmax"):
+        CareerPredictor(model, scaler, label_encoder, FEATURES)
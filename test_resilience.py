@@ -0,0 +1,181 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from openai import APIConnectionError
+
+import resilience
+from resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, ResiliencePolicy, backoff_delay
+
+
+def connection_error():
+    return APIConnectionError(request=httpx.Request("POST", "http://upstream.invalid/v1/chat/completions"))
+
+
+class Upstream:
+    """A completion function that fails a set number of times, then answers."""
+
+    def __init__(self, failures=0, error=connection_error):
+        self.failures = failures
+        self.error = error
+        self.calls = []
+
+    def __call__(self, **kwargs):
+        self.calls.append(kwargs)
+        if len(self.calls) <= self.failures:
+            raise self.error()
+        return "ok"
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Backoff sleeps, recorded instead of slept."""
+    recorded = []
+    monkeypatch.setattr(resilience.time, "sleep", recorded.append)
+    return recorded
+
+
+def test_breaker_opens_half_opens_and_closes():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.state == CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    # One probe is let through after the reset timeout
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.stats()["consecutive_failures"] == 0
+
+
+def test_failed_probe_reopens_the_breaker():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+
+def test_released_probe_lets_the_next_call_probe():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.state == OPEN
+    assert breaker.allow()
+
+
+def test_backoff_is_capped_and_jittered():
+    for attempt in range(10):
+        delays = [backoff_delay(attempt, base=0.5, cap=4) for _ in range(50)]
+        assert all(0 <= delay <= min(4, 0.5 * 2 ** attempt) for delay in delays)
+    assert len({backoff_delay(3, base=0.5, cap=4) for _ in range(10)}) > 1
+
+
+def test_transient_failures_are_retried(sleeps):
+    upstream = Upstream(failures=2)
+    policy = ResiliencePolicy(CircuitBreaker("test", failure_threshold=10), max_retries=2, deadline=60)
+    assert policy.call(upstream) == "ok"
+    assert len(upstream.calls) == 3
+    assert len(sleeps) == 2
+    assert policy.breaker.failures == 0
+
+
+def test_gives_up_after_max_retries(sleeps):
+    upstream = Upstream(failures=5)
+    policy = ResiliencePolicy(CircuitBreaker("test", failure_threshold=10), max_retries=2, deadline=60)
+    with pytest.raises(APIConnectionError):
+        policy.call(upstream)
+    assert len(upstream.calls) == 3
+    assert policy.breaker.failures == 3
+
+
+def test_other_errors_are_not_retried(sleeps):
+    upstream = Upstream(failures=1, error=lambda: ValueError("bad request"))
+    policy = ResiliencePolicy(CircuitBreaker("test"), max_retries=2, deadline=60)
+    with pytest.raises(ValueError):
+        policy.call(upstream)
+    assert len(upstream.calls) == 1
+    assert policy.breaker.failures == 0
+
+
+def test_open_breaker_fails_fast_without_calling_upstream(sleeps):
+    upstream = Upstream(failures=5)
+    policy = ResiliencePolicy(CircuitBreaker("test", failure_threshold=2, reset_timeout=60),
+                              max_retries=5, deadline=60)
+    with pytest.raises(APIConnectionError):
+        policy.call(upstream)
+    # The breaker opened after the second failure, which also stopped the retries
+    assert len(upstream.calls) == 2
+    with pytest.raises(CircuitOpenError):
+        policy.call(upstream)
+    assert len(upstream.calls) == 2
+
+
+def test_no_retry_when_backoff_would_pass_the_deadline(sleeps, monkeypatch):
+    monkeypatch.setattr(resilience, "backoff_delay", lambda attempt: 5.0)
+    upstream = Upstream(failures=1)
+    policy = ResiliencePolicy(CircuitBreaker("test"), max_retries=3, deadline=2)
+    with pytest.raises(APIConnectionError):
+        policy.call(upstream)
+    assert len(upstream.calls) == 1
+    assert sleeps == []
+
+
+def test_attempt_timeout_is_capped_by_the_remaining_deadline():
+    policy = ResiliencePolicy(CircuitBreaker("test"), connect_timeout=5, read_timeout=30)
+    assert policy.attempt_timeout(45) == httpx.Timeout(30, connect=5)
+    assert policy.attempt_timeout(45, timeout=10) == httpx.Timeout(10, connect=5)
+    assert policy.attempt_timeout(3) == httpx.Timeout(3, connect=3)
+    assert ResiliencePolicy(CircuitBreaker("test")).attempt_timeout(12) == httpx.Timeout(12, connect=12)
+
+
+def test_each_attempt_gets_the_remaining_deadline(sleeps):
+    upstream = Upstream()
+    policy = ResiliencePolicy(CircuitBreaker("test"), deadline=20, connect_timeout=5)
+    policy.call(upstream, model="gpt-3.5-turbo", timeout=60)
+    timeout = upstream.calls[0]["timeout"]
+    assert 19 < timeout.read <= 20
+    assert timeout.connect == 5
+    assert upstream.calls[0]["model"] == "gpt-3.5-turbo"
+
+
+def test_hedge_answers_when_the_first_attempt_is_slow():
+    answers = iter(["slow", "fast"])
+
+    def fn(**kwargs):
+        answer = next(answers)
+        if answer == "slow":
+            time.sleep(0.3)
+        return answer
+
+    policy = ResiliencePolicy(CircuitBreaker("test"), hedge_after=0.05, deadline=10)
+    assert policy.call(fn) == "fast"
+
+
+def test_async_call_retries_and_hedges(monkeypatch):
+    monkeypatch.setattr(resilience, "backoff_delay", lambda attempt: 0.0)
+    attempts = []
+
+    async def fn(**kwargs):
+        attempts.append(kwargs)
+        if len(attempts) == 1:
+            raise connection_error()
+        if len(attempts) == 2:
+            await asyncio.sleep(1)
+            return "slow"
+        return "hedge"
+
+    policy = ResiliencePolicy(CircuitBreaker("test"), max_retries=1, hedge_after=0.05, deadline=10)
+    assert asyncio.run(policy.acall(fn)) == "hedge"
+    assert len(attempts) == 3
@@ -0,0 +1,106 @@
+import pytest
+
+import session_store
+from session_store import InMemorySessionStore, SQLiteSessionStore
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A controllable time.time() for the session store."""
+    now = [1000.0]
+    monkeypatch.setattr(session_store.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    def make(**options):
+        if request.param == "sqlite":
+            return SQLiteSessionStore(str(tmp_path / "sessions.db"), **options)
+        return InMemorySessionStore(**options)
+    return make
+
+
+def test_turns_are_returned_oldest_first(make_store):
+    store = make_store()
+    store.append_turn("s", "hi", "hello")
+    store.append_turn("s", "how are you", "fine")
+    assert [tuple(turn) for turn in store.get_turns("s")] == [("hi", "hello"), ("how are you", "fine")]
+    assert store.get_turns("unknown") == []
+
+
+def test_keeps_only_the_latest_turns(make_store):
+    store = make_store(max_turns=2)
+    for i in range(4):
+        store.append_turn("s", f"m{i}", f"r{i}")
+    assert [tuple(turn) for turn in store.get_turns("s")] == [("m2", "r2"), ("m3", "r3")]
+    assert store.stats()["turns"] == 2
+
+
+def test_drops_least_recently_used_sessions_over_the_cap(make_store, clock):
+    store = make_store(max_sessions=2)
+    store.append_turn("a", "m", "r")
+    clock[0] += 1
+    store.append_turn("b", "m", "r")
+    clock[0] += 1
+    # Reading "a" makes "b" the least recently used
+    store.get_turns("a")
+    clock[0] += 1
+    store.append_turn("c", "m", "r")
+    assert store.get_turns("b") == []
+    assert store.get_turns("a") and store.get_turns("c")
+    assert store.stats()["sessions"] == 2
+
+
+def test_idle_sessions_expire(make_store, clock):
+    store = make_store(idle_ttl=60)
+    store.append_turn("idle", "m", "r")
+    clock[0] += 30
+    store.append_turn("active", "m", "r")
+    clock[0] += 45
+    assert store.get_turns("idle") == []
+    assert store.get_turns("active")
+
+
+def test_access_refreshes_idle_ttl(make_store, clock):
+    store = make_store(idle_ttl=60)
+    store.append_turn("s", "m", "r")
+    clock[0] += 50
+    assert store.get_turns("s")
+    clock[0] += 50
+    assert store.get_turns("s")
+
+
+def test_byte_cap_drops_oldest_sessions_but_keeps_the_newest(make_store, clock):
+    store = make_store(max_bytes=25)
+    store.append_turn("a", "x" * 10, "y" * 10)
+    clock[0] += 1
+    store.append_turn("b", "x" * 10, "y" * 10)
+    assert store.get_turns("a") == []
+    assert store.get_turns("b")
+    assert store.stats()["bytes"] == 20
+
+    # A single session over the cap is kept rather than emptied
+    clock[0] += 1
+    store.append_turn("b", "x" * 10, "y" * 10)
+    assert len(store.get_turns("b")) == 2
+
+
+def test_clear_forgets_a_session(make_store):
+    store = make_store()
+    store.append_turn("s", "m", "r")
+    store.clear("s")
+    assert store.get_turns("s") == []
+    assert store.stats()["bytes"] == 0
+
+
+def test_sqlite_sessions_are_shared_between_instances(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    SQLiteSessionStore(path).append_turn("s", "m", "r")
+    assert SQLiteSessionStore(path).get_turns("s") == [("m", "r")]
+
+
+def test_create_session_store_rejects_unknown_backends(monkeypatch):
+    monkeypatch.setenv("SESSION_STORE", "redis")
+    with pytest.raises(ValueError):
+        session_store.create_session_store()
@@ -0,0 +1,100 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def _run_concurrently(flight, fn, release, callers=5):
+    """Call flight.do("key", fn) from several threads, then let the blocked first call finish."""
+    with ThreadPoolExecutor(max_workers=callers) as executor:
+        futures = [executor.submit(flight.do, "key", fn) for _ in range(callers)]
+        # Every caller has joined the flight once the counters show it
+        while flight.stats()["calls"] < callers:
+            threading.Event().wait(0.001)
+        release.set()
+    return futures
+
+
+def test_concurrent_calls_share_one_result():
+    flight = SingleFlight("test")
+    release = threading.Event()
+    executions = []
+
+    def fn():
+        executions.append(1)
+        release.wait(5)
+        return {"answer": 42}
+
+    futures = _run_concurrently(flight, fn, release)
+    results = [future.result(timeout=5) for future in futures]
+
+    assert len(executions) == 1
+    assert all(result is results[0] for result in results)
+    stats = flight.stats()
+    assert (stats["calls"], stats["executed"], stats["coalesced"], stats["in_flight"]) == (5, 1, 4, 0)
+
+
+def test_concurrent_calls_share_one_exception():
+    flight = SingleFlight("test")
+    release = threading.Event()
+
+    def fn():
+        release.wait(5)
+        raise ValueError("upstream failed")
+
+    futures = _run_concurrently(flight, fn, release, callers=3)
+    for future in futures:
+        with pytest.raises(ValueError, match="upstream failed"):
+            future.result(timeout=5)
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_sequential_calls_are_not_remembered():
+    flight = SingleFlight("test")
+    results = iter([1, 2])
+    assert flight.do("key", lambda: next(results)) == 1
+    assert flight.do("key", lambda: next(results)) == 2
+    assert flight.stats()["coalesced"] == 0
+
+
+def test_async_calls_share_one_result():
+    flight = SingleFlight("test")
+    executions = []
+
+    async def fn(value):
+        executions.append(value)
+        await asyncio.sleep(0.01)
+        return value * 2
+
+    async def main():
+        same = await asyncio.gather(*(flight.ado("key", fn, 21) for _ in range(4)))
+        other = await flight.ado("other", fn, 5)
+        return same, other
+
+    same, other = asyncio.run(main())
+    assert same == [42] * 4
+    assert other == 10
+    assert executions == [21, 5]
+    assert flight.stats()["coalesced"] == 3
+
+
+def test_cancelled_async_leader_fails_waiters_without_cancelling_them():
+    flight = SingleFlight("test")
+
+    async def fn():
+        await asyncio.sleep(10)
+
+    async def main():
+        leader = asyncio.ensure_future(flight.ado("key", fn))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(flight.ado("key", fn))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(RuntimeError, match="cancelled"):
+            await waiter
+
+    asyncio.run(main())
+    assert flight.stats()["in_flight"] == 0
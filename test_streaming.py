@@ -0,0 +1,41 @@
+from types import SimpleNamespace
+
+from streaming import sse_event, stream_completion_text
+
+
+def delta_chunk(content):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+
+
+class Response:
+    """A streamed completion that records whether it was closed."""
+
+    def __init__(self, *deltas):
+        self.deltas = deltas
+        self.closed = False
+
+    def __iter__(self):
+        for delta in self.deltas:
+            yield delta_chunk(delta)
+
+    def close(self):
+        self.closed = True
+
+
+def test_yields_non_empty_deltas_and_closes_the_response():
+    upstream = Response("Hello", None, "", " world")
+    assert list(stream_completion_text(upstream)) == ["Hello", " world"]
+    assert upstream.closed
+
+
+def test_closes_the_response_when_abandoned():
+    upstream = Response("Hello", " world")
+    deltas = stream_completion_text(upstream)
+    assert next(deltas) == "Hello"
+    deltas.close()
+    assert upstream.closed
+
+
+def test_sse_event_format():
+    assert sse_event({"a": 1}) == 'data: {"a": 1}\n\n'
+    assert sse_event("done", event="end") == 'event: end\ndata: "done"\n\n'
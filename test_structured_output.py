@@ -0,0 +1,111 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from streaming import JSONSectionStream
+from structured_output import (
+    acomplete, complete, is_list, is_text, missing_sections, parse_json_object, repair
+)
+
+SCHEMA = {"overview": is_text, "skills": is_list, "outlook": is_text}
+MESSAGES = [{"role": "system", "content": "Describe the career as JSON."}]
+
+
+def response(content):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+class FakeCompletions:
+    """A create function answering with the given texts in turn and recording each request."""
+
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.requests = []
+
+    def __call__(self, **kwargs):
+        self.requests.append(kwargs)
+        return response(self.answers.pop(0))
+
+
+def test_parses_valid_and_fenced_json():
+    assert parse_json_object('{"a": 1}') == {"a": 1}
+    assert parse_json_object('Here you go:\n```json\n{"a": [1, 2]}\n```\nEnjoy!') == {"a": [1, 2]}
+    assert parse_json_object("[1, 2]") is None
+    assert parse_json_object("") is None
+    assert parse_json_object("no json here") is None
+
+
+def test_truncated_json_keeps_complete_members():
+    text = '{"overview": "Builds software", "skills": ["Python", "SQL"], "outlook": "Gro'
+    assert parse_json_object(text) == {"overview": "Builds software", "skills": ["Python", "SQL"]}
+    assert parse_json_object('```json\n{"overview": "Builds, ships", "skills": ["Py') == {
+        "overview": "Builds, ships"
+    }
+
+
+def test_missing_sections_checks_presence_and_validity():
+    data = {"overview": "  ", "skills": ["Python"]}
+    assert missing_sections(data, SCHEMA) == ["overview", "outlook"]
+
+
+def test_complete_repairs_only_the_missing_sections():
+    create = FakeCompletions(
+        '{"overview": "Builds software", "skills": ["Python"], "outl',
+        '{"outlook": "Strong demand", "overview": "Should not replace the first answer"}'
+    )
+    data, missing = complete(create, "career", SCHEMA, MESSAGES, tokens_per_section=100,
+                             model="gpt-3.5-turbo", max_tokens=800)
+
+    assert missing == []
+    assert data == {"overview": "Builds software", "skills": ["Python"], "outlook": "Strong demand"}
+    first, follow_up = create.requests
+    assert first["max_tokens"] == 800
+    assert first["response_format"] == {"type": "json_object"}
+    assert follow_up["max_tokens"] == 100
+    assert '"outlook"' in follow_up["messages"][-1]["content"]
+    assert follow_up["messages"][:-1] == MESSAGES
+
+
+def test_valid_answer_needs_no_repair():
+    create = FakeCompletions(json.dumps({"overview": "x", "skills": ["y"], "outlook": "z"}))
+    data, missing = complete(create, "career", SCHEMA, MESSAGES)
+    assert missing == [] and len(create.requests) == 1
+
+
+def test_repair_reports_what_is_still_missing():
+    create = FakeCompletions('{"outlook": ""}')
+    data = {"overview": "Builds software"}
+    assert repair(create, "career", SCHEMA, MESSAGES, data) == ["skills", "outlook"]
+    assert data == {"overview": "Builds software"}
+
+
+def test_failed_repair_keeps_the_recovered_sections():
+    def create(**kwargs):
+        if "Return a JSON object containing ONLY" in kwargs["messages"][-1]["content"]:
+            raise RuntimeError("upstream down")
+        return response('{"overview": "Builds software", "skills": [')
+
+    data, missing = complete(create, "career", SCHEMA, MESSAGES)
+    assert data == {"overview": "Builds software"}
+    assert missing == ["skills", "outlook"]
+
+
+def test_acomplete_repairs_like_complete():
+    create = FakeCompletions('{"overview": "Builds software"}', '{"skills": ["Python"], "outlook": "Good"}')
+
+    async def acreate(**kwargs):
+        return create(**kwargs)
+
+    data, missing = asyncio.run(acomplete(acreate, "career", SCHEMA, MESSAGES))
+    assert missing == []
+    assert data["skills"] == ["Python"]
+
+
+def test_section_stream_emits_members_as_they_complete():
+    stream = JSONSectionStream()
+    assert stream.feed('```json\n{"overview": "Builds {things}, and') == []
+    assert stream.feed(' \\"ships\\" them", "skills": ["Py') == [("overview", 'Builds {things}, and "ships" them')]
+    assert stream.feed('thon", "SQL"], "meta": {"a": [1, 2]}') == [("skills", ["Python", "SQL"])]
+    assert stream.feed("}\n```") == [("meta", {"a": [1, 2]})]
+    assert stream.closed
+    assert stream.feed('{"ignored": 1}') == []
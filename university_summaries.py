@@ -1,8 +1,41 @@
 import os
 import json
+import logging
 from typing import Dict, Optional, TypedDict
-from openai import OpenAI
 from openai.types.chat import ChatCompletionMessage
+from llm import get_client, chat_completion
+from cache import TTLCache, make_key, normalize_text
+from metrics import track_phase
+
+logger = logging.getLogger(__name__)
+
+UNIVERSITY_SUMMARY_MODEL = "gpt-4-turbo-preview"
+
+# Bump whenever the prompt changes so stale cached summaries are not served
+UNIVERSITY_SUMMARY_PROMPT_VERSION = "1"
+
+# Summaries change about once a year; the SQLite file keeps them across restarts. Serving reads
+# what pregenerate_university_summaries.py wrote there, so in production the path must be on
+# persistent storage (fly.toml mounts a volume at /data and points UNIVERSITY_SUMMARY_CACHE_PATH at it)
+university_summary_cache = TTLCache(
+    maxsize=int(os.getenv("UNIVERSITY_SUMMARY_CACHE_SIZE", "2048")),
+    ttl=float(os.getenv("UNIVERSITY_SUMMARY_CACHE_TTL", str(365 * 24 * 3600))),
+    path=os.getenv(
+        "UNIVERSITY_SUMMARY_CACHE_PATH",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "university_summaries.sqlite3")
+    ),
+    name="university_summaries"
+)
+
+def university_summary_cache_key(university_name: str, additional_info: Optional[Dict] = None) -> str:
+    """
+    Cache key from the normalized name plus a stable hash of the context that reaches the prompt
+    """
+    context = {key: value for key, value in (additional_info or {}).items() if value}
+    return make_key(
+        normalize_text(university_name), context,
+        UNIVERSITY_SUMMARY_PROMPT_VERSION, UNIVERSITY_SUMMARY_MODEL
+    )
 
 class UniversitySummary(TypedDict):
     overview: str
@@ -12,13 +45,41 @@ class UniversitySummary(TypedDict):
     unique_features: str
 
 class UniversitySummaryGenerator:
-    def __init__(self):
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    @property
+    def client(self):
+        # Shared process-wide client, created on first use
+        return get_client()
+
+    def fallback_summary(self, university_name: str) -> UniversitySummary:
+        return {
+            "overview": f"Unable to generate summary for {university_name}.",
+            "academic_programs": "N/A",
+            "campus_life": "N/A",
+            "achievements": "N/A",
+            "unique_features": "N/A"
+        }
 
-    def generate_summary(self, university_name: str, additional_info: Optional[Dict] = None) -> UniversitySummary:
+    def get_cached_summary(self, university_name: str, additional_info: Optional[Dict] = None) -> Optional[UniversitySummary]:
+        """
+        Return the pre-generated summary, or None if it has not been generated yet.
+        """
+        cached = university_summary_cache.get(university_summary_cache_key(university_name, additional_info))
+        return dict(cached) if cached is not None else None
+
+    def generate_summary(self, university_name: str, additional_info: Optional[Dict] = None,
+                         cache_only: bool = False) -> UniversitySummary:
         """
         Generate a structured summary for a university using GPT-4.
+
+        Summaries are served from the persistent cache when available. With
+        cache_only, a miss returns the placeholder summary instead of calling GPT.
         """
+        cached = self.get_cached_summary(university_name, additional_info)
+        if cached is not None:
+            return cached
+        if cache_only:
+            return self.fallback_summary(university_name)
+
         # Build a flexible prompt
         prompt_parts = [
             f"Generate a structured university summary for '{university_name}'.",
@@ -38,8 +99,10 @@ class UniversitySummaryGenerator:
         prompt = "\n".join(prompt_parts)
 
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4-turbo-preview",  # Using the latest GPT-4 model
+            # Summaries are cached for a year under UNIVERSITY_SUMMARY_MODEL, so never take a cheaper model's answer
+            response = chat_completion(
+                model=UNIVERSITY_SUMMARY_MODEL,
+                allow_downgrade=False,
                 messages=[
                     {"role": "system", "content": "You are an expert education advisor. Respond ONLY with valid JSON."},
                     {"role": "user", "content": prompt}
@@ -50,7 +113,8 @@ class UniversitySummaryGenerator:
             )
 
             content = response.choices[0].message.content
-            summary = json.loads(content)
+            with track_phase("json_parse"):
+                summary = json.loads(content)
 
             # Validate the summary has all required fields
             expected_fields = ["overview", "academic_programs", "campus_life", "achievements", "unique_features"]
@@ -62,21 +126,16 @@ class UniversitySummaryGenerator:
                 if not isinstance(summary[field], str) or not summary[field].strip():
                     raise ValueError(f"Invalid content in {field} field")
 
+            university_summary_cache.set(university_summary_cache_key(university_name, additional_info), summary)
             return summary
 
         except json.JSONDecodeError as e:
-            print("❌ JSON parse error:", str(e))
+            logger.warning("University summary JSON parse error: %s", e)
             raise ValueError("Model returned invalid JSON.")
 
         except Exception as e:
-            print("❌ Error generating university summary:", str(e))
-            return {
-                "overview": f"Unable to generate summary for {university_name}.",
-                "academic_programs": "N/A",
-                "campus_life": "N/A",
-                "achievements": "N/A",
-                "unique_features": "N/A"
-            }
+            logger.error("Error generating university summary: %s", e, extra={"university": university_name})
+            return self.fallback_summary(university_name)
 
 # Singleton usage
 university_summary_generator = UniversitySummaryGenerator()